@@ -0,0 +1,55 @@
+"""
+Hot ranking refresh cost.
+
+Loads a synthetic corpus (default 1M posts, heavy-tailed like counts, ages up to 30 days)
+into src.adapters.ranking.HotRanking and times a full re-score + sort, a like update and a
+keyset page lookup.
+
+    python -m benchmarks.bench_hot --posts 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from src.adapters.ranking import HotRanking
+
+
+def _timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(posts: int, repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    now = time.time()
+    ids = np.arange(1, posts + 1)
+    likes = rng.zipf(1.8, posts).clip(max=1_000_000) - 1
+    created_at = now - rng.uniform(0, 30 * 86400, posts)
+
+    ranking = HotRanking(clock=lambda: now)
+    start = time.perf_counter()
+    ranking.load(ids, likes, created_at)
+    print(f"{posts} posts loaded and ranked in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    _, last, _ = ranking.page(20)
+    middle = ranking.page(1, {"score": last[0], "id": last[1]})
+    print(f"{'refresh':<14}{_timed(ranking.refresh, repeat):>10.1f} ms")
+    print(f"{'set_likes':<14}{_timed(lambda: ranking.set_likes(posts // 2, 7), repeat) * 1000:>10.1f} us")
+    deep = {"score": middle[1][0], "id": middle[1][1]}
+    print(f"{'page (keyset)':<14}{_timed(lambda: ranking.page(20, deep), repeat) * 1000:>10.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.posts, args.repeat)
@@ -0,0 +1,62 @@
+"""
+Login throughput vs. password-hashing pool size.
+
+Simulates N concurrent logins (one bcrypt verify each) against src.adapters.passwords.PasswordHasher
+and reports logins/second for the inline baseline (verify on the event loop, the old behaviour),
+the thread mode (BCRYPT_POOL_SIZE=0) and process pools from 1 worker up to the CPU count.
+
+    python -m benchmarks.bench_login --rounds 12 --logins 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from src.adapters.passwords import PasswordHasher, verify_password
+
+
+async def _inline(stored: str, logins: int, rounds: int) -> None:
+    async def login() -> None:
+        verify_password("correct horse", stored, rounds)
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+async def _pooled(hasher: PasswordHasher, stored: str, logins: int) -> None:
+    await asyncio.gather(*(hasher.verify("correct horse", stored) for _ in range(logins)))
+
+
+async def main(rounds: int, logins: int) -> None:
+    stored = await PasswordHasher(rounds=rounds, pool_size=0).hash("correct horse")
+    cpus = os.cpu_count() or 1
+    sizes = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+
+    print(f"bcrypt rounds={rounds}, {logins} concurrent logins, {cpus} CPUs")
+    print(f"{'mode':<12}{'workers':>8}{'logins/s':>12}")
+
+    start = time.perf_counter()
+    await _inline(stored, logins, rounds)
+    print(f"{'inline':<12}{'-':>8}{logins / (time.perf_counter() - start):>12.1f}")
+
+    for mode, pool_size in [("threads", 0)] + [("processes", n) for n in sizes]:
+        hasher = PasswordHasher(rounds=rounds, pool_size=pool_size)
+        try:
+            # Start every worker process outside the timed section
+            await asyncio.gather(*(hasher.verify("warm up", stored) for _ in range(max(pool_size, 1))))
+            start = time.perf_counter()
+            await _pooled(hasher, stored, logins)
+            elapsed = time.perf_counter() - start
+        finally:
+            hasher.shutdown()
+        workers = pool_size or "-"
+        print(f"{mode:<12}{workers:>8}{logins / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.logins))
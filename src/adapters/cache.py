@@ -0,0 +1,228 @@
+"""
+Bounded in-process caches.
+
+Entries live for `ttl` seconds and the least recently used entry is evicted once `max_entries`
+(and, for view caches, `max_bytes`) is reached. Each worker process has its own cache, so
+cross-worker staleness is bounded by the TTL; event handlers invalidate the local copy immediately.
+"""
+from __future__ import annotations
+
+import abc
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        # The sync bus runs handlers (and their invalidations) on worker threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry else None
+
+    def discard_where(self, predicate: Callable[[Hashable, V], bool]) -> int:
+        """Drop every entry matching predicate(key, value); returns how many were dropped."""
+        with self._lock:
+            doomed = [key for key, (_, value) in self._entries.items() if predicate(key, value)]
+            for key in doomed:
+                del self._entries[key]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# --- View caches ---
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    # Serve-stale window end; equal to expires_at when stale-while-revalidate is off
+    stale_until: float
+    # Tag generations when the value was computed; any later bump invalidates the entry
+    generations: Dict[str, int] = field(default_factory=dict)
+
+
+FRESH, STALE = "fresh", "stale"
+
+
+class AbstractViewCache(abc.ABC):
+    """
+    Storage for view results keyed by view and arguments, grouped by tags for invalidation.
+    Invalidation bumps a per-tag generation counter instead of scanning entries.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generations(self, tags: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {tag: self._generations.get(tag, 0) for tag in tags}
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                self.invalidations += 1
+
+    def lookup(self, key: str, now: float) -> Tuple[Optional[str], Optional[CacheEntry]]:
+        """(FRESH | STALE | None, entry); entries past their stale window or invalidated are misses."""
+        entry = self._get(key)
+        if entry is not None and entry.generations != self.generations(entry.generations):
+            self._delete(key)
+            entry = None
+        if entry is None or entry.stale_until <= now:
+            self.misses += 1
+            return None, None
+        if entry.expires_at <= now:
+            self.stale_hits += 1
+            return STALE, entry
+        self.hits += 1
+        return FRESH, entry
+
+    def store(self, key: str, entry: CacheEntry) -> None:
+        # Computed against generations that have since moved on: a write raced the query
+        if entry.generations != self.generations(entry.generations):
+            return
+        self._set(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+        }
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[CacheEntry]: ...
+
+    @abc.abstractmethod
+    def _set(self, key: str, entry: CacheEntry) -> None: ...
+
+    @abc.abstractmethod
+    def _delete(self, key: str) -> None: ...
+
+    @abc.abstractmethod
+    def clear(self) -> None: ...
+
+
+class InMemoryViewCache(AbstractViewCache):
+    """LRU bounded by entry count and by the summed (approximate) size of the cached values."""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,250 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms keyed by label values, plus collector callbacks for values
+read at scrape time (pool sizes and the like). Each metric takes its own lock, so recording
+from request handlers, worker threads and the outbox dispatcher is safe and costs about a
+microsecond. Values are per process: with several workers, scrape each one (or sum them).
+
+    registry = MetricsRegistry()
+    handled = registry.counter("jobs_total", "Jobs run", ["kind"])
+    handled.labels("email").inc()
+    registry.render()  # text/plain; version=0.0.4
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from sub-millisecond cache hits to multi-second stalls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def labels(self, *values: str):
+        # Hot path: one dict lookup for label values seen before
+        child = self._children.get(values)
+        if child is None:
+            child = self._add_child(values)
+        return child
+
+    def _add_child(self, values: Tuple) -> object:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            return self._children.setdefault(key, self._new_child())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+            if not self.labelnames:
+                self._unlabelled = self._children.setdefault((), self._new_child())
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for key, child in list(self._children.items()):
+            samples.extend(self._child_samples(dict(zip(self.labelnames, key)), child))
+        return samples
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _child_samples(self, labels: Dict[str, str], child) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    # Name counters with the conventional `_total` suffix; samples use the name as given
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled.inc(amount)
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def _child_samples(self, labels, child) -> Iterable[Sample]:
+        yield self.name, labels, child.value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabelled.set(value)
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def _child_samples(self, labels, child) -> Iterable[Sample]:
+        yield self.name, labels, child.value
+
+
+class _HistogramValue:
+    __slots__ = ("_lock", "_bounds", "buckets", "sum", "count")
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]) -> None:
+        self._lock = lock
+        self._bounds = bounds
+        # Non-cumulative per-bucket counts; the last slot is +Inf
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled.observe(value)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self._lock, self.bounds)
+
+    def _child_samples(self, labels, child) -> Iterable[Sample]:
+        with self._lock:
+            buckets, total, count = list(child.buckets), child.sum, child.count
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + (math.inf,), buckets):
+            cumulative += bucket
+            yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+        yield f"{self.name}_sum", labels, total
+        yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[Gauge, Sequence[str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def add_collector(self, collect: Callable[[], Iterable[Tuple[Gauge, Sequence[str], float]]]) -> None:
+        """`collect()` runs on every render and yields (gauge, label values, value) to set."""
+        self._collectors.append(collect)
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def clear(self) -> None:
+        """Reset every value (tests); registrations and collectors stay."""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            for gauge, labels, value in collect():
+                gauge.labels(*labels).set(value)
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry behind /metrics
+registry = MetricsRegistry()
@@ -0,0 +1,80 @@
+"""
+bcrypt hashing off the event loop.
+
+Each hash/verify costs a few hundred milliseconds of CPU at production cost factors, so the
+async API hands the work to a bounded process pool (one bcrypt per core, no GIL contention).
+This module imports nothing from the app so spawned workers start quickly.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt only looks at the first 72 bytes; truncate so hashing and verification agree
+BCRYPT_MAX_BYTES = 72
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    # min == max == default: any stored hash at another cost reports needs_update
+    return CryptContext(
+        schemes=["bcrypt"],
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _secret(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(_secret(password))
+
+
+def verify_password(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """(valid, replacement hash if `hashed` was made at a different cost, else None)."""
+    if not hashed:
+        return False, None
+    return crypt_context(rounds).verify_and_update(_secret(password), hashed)
+
+
+class PasswordHasher:
+    """
+    Async facade over hash_password/verify_password. `pool_size` worker processes
+    (default: CPU count) bound how many run at once; 0 uses the loop's default thread pool.
+    """
+
+    def __init__(self, rounds: int, pool_size: Optional[int] = None) -> None:
+        self.rounds = rounds
+        self.pool_size = (os.cpu_count() or 1) if pool_size is None else pool_size
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.pool_size and self._executor is None:
+            # spawn: never fork a process that is running an event loop and DB threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), partial(fn, *args))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_password, password, hashed, self.rounds)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,154 @@
+"""
+Per-request SQL statement counts, for spotting N+1 query patterns.
+
+Statements run through the SQLAlchemy engines (instrument_engine) or the `databases` client
+(InstrumentedDatabase) count towards the active `track()` block, if any, and towards the
+request's Server-Timing `db` phase (src.adapters.timing). QueryCounterMiddleware tracks every
+request when it is enabled; tests use the `assert_max_queries` fixture. Blocks nest: a
+statement counts towards each enclosing block. With neither in use, the hooks cost two
+ContextVar lookups per statement.
+
+    with track() as stats:
+        ...
+    stats.count, stats.seconds, stats.repeated(5)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import databases
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.adapters import timing
+
+
+class QueryStats:
+    def __init__(self, parent: Optional[QueryStats] = None) -> None:
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        # Statement text -> executions; the same text many times over is the N+1 signature
+        self.statements: Dict[str, int] = {}
+        # Sync repositories run statements on worker threads
+        self._lock = threading.Lock()
+
+    def add(self, statement: str, seconds: float) -> None:
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            with stats._lock:
+                stats.count += 1
+                stats.seconds += seconds
+                stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats = stats.parent
+
+    def repeated(self, at_least: int) -> List[Tuple[str, int]]:
+        """Statements run `at_least` times or more, most frequent first."""
+        with self._lock:
+            items = [(statement, n) for statement, n in self.statements.items() if n >= at_least]
+        return sorted(items, key=lambda item: -item[1])
+
+    def describe(self) -> str:
+        lines = [f"{self.count} statements in {self.seconds * 1000:.1f} ms"]
+        lines.extend(f"  {n}x {' '.join(statement.split())}" for statement, n in self.repeated(1))
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    """Count the statements run in this block (and in tasks and threads it starts)."""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _observing() -> bool:
+    return _current.get() is not None or timing.current() is not None
+
+
+def _observe(statement: str, seconds: float) -> None:
+    timing.record("db", seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, seconds)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _observing():
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        _observe(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Observe statements run on `engine` (for an AsyncEngine, pass its sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class InstrumentedDatabase(databases.Database):
+    """
+    `databases.Database` whose queries are observed like engine statements. The SQLite and
+    asyncpg backends talk to their drivers directly, so the engine events never see these.
+    iterate() is left alone: it streams response bodies, after the request's counts are read.
+    """
+
+    @staticmethod
+    def _started() -> Optional[float]:
+        return time.perf_counter() if _observing() else None
+
+    @staticmethod
+    def _finished(query: Any, started: Optional[float]) -> None:
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            _observe(str(query), elapsed)
+
+    async def fetch_all(self, query, values: Optional[dict] = None):
+        started = self._started()
+        try:
+            return await super().fetch_all(query, values)
+        finally:
+            self._finished(query, started)
+
+    async def fetch_one(self, query, values: Optional[dict] = None):
+        started = self._started()
+        try:
+            return await super().fetch_one(query, values)
+        finally:
+            self._finished(query, started)
+
+    async def fetch_val(self, query, values: Optional[dict] = None, column: Any = 0):
+        started = self._started()
+        try:
+            return await super().fetch_val(query, values, column=column)
+        finally:
+            self._finished(query, started)
+
+    async def execute(self, query, values: Optional[dict] = None):
+        started = self._started()
+        try:
+            return await super().execute(query, values)
+        finally:
+            self._finished(query, started)
+
+    async def execute_many(self, query, values: list):
+        started = self._started()
+        try:
+            return await super().execute_many(query, values)
+        finally:
+            self._finished(query, started)
@@ -0,0 +1,158 @@
+"""
+In-memory "hot" ranking of posts.
+
+Posts are held as parallel NumPy arrays (id, like count, creation time). A refresh scores
+every post at once, score = likes / (age_hours + 2) ** gravity, so likes count for less as a
+post ages, and sorts by (score desc, id desc). Pages are found by binary search on that order,
+the same (score, id) keyset the feed cursors use.
+
+Like counts change in place (O(log n) lookup by id); new posts are buffered and merged on the
+next refresh. Readers always see a complete ranking: a refresh builds a new snapshot and
+swaps it in.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Added to the age so brand new posts do not divide by ~0
+AGE_OFFSET_HOURS = 2.0
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    ranked_ids: np.ndarray
+    # Ascending, i.e. best first: -score in rank order
+    neg_scores: np.ndarray
+    refreshed_at: float
+
+
+_EMPTY = _Snapshot(np.empty(0, np.int64), np.empty(0, np.float64), 0.0)
+
+
+def hot_scores(likes: np.ndarray, created_at: np.ndarray, now: float, gravity: float) -> np.ndarray:
+    age_hours = np.maximum(now - created_at, 0.0) / 3600.0
+    return likes / np.power(age_hours + AGE_OFFSET_HOURS, gravity)
+
+
+class HotRanking:
+    def __init__(self, gravity: float = 1.8, clock: Callable[[], float] = time.time) -> None:
+        self.gravity = gravity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget everything; the next reader reloads from the database."""
+        with self._lock:
+            self._ids = np.empty(0, np.int64)
+            self._likes = np.empty(0, np.int64)
+            self._created_at = np.empty(0, np.float64)
+            self._pending: Dict[int, List[float]] = {}
+            self._snapshot = _EMPTY
+            self.loaded_at: Optional[float] = None
+            self.dirty = False
+            self.refreshes = 0
+
+    # --- Writes ---
+
+    def load(self, ids, likes, created_at) -> None:
+        """Replace the corpus (e.g. a periodic reload from the posts table) and re-rank."""
+        ids = np.asarray(ids, np.int64)
+        order = np.argsort(ids, kind="stable")
+        with self._lock:
+            self._ids = ids[order]
+            self._likes = np.asarray(likes, np.int64)[order]
+            self._created_at = np.asarray(created_at, np.float64)[order]
+            self._pending = {}
+            self.loaded_at = self._clock()
+            self.dirty = True
+        self.refresh()
+
+    def add_post(self, post_id: int, created_at: Optional[float] = None, likes: int = 0) -> None:
+        with self._lock:
+            if self._index(post_id) is None:
+                self._pending[post_id] = [likes, self._clock() if created_at is None else created_at]
+                self.dirty = True
+
+    def set_likes(self, post_id: int, like_count: int) -> bool:
+        """Update one post's like count; False if the post is unknown here."""
+        with self._lock:
+            index = self._index(post_id)
+            if index is not None:
+                self._likes[index] = like_count
+            elif post_id in self._pending:
+                self._pending[post_id][0] = like_count
+            else:
+                return False
+            self.dirty = True
+            return True
+
+    def _index(self, post_id: int) -> Optional[int]:
+        index = int(np.searchsorted(self._ids, post_id))
+        if index < len(self._ids) and self._ids[index] == post_id:
+            return index
+        return None
+
+    # --- Ranking ---
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Merge buffered posts, re-score everything at `now` and swap in the new order."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            if self._pending:
+                new_ids = np.fromiter(self._pending, np.int64, len(self._pending))
+                values = np.array(list(self._pending.values()), np.float64).reshape(-1, 2)
+                ids = np.concatenate([self._ids, new_ids])
+                order = np.argsort(ids, kind="stable")
+                self._ids = ids[order]
+                self._likes = np.concatenate([self._likes, values[:, 0].astype(np.int64)])[order]
+                self._created_at = np.concatenate([self._created_at, values[:, 1]])[order]
+                self._pending = {}
+            ids, likes, created_at = self._ids, self._likes.copy(), self._created_at
+            self.dirty = False
+        # Outside the lock: likes may keep changing while this (GIL-releasing) work runs
+        scores = hot_scores(likes, created_at, now, self.gravity)
+        order = np.lexsort((-ids, -scores))
+        self._snapshot = _Snapshot(ids[order], -scores[order], now)
+        self.refreshes += 1
+
+    @property
+    def refreshed_at(self) -> float:
+        return self._snapshot.refreshed_at
+
+    def __len__(self) -> int:
+        return len(self._snapshot.ranked_ids)
+
+    def page(
+        self, limit: int, after: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[int], Optional[Tuple[float, int]], bool]:
+        """(post ids, (score, id) of the last one, whether more follow) after keyset `after`."""
+        snapshot = self._snapshot
+        start = 0
+        if after:
+            neg_score = -float(after["score"])
+            lo = int(np.searchsorted(snapshot.neg_scores, neg_score, side="left"))
+            hi = int(np.searchsorted(snapshot.neg_scores, neg_score, side="right"))
+            # Within a tie ids descend; skip those at or above the cursor id
+            start = lo + int(np.searchsorted(-snapshot.ranked_ids[lo:hi], -int(after["id"]), side="right"))
+        end = min(start + limit, len(snapshot.ranked_ids))
+        ids = snapshot.ranked_ids[start:end].tolist()
+        if not ids:
+            return [], None, False
+        last = (float(-snapshot.neg_scores[end - 1]), ids[-1])
+        return ids, last, end < len(snapshot.ranked_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "posts": len(self),
+            "pending": len(self._pending),
+            "dirty": self.dirty,
+            "refreshes": self.refreshes,
+            "refreshed_at": self.refreshed_at or None,
+            "loaded_at": self.loaded_at,
+        }
@@ -1,14 +1,38 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import exists, func, literal, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.db import comment_table, likes_table, post_table, user_table
+from src.adapters import search
+from src.db import comment_table, likes_table, outbox_table, post_table, user_stats_table, user_table
 from src.domain import model
 from src.service_layer import repository as abs_repo
 
+# Post ids per IN (...) list; stays well under SQLite's and asyncpg's bind parameter limits
+HYDRATE_BATCH_SIZE = 5000
+
+
+def _actual_user_stats(user_id_column) -> Tuple:
+    """(posts_count, likes_received) subqueries for the user in `user_id_column`, from the source tables."""
+    posts_count = (
+        select(func.count())
+        .select_from(post_table)
+        .where(post_table.c.user_id == user_id_column)
+        .scalar_subquery()
+    )
+    likes_received = (
+        select(func.count())
+        .select_from(likes_table.join(post_table, likes_table.c.post_id == post_table.c.id))
+        .where(post_table.c.user_id == user_id_column)
+        .scalar_subquery()
+    )
+    return posts_count, likes_received
+
 
 class SqlAlchemyUserRepository(abs_repo.AbstractUserRepository):
     def __init__(self, session: Session) -> None:
@@ -53,6 +77,7 @@ class SqlAlchemyUserRepository(abs_repo.AbstractUserRepository):
         return self._row_to_agg(row)
 
     def _delete(self, user_id: int) -> None:
+        self.session.execute(user_stats_table.delete().where(user_stats_table.c.user_id == user_id))
         self.session.execute(user_table.delete().where(user_table.c.id == user_id))
 
     def _save(self, user: model.UserAggregate) -> None:
@@ -65,9 +90,56 @@ class SqlAlchemyUserRepository(abs_repo.AbstractUserRepository):
                 location=user.location,
                 avatar_url=user.avatar_url,
                 password=user.password_hash,
+                token_version=user.token_version,
             )
         )
 
+    def _bump_stats(self, user_id: int, posts: int, likes_received: int) -> None:
+        updated = self.session.execute(
+            user_stats_table.update()
+            .where(user_stats_table.c.user_id == user_id)
+            .values(
+                posts_count=user_stats_table.c.posts_count + posts,
+                likes_received=user_stats_table.c.likes_received + likes_received,
+            )
+        ).rowcount
+        if not updated:
+            # First write for this user: seed from the source tables, which already include it
+            self._insert_actual_stats(user_table.c.id == user_id)
+
+    def _reconcile_stats(self, user_id: Optional[int] = None) -> int:
+        created = self._insert_actual_stats(None if user_id is None else user_table.c.id == user_id)
+        posts_count, likes_received = _actual_user_stats(user_stats_table.c.user_id)
+        stmt = (
+            user_stats_table.update()
+            .where(
+                or_(
+                    user_stats_table.c.posts_count != posts_count,
+                    user_stats_table.c.likes_received != likes_received,
+                )
+            )
+            .values(posts_count=posts_count, likes_received=likes_received)
+        )
+        if user_id is not None:
+            stmt = stmt.where(user_stats_table.c.user_id == user_id)
+        return created + self.session.execute(stmt).rowcount
+
+    def _insert_actual_stats(self, where) -> int:
+        """user_stats rows computed from posts/likes for users (matching `where`) that have none."""
+        posts_count, likes_received = _actual_user_stats(user_table.c.id)
+        users = select(user_table.c.id, posts_count, likes_received).where(
+            ~exists().where(user_stats_table.c.user_id == user_table.c.id)
+        )
+        if where is not None:
+            users = users.where(where)
+        insert = (postgresql if self.session.get_bind().dialect.name == "postgresql" else sqlite).insert
+        stmt = (
+            insert(user_stats_table)
+            .from_select(["user_id", "posts_count", "likes_received"], users)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        return self.session.execute(stmt).rowcount
+
     def _row_to_agg(self, row) -> model.UserAggregate:
         user_entity = model.User(id=row["id"], email=row["email"], username=row["username"])
         return model.UserAggregate(
@@ -76,6 +148,7 @@ class SqlAlchemyUserRepository(abs_repo.AbstractUserRepository):
             location=row.get("location"),
             avatar_url=row.get("avatar_url"),
             password_hash=row.get("password"),
+            token_version=row.get("token_version") or 0,
         )
 
 
@@ -111,10 +184,11 @@ class SqlAlchemyPostRepository(abs_repo.AbstractPostRepository):
                     post_id=post.id,
                     user_id=comment.user_id,
                     body=comment.body,
-                    username=None,
+                    username=self._username_snapshot(comment.user_id),
                 ).returning(comment_table.c.id)
                 new_id = self.session.execute(stmt).scalar_one()
                 self.last_comment_id = new_id
+                self._bump_counters(post.id, comments=1)
                 # replace with a new Comment carrying the db id
                 post.comments.remove(comment)
                 post.comments.add(
@@ -127,54 +201,316 @@ class SqlAlchemyPostRepository(abs_repo.AbstractPostRepository):
                 )
         # Likes are handled via explicit add/remove methods
 
+    def _append_comment(self, post_id: int, user_id: int, body: str) -> Optional[model.CommentAppend]:
+        # Existence check and counter bump in one statement; the thread itself is never read
+        post = self.session.execute(
+            post_table.update()
+            .where(post_table.c.id == post_id)
+            .values(comment_count=post_table.c.comment_count + 1)
+            .returning(post_table.c.user_id, post_table.c.comment_count)
+        ).first()
+        if post is None:
+            return None
+        row = self.session.execute(
+            comment_table.insert()
+            .values(
+                post_id=post_id,
+                user_id=user_id,
+                body=body,
+                username=self._username_snapshot(user_id),
+            )
+            .returning(*comment_table.c)
+        ).mappings().one()
+        return model.CommentAppend(
+            comment=model.Comment(
+                id=row["id"],
+                post_id=row["post_id"],
+                user_id=row["user_id"],
+                body=row["body"],
+                username=row["username"],
+                created_at=row["created_at"],
+            ),
+            author_id=post.user_id,
+            comment_count=post.comment_count,
+        )
+
+    @staticmethod
+    def _username_snapshot(user_id: int):
+        # Resolved inside the INSERT so the snapshot costs no extra round trip
+        return select(user_table.c.username).where(user_table.c.id == user_id).scalar_subquery()
+
     def _add_like(self, post_id: int, user_id: int) -> None:
         self.session.execute(
             likes_table.insert().values(post_id=post_id, user_id=user_id)
         )
+        self._bump_counters(post_id, likes=1)
 
     def _remove_like(self, post_id: int, user_id: int) -> None:
-        self.session.execute(
+        result = self.session.execute(
             likes_table.delete().where(
                 likes_table.c.post_id == post_id, likes_table.c.user_id == user_id
             )
         )
+        if result.rowcount:
+            self._bump_counters(post_id, likes=-result.rowcount)
+
+    def _toggle_like(self, post_id: int, user_id: int) -> Optional[model.LikeToggle]:
+        if self.session.get_bind().dialect.name == "postgresql":
+            row = self.session.execute(self._toggle_like_statement(post_id, user_id)).mappings().first()
+            if row is None or row["like_count"] is None:
+                return None
+            return model.LikeToggle(
+                post_id=post_id,
+                user_id=user_id,
+                author_id=row["author_id"],
+                liked=row["liked"],
+                like_count=row["like_count"],
+                delta=row["delta"],
+            )
+
+        # SQLite (no data-modifying CTEs): same effect in up to three statements in this transaction
+        deleted = self.session.execute(
+            likes_table.delete()
+            .where(likes_table.c.post_id == post_id, likes_table.c.user_id == user_id)
+            .returning(likes_table.c.id)
+        ).first()
+        if deleted:
+            liked, delta = False, -1
+        else:
+            inserted = self.session.execute(
+                sqlite.insert(likes_table)
+                .values(post_id=post_id, user_id=user_id)
+                .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+                .returning(likes_table.c.id)
+            ).first()
+            # A concurrent request may have inserted the same like first; it is liked either way
+            liked, delta = True, 1 if inserted else 0
+        row = self.session.execute(
+            post_table.update()
+            .where(post_table.c.id == post_id)
+            .values(like_count=post_table.c.like_count + delta)
+            .returning(post_table.c.like_count, post_table.c.user_id)
+        ).first()
+        if row is None:
+            return None
+        return model.LikeToggle(
+            post_id=post_id,
+            user_id=user_id,
+            author_id=row.user_id,
+            liked=liked,
+            like_count=row.like_count,
+            delta=delta,
+        )
+
+    @staticmethod
+    def _toggle_like_statement(post_id: int, user_id: int):
+        """
+        PostgreSQL: delete-returning, insert-on-conflict (arbitrated by uq_likes_post_user) and the counter
+        update as one statement with data-modifying CTEs -- a single round trip.
+        """
+        deleted = (
+            likes_table.delete()
+            .where(likes_table.c.post_id == post_id, likes_table.c.user_id == user_id)
+            .returning(likes_table.c.id)
+            .cte("deleted")
+        )
+        post_exists = exists(select(post_table.c.id).where(post_table.c.id == post_id))
+        inserted = (
+            postgresql.insert(likes_table)
+            .from_select(
+                ["post_id", "user_id"],
+                select(literal(post_id), literal(user_id)).where(
+                    ~exists(select(deleted.c.id)), post_exists
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+            .returning(likes_table.c.id)
+            .cte("inserted")
+        )
+        delta = (
+            select(func.count()).select_from(inserted).scalar_subquery()
+            - select(func.count()).select_from(deleted).scalar_subquery()
+        )
+        updated = (
+            post_table.update()
+            .where(post_table.c.id == post_id)
+            .values(like_count=post_table.c.like_count + delta)
+            .returning(post_table.c.like_count, post_table.c.user_id)
+            .cte("updated")
+        )
+        return select(
+            (~exists(select(deleted.c.id))).label("liked"),
+            select(updated.c.like_count).scalar_subquery().label("like_count"),
+            select(updated.c.user_id).scalar_subquery().label("author_id"),
+            delta.label("delta"),
+        )
+
+    def _bump_counters(self, post_id: int, likes: int = 0, comments: int = 0) -> None:
+        # Runs in the caller's session so the counter moves in the same transaction as the row
+        self.session.execute(
+            post_table.update()
+            .where(post_table.c.id == post_id)
+            .values(
+                like_count=post_table.c.like_count + likes,
+                comment_count=post_table.c.comment_count + comments,
+            )
+        )
+
+    def _reconcile_counters(self, post_id: Optional[int] = None) -> int:
+        actual_likes = (
+            select(func.count())
+            .select_from(likes_table)
+            .where(likes_table.c.post_id == post_table.c.id)
+            .scalar_subquery()
+        )
+        actual_comments = (
+            select(func.count())
+            .select_from(comment_table)
+            .where(comment_table.c.post_id == post_table.c.id)
+            .scalar_subquery()
+        )
+        stmt = (
+            post_table.update()
+            .where(
+                or_(
+                    post_table.c.like_count != actual_likes,
+                    post_table.c.comment_count != actual_comments,
+                )
+            )
+            .values(like_count=actual_likes, comment_count=actual_comments)
+        )
+        if post_id is not None:
+            stmt = stmt.where(post_table.c.id == post_id)
+        return self.session.execute(stmt).rowcount
+
+    def _index_for_search(self, post_id: int) -> None:
+        search.index_post(self.session.connection(), post_id)
+
     def _get(self, post_id: int) -> Optional[model.PostAggregate]:
         stmt = select(post_table).where(post_table.c.id == post_id)
         row = self.session.execute(stmt).mappings().first()
         if not row:
             return None
-        return self._hydrate_post(row)
+        return self._hydrate_posts([row])[0]
 
     def _list_by_user(self, user_id: int) -> Iterable[model.PostAggregate]:
         stmt = select(post_table).where(post_table.c.user_id == user_id)
         rows = self.session.execute(stmt).mappings().all()
-        return [self._hydrate_post(row) for row in rows]
+        return self._hydrate_posts(rows)
 
     def _list_all(self, sort: Optional[str] = None) -> Iterable[model.PostAggregate]:
         stmt = select(post_table)
         rows = self.session.execute(stmt).mappings().all()
-        return [self._hydrate_post(row) for row in rows]
-
-    def _hydrate_post(self, row) -> model.PostAggregate:
-        post = model.PostAggregate(
-            id=row["id"],
-            user_id=row["user_id"],
-            username=row.get("username", ""),
-            body=row["body"],
-        )
-        # Load comments
-        c_stmt = select(comment_table).where(comment_table.c.post_id == post.id)
-        for crow in self.session.execute(c_stmt).mappings().all():
-            post.comments.add(
-                model.Comment(
-                    id=crow["id"],
-                    post_id=crow["post_id"],
-                    user_id=crow["user_id"],
-                    body=crow["body"],
+        return self._hydrate_posts(rows)
+
+    def _hydrate_posts(self, rows) -> List[model.PostAggregate]:
+        """
+        Build aggregates for a set of post rows with one comments query and one likes query
+        per batch of ids, instead of two queries per post.
+        """
+        posts: Dict[int, model.PostAggregate] = {
+            row["id"]: model.PostAggregate(
+                id=row["id"],
+                user_id=row["user_id"],
+                username=row.get("username", ""),
+                body=row["body"],
+            )
+            for row in rows
+        }
+        ids = list(posts)
+        for start in range(0, len(ids), HYDRATE_BATCH_SIZE):
+            batch = ids[start : start + HYDRATE_BATCH_SIZE]
+            c_stmt = select(comment_table).where(comment_table.c.post_id.in_(batch))
+            for crow in self.session.execute(c_stmt).mappings():
+                posts[crow["post_id"]].comments.add(
+                    model.Comment(
+                        id=crow["id"],
+                        post_id=crow["post_id"],
+                        user_id=crow["user_id"],
+                        body=crow["body"],
+                    )
+                )
+            l_stmt = select(likes_table.c.post_id, likes_table.c.user_id).where(
+                likes_table.c.post_id.in_(batch)
+            )
+            for lrow in self.session.execute(l_stmt).mappings():
+                posts[lrow["post_id"]].likes.add(
+                    model.Like(post_id=lrow["post_id"], user_id=lrow["user_id"])
                 )
+        return list(posts.values())
+
+
+class SqlAlchemyOutboxRepository(abs_repo.AbstractOutboxRepository):
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def _add(self, event_type: str, payload: Dict[str, Any]) -> None:
+        self.session.execute(
+            outbox_table.insert().values(
+                event_type=event_type, payload=payload, available_at=datetime.now(timezone.utc)
+            )
+        )
+
+    def _claim(self, limit: int, lease_seconds: float, max_attempts: int) -> List[abs_repo.OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        # SKIP LOCKED lets every worker's dispatcher claim disjoint batches (PostgreSQL; ignored on SQLite)
+        rows = self.session.execute(
+            select(outbox_table.c.id, outbox_table.c.event_type, outbox_table.c.payload, outbox_table.c.attempts)
+            .where(outbox_table.c.available_at <= now, outbox_table.c.attempts < max_attempts)
+            .order_by(outbox_table.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return []
+        self.session.execute(
+            outbox_table.update()
+            .where(outbox_table.c.id.in_([row.id for row in rows]))
+            .values(
+                attempts=outbox_table.c.attempts + 1,
+                available_at=now + timedelta(seconds=lease_seconds),
+            )
+        )
+        return [
+            abs_repo.OutboxMessage(id=row.id, event_type=row.event_type, payload=row.payload, attempts=row.attempts + 1)
+            for row in rows
+        ]
+
+    def _complete(self, message_ids: List[int]) -> None:
+        self.session.execute(outbox_table.delete().where(outbox_table.c.id.in_(message_ids)))
+
+    def _retry(self, message_id: int, delay_seconds: float, error: str) -> None:
+        self.session.execute(
+            outbox_table.update()
+            .where(outbox_table.c.id == message_id)
+            .values(
+                available_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+                last_error=error[:1000],
             )
-        # Load likes
-        l_stmt = select(likes_table).where(likes_table.c.post_id == post.id)
-        for lrow in self.session.execute(l_stmt).mappings().all():
-            post.likes.add(model.Like(post_id=lrow["post_id"], user_id=lrow["user_id"]))
-        return post
+        )
+
+
+# --- Async ---
+
+
+def _run_on(session: AsyncSession) -> abs_repo.RunSync:
+    # run_sync drives the sync repository on the async driver via greenlets: same SQL, no blocking I/O
+    async def run(fn, *args):
+        return await session.run_sync(lambda _: fn(*args))
+
+    return run
+
+
+class AsyncSqlAlchemyUserRepository(abs_repo.AsyncUserRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(SqlAlchemyUserRepository(session.sync_session), run=_run_on(session))
+
+
+class AsyncSqlAlchemyPostRepository(abs_repo.AsyncPostRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(SqlAlchemyPostRepository(session.sync_session), run=_run_on(session))
+
+
+class AsyncSqlAlchemyOutboxRepository(abs_repo.AsyncOutboxRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(SqlAlchemyOutboxRepository(session.sync_session), run=_run_on(session))
@@ -0,0 +1,133 @@
+"""
+Full-text index over post bodies.
+
+SQLite uses an FTS5 table (`posts_fts`, rowid = post id); PostgreSQL a `posts.search_vector`
+tsvector column with a GIN index. The DDL is dialect specific, so neither lives in
+src.db's metadata: migration 7/8 create them and `index_post` keeps them current from the
+PostCreated outbox handler, so a new post is searchable once the dispatcher delivers it. Queries are the AND of the words in the search text, stemmed.
+
+Both dialects expose a `score` where lower is better (bm25 for FTS5, negated ts_rank_cd for
+PostgreSQL), so results page on (score, id) the same way the feed pages on its sort keys.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+import sqlalchemy
+from sqlalchemy.engine import Connection
+
+from src.db import post_table
+
+# Bounds the work a single query can ask for
+MAX_TERMS = 16
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_fts = sqlalchemy.table("posts_fts", sqlalchemy.column("rowid"), sqlalchemy.column("rank"))
+_search_vector = sqlalchemy.literal_column("posts.search_vector")
+
+
+def search_terms(text: str) -> List[str]:
+    return _WORD.findall(text.lower())[:MAX_TERMS]
+
+
+# --- DDL (migrations) ---
+
+
+def create_index(conn: Connection) -> None:
+    """Create and backfill the index for posts written before search existed."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(
+            sqlalchemy.text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(body, tokenize='porter unicode61')"
+            )
+        )
+        conn.execute(
+            sqlalchemy.text("INSERT OR REPLACE INTO posts_fts (rowid, body) SELECT id, COALESCE(body, '') FROM posts")
+        )
+    elif conn.dialect.name == "postgresql":
+        conn.execute(sqlalchemy.text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+        conn.execute(
+            sqlalchemy.text("UPDATE posts SET search_vector = to_tsvector('english', COALESCE(body, ''))")
+        )
+
+
+def create_gin_index(conn: Connection) -> None:
+    # Separate, non-transactional step so the GIN build does not block writes (CONCURRENTLY)
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            sqlalchemy.text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)"
+            )
+        )
+
+
+# --- Writes ---
+
+
+def index_post(conn: Connection, post_id: int) -> None:
+    """(Re)index one post from its stored body; idempotent."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(
+            sqlalchemy.text(
+                "INSERT OR REPLACE INTO posts_fts (rowid, body) SELECT id, COALESCE(body, '') FROM posts WHERE id = :id"
+            ),
+            {"id": post_id},
+        )
+    elif conn.dialect.name == "postgresql":
+        conn.execute(
+            sqlalchemy.text(
+                "UPDATE posts SET search_vector = to_tsvector('english', COALESCE(body, '')) WHERE id = :id"
+            ),
+            {"id": post_id},
+        )
+
+
+def clear(conn: Connection) -> None:
+    # The PostgreSQL index lives on the posts rows themselves
+    if conn.dialect.name == "sqlite":
+        conn.execute(sqlalchemy.text("DELETE FROM posts_fts"))
+
+
+# --- Queries ---
+
+
+def search_query(dialect: str, terms: List[str], limit: int, after: Optional[Dict[str, Any]] = None):
+    """
+    Posts matching every term, best first, `limit` rows, after keyset `after` ({"score", "id"}).
+    Selects the post columns plus `likes` (like the feed) and `score`.
+    """
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"' for term in terms)
+        ranked = (
+            sqlalchemy.select(_fts.c.rowid.label("post_id"), _fts.c.rank.label("score"))
+            .where(sqlalchemy.literal_column("posts_fts").op("MATCH")(match))
+            .subquery("ranked")
+        )
+    elif dialect == "postgresql":
+        tsquery = sqlalchemy.func.plainto_tsquery("english", " ".join(terms))
+        ranked = (
+            sqlalchemy.select(
+                post_table.c.id.label("post_id"),
+                (-sqlalchemy.func.ts_rank_cd(_search_vector, tsquery)).label("score"),
+            )
+            .where(_search_vector.op("@@")(tsquery))
+            .subquery("ranked")
+        )
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+
+    query = (
+        sqlalchemy.select(post_table, post_table.c.like_count.label("likes"), ranked.c.score)
+        .join(ranked, ranked.c.post_id == post_table.c.id)
+        .order_by(ranked.c.score.asc(), post_table.c.id.desc())
+    )
+    if after:
+        query = query.where(
+            sqlalchemy.or_(
+                ranked.c.score > after["score"],
+                sqlalchemy.and_(ranked.c.score == after["score"], post_table.c.id < after["id"]),
+            )
+        )
+    return query.limit(limit)
@@ -0,0 +1,103 @@
+"""
+Per-request phase timings for the Server-Timing response header.
+
+A request opts in with `start()`; ServerTimingMiddleware does this for requests that carry the
+debug header, and for a sampled share of the others. Code on the request path then wraps its
+phases in `span(name)` or reports a measured duration with `record(name, seconds)`. When the
+request is not timed, each of these costs one ContextVar lookup.
+
+Durations with the same name are summed, e.g. every statement a request runs counts towards
+`db`. Phases can nest or overlap, such as the queries a message bus handler runs, so the
+phases do not add up to `total`.
+
+    token = timing.start()
+    with timing.span("auth"):
+        ...
+    timing.current().header()  # 'auth;dur=1.2'
+    timing.stop(token)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, Optional
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        # perf_counter() readings for phases measured between two points, see mark()
+        self.marks: Dict[str, float] = {}
+        # Sync handlers and sync repositories record from worker threads
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def header(self) -> str:
+        """Server-Timing value: one `name;dur=<ms>` entry per phase, in first-recorded order."""
+        with self._lock:
+            items = list(self.durations.items())
+            counts = dict(self.counts)
+        entries = []
+        for name, seconds in items:
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if counts[name] > 1:
+                entry += f';desc="{counts[name]}x"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start() -> Token:
+    """Time the current context (request); pass the token to stop()."""
+    return _current.set(RequestTimings())
+
+
+def stop(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def mark(name: str) -> None:
+    """Note the current time under `name`, for a later record_since()."""
+    timings = _current.get()
+    if timings is not None:
+        timings.marks[name] = time.perf_counter()
+
+
+def record_since(mark_name: str, name: str) -> None:
+    """Record the time elapsed since mark(mark_name) as `name`; no-op if it was never marked."""
+    timings = _current.get()
+    if timings is not None and mark_name in timings.marks:
+        timings.add(name, time.perf_counter() - timings.marks[mark_name])
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
@@ -1,49 +1,143 @@
 from __future__ import annotations
 
+import inspect
 from functools import partial
-from typing import Dict, List, Type
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Type
+
+from anyio import to_thread
 
 from src.adapters.notifications import LogNotifier, AbstractNotifier
 from src.adapters.storage import AbstractFileStorage, B2FileStorage
 from src.domain import commands, events
-from src.service_layer import handlers, messagebus, unit_of_work
-from src.service_layer.messagebus import MessageBus
-from src.service_layer.unit_of_work import SqlAlchemyUnitOfWork
+from src.service_layer import async_handlers, handlers, messagebus, unit_of_work
+from src.service_layer.messagebus import AsyncMessageBus, MessageBus
+from src.service_layer.outbox import OutboxDispatcher
+from src.service_layer.unit_of_work import AsyncSqlAlchemyUnitOfWork, SqlAlchemyUnitOfWork
 from src import security
+from src.config import config
+from src.views import cache as view_cache
+from src.views import hot
+
+
+# One registry for both buses: names resolve against handlers (MessageBus, outbox) or
+# async_handlers (AsyncMessageBus)
+COMMAND_HANDLERS: Dict[Type[commands.Command], str] = {
+    commands.RegisterUser: "register_user",
+    commands.CreatePost: "create_post",
+    commands.AddComment: "add_comment",
+    commands.ToggleLike: "toggle_like",
+    commands.UploadFile: "upload_file",
+    commands.UpdateProfile: "update_profile",
+    commands.ChangePassword: "change_password",
+    commands.DeleteAccount: "delete_account",
+    commands.ReconcilePostCounters: "reconcile_post_counters",
+    commands.ReconcileUserStats: "reconcile_user_stats",
+}
+
+# Run inline by the bus that raised the event, before the request returns: only this worker's
+# in-memory state (caches, hot ranking). user_stats moves in the command's own transaction
+EVENT_HANDLERS: Dict[Type[events.Event], List[str]] = {
+    events.PostCreated: ["update_hot_ranking", "invalidate_cached_views"],
+    events.CommentAdded: ["invalidate_cached_views"],
+    events.LikeToggled: ["update_hot_ranking", "invalidate_cached_views"],
+    events.PasswordChanged: ["invalidate_principal"],
+    events.ProfileUpdated: ["invalidate_principal", "invalidate_cached_views"],
+    events.AccountDeleted: ["invalidate_principal", "invalidate_cached_views"],
+}
+
+# Deferred: written to the outbox in the command's transaction and run (sync handlers, at least
+# once) by the OutboxDispatcher. For slow or fallible side effects; each must be idempotent
+OUTBOX_HANDLERS: Dict[Type[events.Event], List[str]] = {
+    events.UserRegistered: ["handle_user_registered"],
+    events.PostCreated: ["index_post_for_search"],
+    events.FileUploaded: ["handle_file_uploaded"],
+}
+
+
+def _inject(module: ModuleType, name: str, dependencies: Dict[str, Any]) -> Callable:
+    """Bind handler `name` in `module` to the dependencies its signature asks for."""
+    handler = getattr(module, name)
+    params = inspect.signature(handler).parameters
+    return partial(handler, **{k: v for k, v in dependencies.items() if k in params})
+
+
+def _wire_handlers(module: ModuleType, dependencies: Dict[str, Any]) -> Dict[str, Any]:
+    inject = partial(_inject, module, dependencies=dependencies)
+    return {
+        "command_handlers": {cmd: inject(name) for cmd, name in COMMAND_HANDLERS.items()},
+        "event_handlers": {evt: [inject(name) for name in names] for evt, names in EVENT_HANDLERS.items()},
+        "outbox_events": OUTBOX_HANDLERS.keys(),
+    }
+
+
+def _dependencies(notifier: AbstractNotifier | None, file_storage: AbstractFileStorage | None) -> Dict[str, Any]:
+    # `uow` is not listed: the bus opens one per message and passes it to the handler
+    return {
+        "notifier": notifier or LogNotifier(),
+        "file_storage": (file_storage or B2FileStorage()).upload,
+        "hash_password": security.get_password_hash,
+        "invalidate_principal": security.invalidate_principal,
+        "invalidate_views": view_cache.invalidate_for_event,
+        "hot_ranking": hot.apply_event,
+    }
 
 
 def bootstrap(
     uow: unit_of_work.AbstractUnitOfWork | None = None,
     notifier: AbstractNotifier | None = None,
     file_storage: AbstractFileStorage | None = None,
+    uow_factory: Callable[[], unit_of_work.AbstractUnitOfWork] | None = None,
 ) -> MessageBus:
     """
     Configure and return a MessageBus.
-    Allows overriding UoW/notifier/storage for tests.
+    Allows overriding UoW/notifier/storage for tests; a `uow` instance is reused for every message
+    (fakes), otherwise `uow_factory` (default SqlAlchemyUnitOfWork) builds one per message.
     """
-    uow = uow or SqlAlchemyUnitOfWork()
-    notifier = notifier or LogNotifier()
-    file_storage = file_storage or B2FileStorage()
-
-    command_handlers: Dict[Type[commands.Command], callable] = {
-        commands.RegisterUser: partial(
-            handlers.register_user, uow=uow, hash_password=security.get_password_hash
-        ),
-        commands.CreatePost: partial(handlers.create_post, uow=uow),
-        commands.AddComment: partial(handlers.add_comment, uow=uow),
-        commands.ToggleLike: partial(handlers.toggle_like, uow=uow),
-        commands.UploadFile: partial(handlers.upload_file, uow=uow, file_storage=file_storage.upload),
-        commands.UpdateProfile: partial(handlers.update_profile, uow=uow),
-        commands.ChangePassword: partial(handlers.change_password, uow=uow),
-        commands.DeleteAccount: partial(handlers.delete_account, uow=uow),
-    }
+    if uow is not None:
+        uow_factory = lambda: uow
+    return MessageBus(
+        uow_factory=uow_factory or SqlAlchemyUnitOfWork,
+        **_wire_handlers(handlers, _dependencies(notifier, file_storage)),
+    )
 
-    event_handlers: Dict[Type[events.Event], List[callable]] = {
-        events.UserRegistered: [partial(handlers.handle_user_registered, uow=uow, notifier=notifier)],
-        events.FileUploaded: [partial(handlers.handle_file_uploaded, uow=uow)],
-    }
 
-    return MessageBus(uow=uow, event_handlers=event_handlers, command_handlers=command_handlers)
+def bootstrap_async(
+    uow_factory: Callable[[], unit_of_work.AbstractAsyncUnitOfWork] | None = None,
+    notifier: AbstractNotifier | None = None,
+    file_storage: AbstractFileStorage | None = None,
+) -> AsyncMessageBus:
+    """Same wiring as bootstrap(), with the coroutine handlers on the async unit of work."""
+    dependencies = _dependencies(notifier, file_storage)
+    # Awaited by the coroutines: hashing on the process pool, uploads on a worker thread
+    dependencies["hash_password"] = security.hash_password
+    dependencies["file_storage"] = partial(to_thread.run_sync, dependencies["file_storage"])
+    return AsyncMessageBus(
+        uow_factory=uow_factory or AsyncSqlAlchemyUnitOfWork,
+        **_wire_handlers(async_handlers, dependencies),
+    )
+
+
+def bootstrap_outbox(
+    uow: unit_of_work.AbstractUnitOfWork | None = None,
+    notifier: AbstractNotifier | None = None,
+    file_storage: AbstractFileStorage | None = None,
+    uow_factory: Callable[[], unit_of_work.AbstractUnitOfWork] | None = None,
+) -> OutboxDispatcher:
+    """Dispatcher for OUTBOX_HANDLERS (sync handlers, run on its own thread); overrides as in bootstrap()."""
+    if uow is not None:
+        uow_factory = lambda: uow
+    inject = partial(_inject, handlers, dependencies=_dependencies(notifier, file_storage))
+    return OutboxDispatcher(
+        uow_factory=uow_factory or SqlAlchemyUnitOfWork,
+        handlers={evt: [inject(name) for name in names] for evt, names in OUTBOX_HANDLERS.items()},
+        batch_size=config.OUTBOX_BATCH_SIZE,
+        poll_interval=config.OUTBOX_POLL_INTERVAL_SECONDS,
+        lease_seconds=config.OUTBOX_LEASE_SECONDS,
+        max_attempts=config.OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds=config.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max_seconds=config.OUTBOX_RETRY_MAX_SECONDS,
+    )
 
 
 # Helper to get a shared message bus (used by routers/tests)
@@ -55,3 +149,23 @@ def get_message_bus() -> MessageBus:
     if _global_bus is None:
         _global_bus = bootstrap()
     return _global_bus
+
+
+_global_async_bus: AsyncMessageBus | None = None
+
+
+def get_async_message_bus() -> AsyncMessageBus:
+    global _global_async_bus
+    if _global_async_bus is None:
+        _global_async_bus = bootstrap_async()
+    return _global_async_bus
+
+
+_global_outbox: OutboxDispatcher | None = None
+
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    global _global_outbox
+    if _global_outbox is None:
+        _global_outbox = bootstrap_outbox()
+    return _global_outbox
@@ -37,9 +37,66 @@ class GlobalConfig(BaseConfig):
     #Sentry
     SENTRY_DSN: Optional[str] = None
 
+    # bcrypt cost factor; stored hashes at another cost are re-hashed on the next login
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes for password hashing (unset: one per CPU, 0: threads in this process)
+    BCRYPT_POOL_SIZE: Optional[int] = None
+
+    # Resolved principals (token subject -> user row) kept per worker to skip a DB read per request
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    # users.token_version per user id; other workers see a revocation within this TTL
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 30.0
+    TOKEN_VERSION_CACHE_MAX_ENTRIES: int = 100_000
+
+    # Read-view result cache (src/views/cache.py), invalidated by domain events
+    VIEW_CACHE_ENABLED: bool = True
+    VIEW_CACHE_TTL_SECONDS: float = 5.0
+    # >0 serves an expired entry for this long while one background refresh runs
+    VIEW_CACHE_STALE_SECONDS: float = 0.0
+    VIEW_CACHE_MAX_ENTRIES: int = 4096
+    VIEW_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # max-age on public read endpoints (feed, post detail); responses also carry an ETag
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 5
+
+    # sorting=hot: likes / (age_hours + 2) ** gravity, ranked in memory (src/views/hot.py)
+    HOT_RANKING_GRAVITY: float = 1.8
+    HOT_RANKING_REFRESH_SECONDS: float = 60.0
+    HOT_RANKING_MIN_REFRESH_SECONDS: float = 1.0
+    HOT_RANKING_RELOAD_SECONDS: float = 300.0
+
+    # Comma-separated emails allowed on /api/admin/* endpoints that require authentication
+    ADMIN_EMAILS: str = ""
+
+    # Transactional outbox (src/service_layer/outbox.py): deferred event handlers run on a
+    # background thread per worker, polling every OUTBOX_POLL_INTERVAL_SECONDS when idle
+    OUTBOX_DISPATCHER_ENABLED: bool = True
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 100
+    # A claimed message not acknowledged within this is delivered again
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    # Retry delay doubles per attempt from the base, up to the max
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+
+    # Server-Timing breakdown (src/entrypoints/server_timing.py) for requests that send this
+    # header (empty: no opt-in by header), plus this fraction of all requests
+    SERVER_TIMING_HEADER: str = "X-Debug-Timing"
+    SERVER_TIMING_SAMPLE_RATE: float = 0.0
+
+    # Per-request SQL statement counting (src/entrypoints/query_counter.py), on in dev: warn when
+    # a request runs more than QUERY_COUNT_WARN_THRESHOLD statements (0: counting off), or one
+    # statement QUERY_REPEAT_WARN_THRESHOLD times or more (a likely N+1 loop)
+    QUERY_COUNT_WARN_THRESHOLD: int = 0
+    QUERY_REPEAT_WARN_THRESHOLD: int = 5
+
 class DevConfig(GlobalConfig):
     model_config = SettingsConfigDict(env_prefix="DEV_", extra="ignore")
 
+    QUERY_COUNT_WARN_THRESHOLD: int = 20
+
 class ProdConfig(GlobalConfig):
     # Try multiple environment variable names for better deployment platform compatibility
     DATABASE_URI: Optional[str] = None
@@ -105,6 +162,9 @@ class TestConfig(GlobalConfig):
     MAIL_FROM: str = "test@email.com"
     MAIL_FROM_NAME: str = "Test Sender"
     MAIL_API_TOKEN: str = "test_api_token"
+    # Cheapest cost bcrypt allows, and no worker processes, to keep the suite fast
+    BCRYPT_ROUNDS: int = 4
+    BCRYPT_POOL_SIZE: Optional[int] = 0
 
     model_config = SettingsConfigDict(env_prefix="TEST_", extra="ignore")
 
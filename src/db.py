@@ -1,10 +1,11 @@
 import os
 
-import databases
 import sqlalchemy
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
+from src.adapters.query_stats import InstrumentedDatabase, instrument_engine
 from src.config import config
 
 # Validate DATABASE_URI is configured
@@ -33,6 +34,8 @@ user_table = sqlalchemy.Table(
     sqlalchemy.Column("bio", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("location", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("avatar_url", sqlalchemy.String, nullable=True),
+    # Bumped on password change; access tokens carrying an older version are rejected
+    sqlalchemy.Column("token_version", sqlalchemy.Integer, server_default="0", nullable=False),
     sqlalchemy.Column(
         "created_at",
         sqlalchemy.DateTime(timezone=True),
@@ -55,6 +58,13 @@ post_table = sqlalchemy.Table(
         server_default=sqlalchemy.text("CURRENT_TIMESTAMP"),
         nullable=False,
     ),
+    # Denormalized counters maintained by the like/comment write paths so reads skip the aggregation
+    sqlalchemy.Column("like_count", sqlalchemy.Integer, server_default="0", nullable=False),
+    sqlalchemy.Column("comment_count", sqlalchemy.Integer, server_default="0", nullable=False),
+    # (user_id, id) serves the per-user filter and covers the posts side of the likes_received join
+    sqlalchemy.Index("ix_posts_user_id_id", "user_id", "id"),
+    sqlalchemy.Index("ix_posts_created_at", "created_at"),
+    sqlalchemy.Index("ix_posts_like_count_id", "like_count", "id"),
 )
 
 likes_table = sqlalchemy.Table(
@@ -63,7 +73,9 @@ likes_table = sqlalchemy.Table(
     sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True),
     sqlalchemy.Column("post_id", sqlalchemy.ForeignKey("posts.id"), nullable=False),
     sqlalchemy.Column("user_id", sqlalchemy.ForeignKey("users.id"), nullable=False),
+    # Also serves lookups by post_id (leading column), so likes needs no separate post_id index
     sqlalchemy.UniqueConstraint("post_id", "user_id", name="uq_likes_post_user"),
+    sqlalchemy.Index("ix_likes_user_id", "user_id"),
 )
 
 comment_table = sqlalchemy.Table(
@@ -81,6 +93,55 @@ comment_table = sqlalchemy.Table(
         server_default=sqlalchemy.text("CURRENT_TIMESTAMP"),
         nullable=False,
     ),
+    sqlalchemy.Index("ix_comments_post_id_id", "post_id", "id"),
+    # Comment pages are ordered by (created_at, id) within a post
+    sqlalchemy.Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+)
+
+# Read model behind the profile stats, moved by the register/post/like commands in their transaction;
+# `python -m src.entrypoints.cli reconcile-user-stats` repairs drift from the source tables
+user_stats_table = sqlalchemy.Table(
+    "user_stats",
+    metadata,
+    sqlalchemy.Column("user_id", sqlalchemy.ForeignKey("users.id"), primary_key=True),
+    sqlalchemy.Column("posts_count", sqlalchemy.Integer, server_default="0", nullable=False),
+    sqlalchemy.Column("likes_received", sqlalchemy.Integer, server_default="0", nullable=False),
+)
+
+# Transactional outbox: events with deferred handlers (bootstrap.OUTBOX_HANDLERS), written in the
+# command's transaction and deleted once src.service_layer.outbox has delivered them
+outbox_table = sqlalchemy.Table(
+    "outbox",
+    metadata,
+    sqlalchemy.Column("id", sqlalchemy.Integer, primary_key=True),
+    sqlalchemy.Column("event_type", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column("payload", sqlalchemy.JSON, nullable=False),
+    # Delivery attempts so far; rows at OUTBOX_MAX_ATTEMPTS stay as dead letters
+    sqlalchemy.Column("attempts", sqlalchemy.Integer, server_default="0", nullable=False),
+    # Next time the message may be claimed: now when written, pushed back by leases and retries
+    sqlalchemy.Column("available_at", sqlalchemy.DateTime(timezone=True), nullable=False),
+    sqlalchemy.Column("last_error", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column(
+        "created_at",
+        sqlalchemy.DateTime(timezone=True),
+        server_default=sqlalchemy.text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    ),
+    sqlalchemy.Index("ix_outbox_available_at", "available_at"),
+)
+
+# Ledger of applied schema migrations (see src/migrations.py)
+schema_migrations_table = sqlalchemy.Table(
+    "schema_migrations",
+    metadata,
+    sqlalchemy.Column("version", sqlalchemy.Integer, primary_key=True, autoincrement=False),
+    sqlalchemy.Column("name", sqlalchemy.String, nullable=False),
+    sqlalchemy.Column(
+        "applied_at",
+        sqlalchemy.DateTime(timezone=True),
+        server_default=sqlalchemy.text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    ),
 )
 
 connect_args = (
@@ -91,55 +152,26 @@ connect_args = (
 engine = sqlalchemy.create_engine(config.DATABASE_URI, connect_args=connect_args)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
-metadata.create_all(engine)
-database = databases.Database(
+# Async drivers for the same database, used by the async unit of work
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+
+def _async_url(uri: str) -> sqlalchemy.engine.URL:
+    url = sqlalchemy.engine.make_url(uri)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+# aiosqlite runs each connection on its own thread; pooling them buys nothing for a file database
+async_engine = create_async_engine(
+    _async_url(config.DATABASE_URI),
+    **({"poolclass": NullPool} if "sqlite" in config.DATABASE_URI else {}),
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+database = InstrumentedDatabase(
     config.DATABASE_URI, force_rollback=config.DB_FORCE_ROLL_BACK
 )
 
-# Only run runtime migrations for SQLite (dev/test convenience)
-if config.DATABASE_URI and "sqlite" in config.DATABASE_URI:
-    with engine.begin() as conn:
-        inspector = sqlalchemy.inspect(conn)
-        columns = {col["name"] for col in inspector.get_columns("posts")}
-        if "created_at" not in columns:
-            # SQLite-compatible
-            conn.execute(
-                text(
-                    "ALTER TABLE posts ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL"
-                )
-            )
-        # Ensure unique like per user per post
-        like_indexes = {idx["name"] for idx in inspector.get_indexes("likes")}
-        if "uq_likes_post_user" not in like_indexes:
-            conn.execute(
-                text(
-                    "CREATE UNIQUE INDEX IF NOT EXISTS uq_likes_post_user ON likes (post_id, user_id)"
-                )
-            )
-        # Ensure users table has expected columns
-        user_columns = {col["name"] for col in inspector.get_columns("users")}
-        if "bio" not in user_columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN bio VARCHAR"))
-        if "location" not in user_columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN location VARCHAR"))
-        if "avatar_url" not in user_columns:
-            conn.execute(text("ALTER TABLE users ADD COLUMN avatar_url VARCHAR"))
-        if "created_at" not in user_columns:
-            conn.execute(
-                text(
-                    "ALTER TABLE users ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL"
-                )
-            )
-        # Ensure comments table has expected columns
-        comment_columns = {col["name"] for col in inspector.get_columns("comments")}
-        if "created_at" not in comment_columns:
-            conn.execute(
-                text(
-                    "ALTER TABLE comments ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL"
-                )
-            )
-        if "username" not in comment_columns:
-            # username is optional (nullable) to support existing rows
-            conn.execute(text("ALTER TABLE comments ADD COLUMN username VARCHAR"))
-        # Migrate existing users to be confirmed if they were not already
-        conn.execute(text("UPDATE users SET confirmed = 1 WHERE confirmed = 0"))
+# Statement counts and time for query tracking and the Server-Timing header
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
@@ -78,3 +78,13 @@ class ChangePassword(Command):
 class DeleteAccount(Command):
     user_id: int
     verify_password_hash: Optional[str] = None
+
+
+@dataclass
+class ReconcilePostCounters(Command):
+    post_id: Optional[int] = None
+
+
+@dataclass
+class ReconcileUserStats(Command):
+    user_id: Optional[int] = None
@@ -1,4 +1,5 @@
 from dataclasses import dataclass, fields
+from typing import Optional
 
 
 class Event:
@@ -33,6 +34,9 @@ class LikeToggled(Event):
     post_id: int
     user_id: int
     liked: bool
+    like_count: Optional[int] = None
+    author_id: Optional[int] = None
+    delta: Optional[int] = None
 
 
 @dataclass
@@ -47,6 +51,16 @@ class PasswordChanged(Event):
     user_id: int
 
 
+@dataclass
+class ProfileUpdated(Event):
+    user_id: int
+
+
+@dataclass
+class AccountDeleted(Event):
+    user_id: int
+
+
 @dataclass
 class FileUploaded(Event):
     file_name: str
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional, Set
 
 
@@ -23,6 +24,9 @@ class Comment:
     post_id: int
     user_id: int
     body: str
+    # Persisted-row details; not part of the comment's identity
+    username: Optional[str] = field(default=None, compare=False)
+    created_at: Optional[datetime] = field(default=None, compare=False)
 
 
 @dataclass(eq=True, frozen=True)
@@ -31,6 +35,34 @@ class Like:
     user_id: int
 
 
+# --- Write results ---
+
+
+@dataclass(eq=False)
+class LikeToggle:
+    """
+    Outcome of the repository's single-statement like toggle. Handlers hang events on it
+    the same way they do on aggregates, without loading the post's comments and likes.
+    """
+
+    post_id: int
+    user_id: int
+    author_id: int
+    liked: bool
+    like_count: int
+    # Change the toggle applied to like_count: 0 when a concurrent request inserted the same like
+    delta: int
+
+
+@dataclass(eq=False)
+class CommentAppend:
+    """Outcome of the append-only comment insert: the persisted row plus the post's new counter."""
+
+    comment: Comment
+    author_id: int
+    comment_count: int
+
+
 # --- Aggregates ---
 
 
@@ -41,6 +73,8 @@ class UserAggregate:
     location: Optional[str] = None
     avatar_url: Optional[str] = None
     password_hash: Optional[str] = None
+    # Access tokens embed this; bumping it revokes every token issued before
+    token_version: int = 0
 
     def update_profile(
         self,
@@ -61,6 +95,7 @@ class UserAggregate:
 
             raise exceptions.InvalidOperation("Password hash cannot be empty")
         self.password_hash = new_password_hash
+        self.token_version += 1
 
 
 @dataclass(unsafe_hash=True)
@@ -0,0 +1,69 @@
+"""
+Offline maintenance commands, dispatched through the same message bus as the API.
+
+    python -m src.entrypoints.cli migrate
+    python -m src.entrypoints.cli reconcile-post-counters [--post-id ID]
+    python -m src.entrypoints.cli reconcile-user-stats [--user-id ID]
+    python -m src.entrypoints.cli drain-outbox
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import List, Optional
+
+from src.bootstrap import bootstrap, bootstrap_outbox
+from src.db import engine
+from src.domain import commands
+from src.migrations import migrate
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.entrypoints.cli")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    subcommands.add_parser("migrate", help="Apply pending schema migrations")
+
+    reconcile = subcommands.add_parser(
+        "reconcile-post-counters", help="Repair drift in posts.like_count/comment_count"
+    )
+    reconcile.add_argument("--post-id", type=int, default=None)
+
+    reconcile_stats = subcommands.add_parser(
+        "reconcile-user-stats", help="Rebuild missing or drifted user_stats rows"
+    )
+    reconcile_stats.add_argument("--user-id", type=int, default=None)
+
+    subcommands.add_parser(
+        "drain-outbox", help="Deliver every due outbox message now (e.g. with OUTBOX_DISPATCHER_ENABLED off)"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        applied = migrate(engine)
+        for migration in applied:
+            print(f"Applied {migration.version}_{migration.name}")
+        if not applied:
+            print("Schema is up to date")
+        return 0
+
+    if args.command == "drain-outbox":
+        claimed = bootstrap_outbox().drain()
+        print(f"Processed {claimed} outbox message(s)")
+        return 0
+
+    bus = bootstrap()
+    if args.command == "reconcile-post-counters":
+        [repaired] = bus.handle(commands.ReconcilePostCounters(post_id=args.post_id))
+        print(f"Repaired counters on {repaired} post(s)")
+    elif args.command == "reconcile-user-stats":
+        [repaired] = bus.handle(commands.ReconcileUserStats(user_id=args.user_id))
+        print(f"Rebuilt stats for {repaired} user(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
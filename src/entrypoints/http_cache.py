@@ -0,0 +1,67 @@
+"""
+HTTP validators for the read endpoints.
+
+ETags are hashes of a view's version markers (see src.views.posts / src.views.users), not of
+the serialized body. A request whose If-None-Match matches the markers read from the database
+gets a 304 before the view runs; a 200 carries the ETag of the markers in the body it serves.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+
+from src.config import config
+
+
+def make_etag(view: str, markers) -> str:
+    digest = hashlib.blake2b(repr((view, markers)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def public_cache_control() -> str:
+    return f"public, max-age={config.HTTP_CACHE_MAX_AGE_SECONDS}"
+
+
+# Per-user responses: never stored by shared caches, always revalidated by the client
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def set_validators(response: Response, etag: str, cache_control: str, vary: Optional[str] = None) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if vary:
+        response.headers["Vary"] = vary
+
+
+async def not_modified(
+    request: Request,
+    view: str,
+    fetch_markers: Callable[[], Awaitable[Any]],
+    cache_control: str,
+    vary: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    A 304 response when If-None-Match matches the view's current markers, else None.
+    The marker query only runs for conditional requests.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    markers = await fetch_markers()
+    if markers is None:
+        return None
+    etag = make_etag(view, markers)
+    if not _matches(if_none_match, etag):
+        return None
+    response = Response(status_code=304)
+    set_validators(response, etag, cache_control, vary)
+    return response
@@ -0,0 +1,93 @@
+"""
+HTTP request metrics and connection-pool gauges for /metrics.
+
+MetricsMiddleware is plain ASGI (no per-request objects beyond one closure). It labels
+requests by route template (`/api/posts/{post_id}`), read from the route FastAPI stores in the
+scope while routing, so label cardinality stays bounded by the number of routes; requests that
+match no route share the `unmatched` label. The in-flight gauge is incremented before routing
+has run, so it is labelled by method only.
+"""
+from __future__ import annotations
+
+import time
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.adapters import metrics
+
+UNMATCHED = "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, registry: metrics.MetricsRegistry | None = None) -> None:
+        self.app = app
+        registry = registry or metrics.registry
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by method, route template and status", ["method", "route", "status"]
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "Time to serve a request, including the response body",
+            ["method", "route"],
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "Requests being served", ["method"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = self.in_flight.labels(method)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED
+            self.latency.labels(method, route).observe(elapsed)
+            self.requests.labels(method, route, str(status)).inc()
+
+
+def register_pool_gauges(
+    engines: Dict[str, Engine],
+    database=None,
+    registry: metrics.MetricsRegistry | None = None,
+) -> None:
+    """
+    Report size/in_use/idle/overflow for SQLAlchemy queue pools and the `databases` asyncpg
+    pool at scrape time. Pools that keep no counts (NullPool, the aiosqlite backend) are skipped.
+    """
+    registry = registry or metrics.registry
+    gauge = registry.gauge("db_pool_connections", "Database connections by pool and state", ["pool", "state"])
+
+    def collect() -> Iterable[Tuple[metrics.Gauge, Tuple[str, str], float]]:
+        for name, engine in engines.items():
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                yield gauge, (name, "size"), pool.size()
+                yield gauge, (name, "in_use"), pool.checkedout()
+                yield gauge, (name, "idle"), pool.checkedin()
+                # Negative until the pool has opened `size` connections
+                yield gauge, (name, "overflow"), max(pool.overflow(), 0)
+        backend_pool = getattr(getattr(database, "_backend", None), "_pool", None)
+        if backend_pool is not None and hasattr(backend_pool, "get_idle_size"):
+            idle = backend_pool.get_idle_size()
+            yield gauge, ("databases", "size"), backend_pool.get_max_size()
+            yield gauge, ("databases", "in_use"), backend_pool.get_size() - idle
+            yield gauge, ("databases", "idle"), idle
+
+    registry.add_collector(collect)
@@ -0,0 +1,54 @@
+"""
+Per-request SQL statement counting, meant for development.
+
+QueryCounterMiddleware counts the statements each request runs (src.adapters.query_stats) and
+logs a warning when a route runs more than config.QUERY_COUNT_WARN_THRESHOLD of them, or runs
+the same statement config.QUERY_REPEAT_WARN_THRESHOLD times or more, which usually means a
+query inside a loop (N+1). It sits inside CorrelationIdMiddleware, so the warnings carry the
+request's correlation id like the rest of its log lines.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.adapters import query_stats
+from src.config import config
+from src.entrypoints.metrics import UNMATCHED
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounterMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        warn_threshold: Optional[int] = None,
+        repeat_threshold: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.warn_threshold = config.QUERY_COUNT_WARN_THRESHOLD if warn_threshold is None else warn_threshold
+        self.repeat_threshold = config.QUERY_REPEAT_WARN_THRESHOLD if repeat_threshold is None else repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with query_stats.track() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: query_stats.QueryStats) -> None:
+        route = f'{scope["method"]} {getattr(scope.get("route"), "path", None) or UNMATCHED}'
+        if stats.count > self.warn_threshold:
+            logger.warning(
+                "%s ran %s SQL statements in %.1f ms (threshold %s)",
+                route, stats.count, stats.seconds * 1000, self.warn_threshold,
+            )
+        for statement, times in stats.repeated(self.repeat_threshold):
+            logger.warning("%s ran the same statement %s times, likely N+1: %s", route, times, " ".join(statement.split()))
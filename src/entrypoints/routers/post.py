@@ -2,9 +2,11 @@ from enum import Enum
 from typing import Annotated
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 
 from src.domain import commands, exceptions
+from src.entrypoints.http_cache import make_etag, not_modified, public_cache_control, set_validators
+from src.entrypoints.server_timing import TimedRoute
 from src.entrypoints.schemas.post import (
     UserPostI,
     CommentI,
@@ -13,24 +15,30 @@ from src.entrypoints.schemas.post import (
     UserPostWithComments,
     Comment,
     PostLike,
+    PostLikeToggled,
 )
 from src.entrypoints.schemas.user import User
 from src.security import get_current_user
 from src.views import posts as post_views
 from src.views import comments as comment_views
+from src.views import search as search_views
+from src.views.pagination import InvalidCursor, MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE
 from src.db import database
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 class PostSorting(str, Enum):
     new = "new"
     old = "old"
     most_likes = "most_likes"
+    hot = "hot"
 
 
 def get_bus(request: Request):
-    from src.bootstrap import get_message_bus
-    return get_message_bus()
+    from src.bootstrap import get_async_message_bus
+    return get_async_message_bus()
 
 
 @router.post("/api/posts", response_model=UserPostWithLikes, status_code=201)
@@ -48,7 +56,7 @@ async def create_post(
         image_url=None,
     )
     try:
-        [post_id] = bus.handle(cmd)
+        [post_id] = await bus.handle(cmd)
     except exceptions.Unauthorized as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -71,8 +79,66 @@ async def create_post(
 
 
 @router.get("/api/posts", response_model=list[UserPostWithLikes], status_code=200)
-async def get_all_posts(sorting: PostSorting = PostSorting.new):
-    return await post_views.list_posts(order=sorting.value)
+async def get_all_posts(
+    request: Request,
+    response: Response,
+    sorting: PostSorting = PostSorting.new,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    # The body stays a plain list for existing clients; the next page is advertised in a header
+    page = {"order": sorting.value, "limit": limit, "cursor": cursor}
+    try:
+        unchanged = await not_modified(
+            request, "feed", lambda: post_views.fetch_feed_markers(**page), public_cache_control()
+        )
+        if unchanged:
+            return unchanged
+        posts, next_cursor = await post_views.list_posts(**page)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    set_validators(
+        response, make_etag("feed", post_views.feed_markers(posts, next_cursor is not None)), public_cache_control()
+    )
+    return posts
+
+
+@router.get("/api/posts/search", response_model=list[UserPostWithLikes], status_code=200)
+async def search_posts(
+    response: Response,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    # Declared before /api/posts/{post_id} so "search" is not parsed as a post id
+    try:
+        posts, next_cursor = await search_views.search_posts(q, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return posts
+
+
+@router.get("/api/users/{username}/posts", response_model=list[UserPostWithLikes], status_code=200)
+async def get_user_posts(
+    username: str,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    try:
+        page = await post_views.list_posts_by_user(username, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    posts, next_cursor = page
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return posts
 
 
 @router.post("/api/posts/comment", response_model=Comment, status_code=201)
@@ -82,9 +148,6 @@ async def create_comment(
     request: Request,
 ):
     bus = get_bus(request)
-    # Generate a comment id by asking the DB for the next value (simplified here)
-    # For SQLite/postgres autoincrement, we insert via repo and fetch the new row.
-    # The handler currently relies on the aggregate to assign; ensure return has id.
     cmd = commands.AddComment(
         post_id=comment.post_id,
         comment_id=0,  # repository will autoincrement
@@ -92,31 +155,44 @@ async def create_comment(
         body=comment.body,
     )
     try:
-        [created_comment_id] = bus.handle(cmd)
+        [created] = await bus.handle(cmd)
     except exceptions.PostNotFound:
         raise HTTPException(status_code=404, detail="Post not found")
-    # Fetch and return the created comment
-    created = await comment_views.get_comment(comment_id=created_comment_id)
-    if not created:
-        # Fallback if not retrievable
-        return {"id": created_comment_id, "post_id": comment.post_id, "user_id": current_user.id, "body": comment.body, "created_at": None}
+    # The handler returns the persisted row (RETURNING), so no follow-up read is needed
     return created
 
 
 @router.get("/api/posts/{post_id}/comment", response_model=list[Comment], status_code=200)
-async def get_comments_on_post(post_id: int):
-    return await comment_views.list_comments_for_post(post_id)
+async def get_comments_on_post(
+    post_id: int,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+):
+    try:
+        comments, next_cursor = await comment_views.list_comments_for_post(post_id, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return comments
 
 
 @router.get("/api/posts/{post_id}", response_model=UserPostWithComments, status_code=200)
-async def get_post_with_comments(post_id: int):
+async def get_post_with_comments(post_id: int, request: Request, response: Response):
+    unchanged = await not_modified(
+        request, "post", lambda: post_views.fetch_post_markers(post_id), public_cache_control()
+    )
+    if unchanged:
+        return unchanged
     result = await post_views.get_post_with_comments(post_id)
     if not result:
         raise HTTPException(status_code=404, detail="Post not found")
+    set_validators(response, make_etag("post", post_views.post_markers(result)), public_cache_control())
     return result
 
 
-@router.post("/api/like", response_model=dict, status_code=201)
+@router.post("/api/like", response_model=PostLikeToggled, status_code=201)
 async def like_post(
     like: PostLikeI,
     current_user: Annotated[User, Depends(get_current_user)],
@@ -125,7 +201,8 @@ async def like_post(
     bus = get_bus(request)
     cmd = commands.ToggleLike(post_id=like.post_id, user_id=current_user.id)
     try:
-        [liked] = bus.handle(cmd)
+        [toggle] = await bus.handle(cmd)
     except exceptions.PostNotFound:
         raise HTTPException(status_code=404, detail="Post not found")
-    return {"liked": liked}
+    # New state and count from the toggle statement itself, no second read
+    return {"liked": toggle.liked, "like_count": toggle.like_count}
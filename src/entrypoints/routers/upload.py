@@ -5,10 +5,11 @@ import aiofiles
 from fastapi import APIRouter, HTTPException, UploadFile, status, Request
 from src.domain import commands
 from src.bootstrap import bootstrap
+from src.entrypoints.server_timing import TimedRoute
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 def get_bus(request: Request):
@@ -1,26 +1,34 @@
 import logging
+from enum import Enum
 from typing import Annotated
 
 import sqlalchemy
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
-from src.db import SessionLocal, database, user_table
+from src.db import database, user_table
+from src.entrypoints.http_cache import PRIVATE_CACHE_CONTROL, make_etag, not_modified, set_validators
 from src.entrypoints.schemas.user import UserI, UserLogin, UserProfileUpdate, UserRegister
 from src.entrypoints.schemas.user_settings import ChangePasswordRequest, DeleteAccountRequest
 from src import security
 from src.domain import commands, exceptions
+from src.views import cache as view_cache
+from src.views import export as export_views
+from src.views import hot
 from src.views import users as user_views
-from src.bootstrap import bootstrap
+from src.views.pagination import InvalidCursor
+from src.bootstrap import bootstrap, get_outbox_dispatcher
+from src.entrypoints.server_timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 logger = logging.getLogger(__name__)
 
 
 def get_bus(request: Request):
     # Use global helper for now
-    from src.bootstrap import get_message_bus
-    return get_message_bus()
+    from src.bootstrap import get_async_message_bus
+    return get_async_message_bus()
 
 
 @router.post("/api/register", status_code=201)
@@ -35,39 +43,10 @@ async def register_user(user: UserRegister, request: Request, background_tasks:
         avatar_url=user.avatar_url,
     )
     try:
-        bus.handle(cmd)
+        [user_id] = await bus.handle(cmd)
     except exceptions.UserExists as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Ensure a user row exists in the test database even when a fake bus (with in-memory repos) is injected.
-    with SessionLocal() as session:
-        row = (
-            session.execute(
-                user_table.select().where(user_table.c.email == user.email)
-            )
-            .mappings()
-            .first()
-        )
-        if row is None:
-            username = user.username or user.email.split("@")[0]
-            values = {
-                "email": user.email,
-                "username": username,
-                "password": security.get_password_hash(user.password),
-                "bio": user.bio,
-                "location": user.location,
-                "avatar_url": user.avatar_url,
-                "confirmed": True,
-            }
-            user_id = (
-                session.execute(
-                    user_table.insert().values(values).returning(user_table.c.id)
-                ).scalar_one()
-            )
-            session.commit()
-        else:
-            user_id = row["id"]
-
     return {
         "detail": "User created successfully. No email verification required.",
         "id": user_id,
@@ -112,8 +91,11 @@ async def login(request: Request):
         )
 
     user_db = await security.authenticate_user(login_email, login_password)
-    access_token = security.create_access_token(user_db.email)
-    refresh_token = security.create_refresh_token(user_db.email)
+    token_version = getattr(user_db, "token_version", None) or 0
+    access_token = security.create_access_token(
+        user_db.email, user_id=user_db.id, username=user_db.username, token_version=token_version
+    )
+    refresh_token = security.create_refresh_token(user_db.email, token_version=token_version)
 
     return {
         "access_token": access_token,
@@ -137,17 +119,21 @@ async def refresh_token(refresh_data: dict):
 
     try:
         # Validate refresh token and get email
-        email = security.get_subject_for_token_type(refresh_token_value, "refresh")
+        claims = security.get_claims_for_token_type(refresh_token_value, "refresh")
+        email = claims["sub"]
 
-        # Check if user still exists
+        # Check if user still exists and the token predates no password change
         user = await security.get_user_by_email(email)
-        if not user:
+        token_version = getattr(user, "token_version", None) or 0
+        if not user or claims.get("ver", 0) < token_version:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
             )
 
         # Create new access token
-        new_access_token = security.create_access_token(email)
+        new_access_token = security.create_access_token(
+            email, user_id=user.id, username=user.username, token_version=token_version
+        )
 
         return {"access_token": new_access_token, "token_type": "bearer"}
 
@@ -163,11 +149,28 @@ async def refresh_token(refresh_data: dict):
 @router.get("/api/user/me/")
 async def get_current_user_info(
     request: Request,
+    response: Response,
     current_user: Annotated[UserI, Depends(security.get_current_user)],
 ):
+    # Same URL for every user: shared caches must key on the token
+    unchanged = await not_modified(
+        request,
+        "profile",
+        lambda: user_views.fetch_profile_markers(current_user.id),
+        PRIVATE_CACHE_CONTROL,
+        vary="Authorization",
+    )
+    if unchanged:
+        return unchanged
     profile = await user_views.get_profile_with_stats(current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="User not found")
+    set_validators(
+        response,
+        make_etag("profile", user_views.profile_markers(profile)),
+        PRIVATE_CACHE_CONTROL,
+        vary="Authorization",
+    )
     return profile
 
 
@@ -186,7 +189,7 @@ async def update_current_user_profile(
     )
     if all(v is None for v in (cmd.bio, cmd.location, cmd.avatar_url)):
         return {"detail": "No fields to update"}
-    bus.handle(cmd)
+    await bus.handle(cmd)
     profile = await user_views.get_profile_with_stats(current_user.id)
     return profile
 
@@ -226,9 +229,48 @@ async def get_database_info():
         "database_uri": sanitized,
         "total_users": user_count,
         "is_connected": database.is_connected,
+        "principal_cache": security.principal_cache.stats(),
+        "view_cache": view_cache.stats(),
+        "hot_ranking": hot.ranking.stats(),
+        "outbox": get_outbox_dispatcher().stats(),
     }
 
 
+class ExportTable(str, Enum):
+    posts = "posts"
+    comments = "comments"
+    likes = "likes"
+
+
+@router.get("/api/admin/export")
+async def export_data(
+    admin: Annotated[UserI, Depends(security.get_current_admin)],
+    tables: Annotated[list[ExportTable] | None, Query()] = None,
+    since: str | None = None,
+    gzip: bool = False,
+):
+    """
+    NDJSON dump of posts, comments and likes, streamed from the database in constant memory.
+    Pass the `since` token from the last line of a previous export to pull only newer rows.
+
+    `since` is an id high-water mark per table, so incremental pulls see new rows only, never
+    unlikes, deletions or counter changes. On PostgreSQL, rows committed out of id order by
+    concurrent writers can be missed. Run a full export (no `since`) to reconcile.
+    """
+    try:
+        watermarks = export_views.decode_since(since)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    names = [table.value for table in tables or ExportTable]
+    body = export_views.export_ndjson(names, watermarks)
+    headers = {"Cache-Control": "no-store"}
+    if gzip:
+        body = export_views.gzipped(body)
+        headers["Content-Encoding"] = "gzip"
+    logger.info("Export of %s requested by %s", ",".join(names), admin.email)
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
 # User settings models
 @router.delete("/api/user", status_code=204)
 async def delete_account(
@@ -244,7 +286,7 @@ async def delete_account(
             raise HTTPException(status_code=401, detail="Invalid password")
 
     cmd = commands.DeleteAccount(user_id=current_user.id, verify_password_hash=None)
-    bus.handle(cmd)
+    await bus.handle(cmd)
     return
 
 
@@ -259,8 +301,8 @@ async def change_password(
     if not user:
         raise HTTPException(status_code=401, detail="Invalid old password")
     bus = get_bus(request)
-    new_hash = security.get_password_hash(payload.new_password)
+    new_hash = await security.hash_password(payload.new_password)
     cmd = commands.ChangePassword(user_id=current_user.id, new_password_hash=new_hash)
-    bus.handle(cmd)
+    await bus.handle(cmd)
     logger.info(f"Password changed for user_id={current_user.id}")
     return {"detail": "Password changed successfully."}
@@ -65,7 +65,9 @@ class Comment(CommentI):
 
 class UserPostWithComments(BaseModel):
     post: UserPostWithLikes
+    # First page only; pass comments_cursor to GET /api/posts/{post_id}/comment for the rest
     comments: list[Comment]
+    comments_cursor: Optional[str] = None
 
 
 # Likes
@@ -73,6 +75,11 @@ class PostLikeI(BaseModel):
     post_id: int
 
 
+class PostLikeToggled(BaseModel):
+    liked: bool
+    like_count: int
+
+
 class PostLike(PostLikeI):
     id: int
     user_id: int
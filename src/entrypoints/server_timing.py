@@ -0,0 +1,109 @@
+"""
+Server-Timing breakdown for API responses.
+
+ServerTimingMiddleware times a request when it carries the debug header
+(config.SERVER_TIMING_HEADER) or is drawn by config.SERVER_TIMING_SAMPLE_RATE. For a timed
+request, the response gets a header such as
+
+    Server-Timing: auth;dur=0.4, db;dur=3.1;desc="4x", bus;dur=5.0, serialize;dur=0.8, total;dur=7.9
+
+Browser devtools show this header in the network panel. Phases are reported by
+src.adapters.timing spans: `auth` (security.get_current_user), `db` (engine and `databases`
+statements), `bus` (message bus dispatch) and `serialize` (from the endpoint's return value to
+the response object, see TimedRoute). `total` runs until the response headers are sent.
+Untimed requests skip all of it.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import random
+import time
+from typing import Any, Callable, Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.adapters import timing
+from src.config import config
+
+ENDPOINT_RETURNED = "endpoint_returned"
+
+
+class ServerTimingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        debug_header: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+    ) -> None:
+        self.app = app
+        debug_header = config.SERVER_TIMING_HEADER if debug_header is None else debug_header
+        self.debug_header = debug_header.lower().encode("latin-1")
+        self.sample_rate = config.SERVER_TIMING_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def _wants_timing(self, scope: Scope) -> bool:
+        if self.debug_header and any(name == self.debug_header for name, _ in scope["headers"]):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wants_timing(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = timing.start()
+        timings = timing.current()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings.add("total", time.perf_counter() - started)
+                MutableHeaders(scope=message).append("Server-Timing", timings.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.stop(token)
+
+
+def _mark_return(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # functools.wraps sets __wrapped__, which FastAPI follows for the signature, annotations
+    # and response model, so the wrapper is invisible to dependency resolution
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing.mark(ENDPOINT_RETURNED)
+    else:
+        @functools.wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timing.mark(ENDPOINT_RETURNED)
+    return timed_endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that reports `serialize`: response model validation and JSON encoding, i.e. the
+    time between the endpoint returning and FastAPI's handler producing the Response.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _mark_return(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timing.record_since(ENDPOINT_RETURNED, "serialize")
+            return response
+
+        return timed_handler
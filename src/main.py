@@ -3,6 +3,7 @@ from contextlib import asynccontextmanager
 
 from asgi_correlation_id import CorrelationIdMiddleware
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exception_handlers import http_exception_handler
 
@@ -11,9 +12,16 @@ import sentry_sdk
 
 #from src.config import config
 from src.config import config
-from src.db import database
+from src.adapters import metrics
+from src.db import async_engine, database, engine
+from src.migrations import migrate
 from src.log_config import configure_logging
-from src.bootstrap import get_message_bus
+from src.bootstrap import get_message_bus, get_outbox_dispatcher
+from src import security
+from src.views import hot
+from src.entrypoints.metrics import MetricsMiddleware, register_pool_gauges
+from src.entrypoints.query_counter import QueryCounterMiddleware
+from src.entrypoints.server_timing import ServerTimingMiddleware
 
 from src.entrypoints.routers.post import router as post_router
 from src.entrypoints.routers.user import router as user_router
@@ -30,9 +38,16 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     configure_logging()
+    migrate(engine)
     await database.connect()
+    if config.OUTBOX_DISPATCHER_ENABLED:
+        get_outbox_dispatcher().start()
+    hot.start_upkeep()
     yield
+    await hot.stop_upkeep()
+    get_outbox_dispatcher().stop()
     await database.disconnect()
+    security.password_hasher.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -43,10 +58,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["HEAD", "GET", "POST", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+if config.QUERY_COUNT_WARN_THRESHOLD:
+    # Inside CorrelationIdMiddleware, so its warnings carry the request's correlation id
+    app.add_middleware(QueryCounterMiddleware)
+
 app.add_middleware(CorrelationIdMiddleware)
 
+# Added last, so they wrap the other middleware and their timings include it
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+register_pool_gauges({"engine": engine, "async_engine": async_engine.sync_engine}, database)
+
 # initialize global message bus singleton
 get_message_bus()
 
@@ -70,3 +95,8 @@ async def http_exception_handle_logging(request, exc):
 @app.get("/")
 async def root():
     return {"message": "Server is running"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of this worker's HTTP, message bus and pool metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,235 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once and is recorded in the `schema_migrations` ledger. When the
+ledger already lists every version, `migrate` returns after a single SELECT, so process
+startup does no schema work in the common case.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Sequence
+
+import sqlalchemy
+from sqlalchemy.engine import Connection, Engine
+
+from src.adapters import search
+from src.db import (
+    metadata,
+    outbox_table,
+    schema_migrations_table,
+    user_stats_table,
+    user_table,
+)
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key so concurrent workers starting at once apply migrations one at a time (PostgreSQL)
+_ADVISORY_LOCK_KEY = 7_314_529
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # Non-transactional migrations (e.g. CREATE INDEX CONCURRENTLY) run on an autocommit connection
+    transactional: bool = True
+
+
+# --- Helpers ---
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN, unless the column exists (fresh databases get it from the baseline)."""
+    if column in {col["name"] for col in sqlalchemy.inspect(conn).get_columns(table)}:
+        return False
+    conn.execute(sqlalchemy.text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def _add_created_at(conn: Connection, table: str) -> None:
+    if conn.dialect.name != "sqlite":
+        _add_column(conn, table, "created_at", "TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP NOT NULL")
+        return
+    # SQLite rejects non-constant defaults (CURRENT_TIMESTAMP) in ADD COLUMN:
+    # add the column nullable and backfill existing rows with the expression instead
+    if _add_column(conn, table, "created_at", "DATETIME"):
+        conn.execute(sqlalchemy.text(f"UPDATE {table} SET created_at = CURRENT_TIMESTAMP"))
+
+
+def _create_indexes(*names: str) -> Callable[[Connection], None]:
+    """Build the named indexes declared in src.db; online (CONCURRENTLY) on PostgreSQL."""
+
+    def apply(conn: Connection) -> None:
+        declared = {index.name: index for table in metadata.tables.values() for index in table.indexes}
+        concurrently = " CONCURRENTLY" if conn.dialect.name == "postgresql" else ""
+        for name in names:
+            index = declared[name]
+            columns = ", ".join(column.name for column in index.columns)
+            unique = "UNIQUE " if index.unique else ""
+            conn.execute(
+                sqlalchemy.text(
+                    f"CREATE {unique}INDEX{concurrently} IF NOT EXISTS {name} ON {index.table.name} ({columns})"
+                )
+            )
+
+    return apply
+
+
+# --- Migrations ---
+# Each migration spells out its own DDL rather than diffing against src.db, so what a version
+# does never changes after it ships; schema changes go in a new migration.
+
+
+def _baseline(conn: Connection) -> None:
+    # Fresh databases get the full current schema; existing tables are left alone
+    metadata.create_all(conn)
+
+
+def _legacy_columns(conn: Connection) -> None:
+    # Columns previously added by the import-time ALTER block in src/db.py, plus the post counters
+    for column in ("bio", "location", "avatar_url"):
+        _add_column(conn, "users", column, "VARCHAR")
+    _add_created_at(conn, "users")
+    _add_created_at(conn, "posts")
+    _add_column(conn, "posts", "like_count", "INTEGER DEFAULT 0 NOT NULL")
+    _add_column(conn, "posts", "comment_count", "INTEGER DEFAULT 0 NOT NULL")
+    _add_column(conn, "comments", "username", "VARCHAR")
+    _add_created_at(conn, "comments")
+    conn.execute(
+        sqlalchemy.text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_likes_post_user ON likes (post_id, user_id)"
+        )
+    )
+
+
+def _backfill_post_counters(conn: Connection) -> None:
+    conn.execute(
+        sqlalchemy.text(
+            "UPDATE posts SET "
+            "like_count = (SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id), "
+            "comment_count = (SELECT COUNT(*) FROM comments WHERE comments.post_id = posts.id)"
+        )
+    )
+
+
+def _confirm_existing_users(conn: Connection) -> None:
+    # Email confirmation was removed; confirm legacy accounts once instead of on every start
+    conn.execute(
+        user_table.update()
+        .where(user_table.c.confirmed == sqlalchemy.false())
+        .values(confirmed=True)
+    )
+
+
+def _users_token_version(conn: Connection) -> None:
+    _add_column(conn, "users", "token_version", "INTEGER DEFAULT 0 NOT NULL")
+
+
+def _user_stats(conn: Connection) -> None:
+    user_stats_table.create(conn, checkfirst=True)
+    conn.execute(
+        sqlalchemy.text(
+            "INSERT INTO user_stats (user_id, posts_count, likes_received) "
+            "SELECT users.id, "
+            "(SELECT COUNT(*) FROM posts WHERE posts.user_id = users.id), "
+            "(SELECT COUNT(*) FROM likes JOIN posts ON likes.post_id = posts.id WHERE posts.user_id = users.id) "
+            "FROM users WHERE NOT EXISTS (SELECT 1 FROM user_stats WHERE user_stats.user_id = users.id)"
+        )
+    )
+
+
+def _outbox(conn: Connection) -> None:
+    outbox_table.create(conn, checkfirst=True)
+
+
+MIGRATIONS: Sequence[Migration] = (
+    Migration(1, "baseline", _baseline),
+    Migration(2, "legacy_columns", _legacy_columns),
+    Migration(3, "backfill_post_counters", _backfill_post_counters),
+    Migration(4, "confirm_existing_users", _confirm_existing_users),
+    Migration(
+        5,
+        "secondary_indexes",
+        _create_indexes(
+            "ix_posts_user_id_id",
+            "ix_posts_created_at",
+            "ix_posts_like_count_id",
+            "ix_comments_post_id_id",
+            "ix_likes_user_id",
+        ),
+        transactional=False,
+    ),
+    Migration(6, "users_token_version", _users_token_version),
+    Migration(7, "post_search_index", search.create_index),
+    Migration(8, "post_search_gin_index", search.create_gin_index, transactional=False),
+    Migration(9, "user_stats", _user_stats),
+    Migration(
+        10,
+        "comments_created_at_index",
+        _create_indexes("ix_comments_post_id_created_at_id"),
+        transactional=False,
+    ),
+    Migration(11, "outbox", _outbox),
+)
+
+
+# --- Runner ---
+
+
+def _applied_versions(conn: Connection) -> set[int]:
+    if not sqlalchemy.inspect(conn).has_table(schema_migrations_table.name):
+        return set()
+    return set(conn.execute(sqlalchemy.select(schema_migrations_table.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.connect() as conn:
+        applied = _applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    logger.info("Applying migration %s_%s", migration.version, migration.name)
+    record = schema_migrations_table.insert().values(
+        version=migration.version, name=migration.name
+    )
+    if migration.transactional:
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(record)
+        return
+    with engine.connect() as conn:
+        migration.apply(conn.execution_options(isolation_level="AUTOCOMMIT"))
+    with engine.begin() as conn:
+        conn.execute(record)
+
+
+def migrate(engine: Engine) -> List[Migration]:
+    """Apply pending migrations in version order; returns the ones applied."""
+    if not pending_migrations(engine):
+        return []
+
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(sqlalchemy.text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            # The lock is session-level; end the transaction so CREATE INDEX CONCURRENTLY
+            # does not wait on this connection's snapshot
+            lock_conn.commit()
+        try:
+            with engine.begin() as conn:
+                schema_migrations_table.create(conn, checkfirst=True)
+            # Re-read under the lock: another worker may have finished while we waited
+            applied = []
+            for migration in pending_migrations(engine):
+                _apply(engine, migration)
+                applied.append(migration)
+            return applied
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(
+                    sqlalchemy.text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY}
+                )
+                lock_conn.commit()
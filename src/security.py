@@ -1,14 +1,17 @@
 import datetime
 import logging
-from typing import Annotated, Literal
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, Literal, Optional
 
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
+import sqlalchemy
 
-from passlib.context import CryptContext
 from src.config import config
 from jose import jwt, ExpiredSignatureError, JWTError
 
+from src.adapters import passwords, timing
+from src.adapters.cache import TTLCache
 from src.db import database, user_table
 
 logger = logging.getLogger(__name__)
@@ -18,7 +21,26 @@ ALGORITHM = "HS256"
 # OAuth2 password flow for Swagger/OpenAPI; token issued at /api/token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
-pwd_context = CryptContext(schemes=["bcrypt"])
+pwd_context = passwords.crypt_context(config.BCRYPT_ROUNDS)
+password_hasher = passwords.PasswordHasher(rounds=config.BCRYPT_ROUNDS, pool_size=config.BCRYPT_POOL_SIZE)
+# Token subject (email) -> user row; invalidated by the user events wired in bootstrap
+principal_cache: TTLCache = TTLCache(
+    max_entries=config.PRINCIPAL_CACHE_MAX_ENTRIES, ttl=config.PRINCIPAL_CACHE_TTL_SECONDS
+)
+# user id -> current users.token_version; the revocation check for claim-bearing tokens
+token_versions: TTLCache = TTLCache(
+    max_entries=config.TOKEN_VERSION_CACHE_MAX_ENTRIES, ttl=config.TOKEN_VERSION_CACHE_TTL_SECONDS
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as carried by access-token claims."""
+
+    id: int
+    email: str
+    username: Optional[str]
+    token_version: int = 0
 
 def create_credentials_exception(detail: str) -> HTTPException:
     return HTTPException(
@@ -33,28 +55,42 @@ def access_token_expire_minutes() -> int:
 def refresh_token_expire_days() -> int:
     return 10080  # 7 days
 
-def create_access_token(email: str):
+def _user_claims(user_id: Optional[int], username: Optional[str], token_version: Optional[int]) -> Dict[str, Any]:
+    claims: Dict[str, Any] = {}
+    if user_id is not None:
+        claims.update(uid=user_id, username=username)
+    if token_version is not None:
+        claims["ver"] = token_version
+    return claims
+
+def create_access_token(
+    email: str,
+    user_id: Optional[int] = None,
+    username: Optional[str] = None,
+    token_version: Optional[int] = None,
+):
+    """With user_id, the token carries enough claims for get_current_user to skip the users lookup."""
     expire = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
         minutes=access_token_expire_minutes()
     )
-    jwt_data = {"sub": email, "exp": expire, "type": "access"}
+    jwt_data = {"sub": email, "exp": expire, "type": "access", **_user_claims(user_id, username, token_version)}
     encoded_jwt = jwt.encode(jwt_data, KEY, algorithm = ALGORITHM)
 
     return encoded_jwt
 
-def create_refresh_token(email: str):
+def create_refresh_token(email: str, token_version: Optional[int] = None):
     """Create a refresh token with longer expiration"""
     expire = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(
         days=refresh_token_expire_days()
     )
-    jwt_data = {"sub": email, "exp": expire, "type": "refresh"}
+    jwt_data = {"sub": email, "exp": expire, "type": "refresh", **_user_claims(None, None, token_version)}
     encoded_jwt = jwt.encode(jwt_data, KEY, algorithm = ALGORITHM)
 
     return encoded_jwt
 
-def get_subject_for_token_type(
+def get_claims_for_token_type(
     token: str, type: Literal["access", "refresh"]
-) -> str:
+) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token, key=KEY, algorithms=[ALGORITHM])
     except ExpiredSignatureError as e:
@@ -72,28 +108,35 @@ def get_subject_for_token_type(
             f"Token has incorrect type, expected '{type}'"
         )
 
-    return email
+    return payload
+
+def get_subject_for_token_type(
+    token: str, type: Literal["access", "refresh"]
+) -> str:
+    return get_claims_for_token_type(token, type)["sub"]
 
 def get_password_hash(password: str) -> str:
-    # bcrypt has a 72-byte limit; truncate to prevent errors
-    password_bytes = password.encode('utf-8')[:72]
-    return pwd_context.hash(password_bytes)
+    """Blocking; request handlers should await hash_password instead."""
+    return passwords.hash_password(password, config.BCRYPT_ROUNDS)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # bcrypt has a 72-byte limit; truncate to match hashing behavior
-    password_bytes = plain_password.encode('utf-8')[:72]
-    return pwd_context.verify(password_bytes, hashed_password)
+    """Blocking; request handlers should await password_hasher.verify instead."""
+    valid, _ = passwords.verify_password(plain_password, hashed_password, config.BCRYPT_ROUNDS)
+    return valid
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 async def get_user_by_email(email: str):
-    logger.info(f"Fetching user from database for email: {email}")
+    logger.debug(f"Fetching user from database for email: {email}")
     query = user_table.select().where(user_table.c.email == email)
     result = await database.fetch_one(query)
 
     if result:
-        logger.info(f"User found for email {email}: user_id={result.id}")
+        logger.debug(f"User found for email {email}: user_id={result.id}")
         return result
     else:
-        logger.info(f"No user found for email {email}")
+        logger.debug(f"No user found for email {email}")
         return None
 
 async def get_user(email: str):
@@ -118,18 +161,72 @@ async def authenticate_user(email: str, password: str):
     if not user:
         raise create_credentials_exception("Invalid email or password")
 
-    if not verify_password(password, user.password):
+    valid, upgraded_hash = await password_hasher.verify(password, user.password)
+    if not valid:
         raise create_credentials_exception("Invalid email or password")
+    if upgraded_hash:
+        # BCRYPT_ROUNDS changed since this hash was stored; we hold the plaintext only now
+        logger.info(f"Upgrading password hash cost for user_id={user.id}")
+        await database.execute(
+            user_table.update().where(user_table.c.id == user.id).values(password=upgraded_hash)
+        )
 
     # No email confirmation required - all registered users are automatically confirmed
     return user
 
+async def current_token_version(user_id: int) -> Optional[int]:
+    """users.token_version, served from the in-memory table; None if the user no longer exists."""
+    version = token_versions.get(user_id)
+    if version is None:
+        version = await database.fetch_val(
+            sqlalchemy.select(user_table.c.token_version).where(user_table.c.id == user_id)
+        )
+        if version is not None:
+            token_versions.set(user_id, version)
+    return version
+
+async def ensure_token_not_revoked(user_id: int, token_version: int) -> None:
+    current = await current_token_version(user_id)
+    if current is None or token_version < current:
+        raise create_credentials_exception("Token has been revoked")
+
 #Adding the dependency injection to reduce the amount of code related to adding this scheme
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    email = get_subject_for_token_type(token, "access")
-    
-    user = await get_user_by_email(email=email)
-    if user is None:
-        raise create_credentials_exception("Could not find user for this token")
-    
+    # JWT decode plus principal lookup, reported as `auth` in Server-Timing
+    with timing.span("auth"):
+        return await _principal_for_token(token)
+
+async def _principal_for_token(token: str):
+    claims = get_claims_for_token_type(token, "access")
+    email = claims["sub"]
+
+    if "uid" in claims:
+        # Fast path: the principal comes from the signed claims, only the version is checked
+        user = Principal(
+            id=claims["uid"], email=email, username=claims.get("username"), token_version=claims.get("ver", 0)
+        )
+    else:
+        # Tokens issued before claims existed: resolve the subject through the users table
+        user = principal_cache.get(email)
+        if user is None:
+            user = await get_user_by_email(email=email)
+            if user is None:
+                raise create_credentials_exception("Could not find user for this token")
+            principal_cache.set(email, user)
+
+    await ensure_token_not_revoked(user.id, claims.get("ver", 0))
     return user
+
+def admin_emails() -> frozenset[str]:
+    return frozenset(email.strip().lower() for email in config.ADMIN_EMAILS.split(",") if email.strip())
+
+async def get_current_admin(user: Annotated[Any, Depends(get_current_user)]):
+    if user.email.lower() not in admin_emails():
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop cached state for user_id (password change, profile update, account deletion)."""
+    principal_cache.discard_where(lambda _, user: user.id == user_id)
+    # Reloaded from users.token_version on the next request, so revocation applies immediately here
+    token_versions.pop(user_id)
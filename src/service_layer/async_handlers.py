@@ -0,0 +1,214 @@
+"""
+Coroutine variants of src.service_layer.handlers for the AsyncMessageBus.
+
+Names and signatures match the sync module one for one so bootstrap wires both buses from
+the same registry. Repository calls are awaited; blocking dependencies (password hashing,
+file uploads) are awaitables that src.bootstrap runs on the process pool or a worker thread,
+so the event loop stays free.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Awaitable, Callable
+
+from anyio import to_thread
+
+from src.domain import commands, events, exceptions, model
+from src.service_layer import unit_of_work
+from src.service_layer.handlers import _ensure_events_list
+
+logger = logging.getLogger(__name__)
+
+
+# --- Command handlers ---
+
+
+async def register_user(
+    cmd: commands.RegisterUser,
+    uow: unit_of_work.AbstractAsyncUnitOfWork,
+    hash_password: Callable[[str], Awaitable[str]],
+) -> int:
+    if await uow.users.get_by_email(cmd.email):
+        raise exceptions.UserExists(f"User with email {cmd.email} already exists")
+    if cmd.username and await uow.users.get_by_username(cmd.username):
+        raise exceptions.UserExists(f"Username {cmd.username} already exists")
+
+    username = cmd.username or cmd.email.split("@")[0]
+    password_hash = await hash_password(cmd.password)
+    user_agg = model.UserAggregate(
+        user=model.User(id=0, email=cmd.email, username=username),
+        bio=cmd.bio,
+        location=cmd.location,
+        avatar_url=cmd.avatar_url,
+        password_hash=password_hash,
+    )
+    await uow.users.add(user_agg)
+    # Seeds the user's user_stats row
+    await uow.users.bump_stats(user_agg.user.id)
+    _ensure_events_list(user_agg).append(
+        events.UserRegistered(user_id=user_agg.user.id, email=cmd.email, username=username)
+    )
+    await uow.commit()
+    return user_agg.user.id
+
+
+async def create_post(cmd: commands.CreatePost, uow: unit_of_work.AbstractAsyncUnitOfWork) -> int:
+    if not await uow.users.get(cmd.user_id):
+        raise exceptions.Unauthorized("User not found")
+
+    post = model.PostAggregate(
+        id=cmd.post_id,
+        user_id=cmd.user_id,
+        username=cmd.username,
+        body=cmd.body,
+    )
+    await uow.posts.add(post)
+    await uow.users.bump_stats(cmd.user_id, posts=1)
+    _ensure_events_list(post).append(events.PostCreated(post_id=post.id, user_id=cmd.user_id, username=cmd.username))
+    await uow.commit()
+    return post.id
+
+
+async def add_comment(cmd: commands.AddComment, uow: unit_of_work.AbstractAsyncUnitOfWork) -> model.Comment:
+    if not cmd.body:
+        raise exceptions.InvalidOperation("Comment body cannot be empty")
+    # Append-only insert: the post's existing comments/likes are never loaded
+    appended = await uow.posts.append_comment(cmd.post_id, cmd.user_id, cmd.body)
+    if appended is None:
+        raise exceptions.PostNotFound(f"Post {cmd.post_id} not found")
+    _ensure_events_list(appended).append(
+        events.CommentAdded(post_id=cmd.post_id, comment_id=appended.comment.id, user_id=cmd.user_id)
+    )
+    await uow.commit()
+    return appended.comment
+
+
+async def toggle_like(cmd: commands.ToggleLike, uow: unit_of_work.AbstractAsyncUnitOfWork) -> model.LikeToggle:
+    # Single-statement toggle: the post's comments/likes are never loaded
+    toggle = await uow.posts.toggle_like(cmd.post_id, cmd.user_id)
+    if toggle is None:
+        raise exceptions.PostNotFound(f"Post {cmd.post_id} not found")
+    # delta is 0 when a concurrent toggle already applied this like
+    if toggle.delta:
+        await uow.users.bump_stats(toggle.author_id, likes_received=toggle.delta)
+    _ensure_events_list(toggle).append(
+        events.LikeToggled(
+            post_id=cmd.post_id,
+            user_id=cmd.user_id,
+            liked=toggle.liked,
+            like_count=toggle.like_count,
+            author_id=toggle.author_id,
+            delta=toggle.delta,
+        )
+    )
+    await uow.commit()
+    return toggle
+
+
+async def upload_file(
+    cmd: commands.UploadFile,
+    uow: unit_of_work.AbstractAsyncUnitOfWork,
+    file_storage: Callable[[str, str], Awaitable[str]],
+) -> str:
+    file_url = await file_storage(cmd.local_path, cmd.file_name)
+    # No aggregate to hang it on: written to the outbox directly
+    await uow.outbox.add(events.FileUploaded(file_name=cmd.file_name, file_url=file_url))
+    await uow.commit()
+    return file_url
+
+
+async def update_profile(cmd: commands.UpdateProfile, uow: unit_of_work.AbstractAsyncUnitOfWork):
+    user = await uow.users.get(cmd.user_id)
+    if not user:
+        raise exceptions.Unauthorized("User not found")
+    user.update_profile(bio=cmd.bio, location=cmd.location, avatar_url=cmd.avatar_url)
+    await uow.users.save(user)
+    _ensure_events_list(user).append(events.ProfileUpdated(user_id=cmd.user_id))
+    await uow.commit()
+    return user.user.id
+
+
+async def change_password(cmd: commands.ChangePassword, uow: unit_of_work.AbstractAsyncUnitOfWork):
+    user = await uow.users.get(cmd.user_id)
+    if not user:
+        raise exceptions.Unauthorized("User not found")
+    user.change_password(cmd.new_password_hash)
+    await uow.users.save(user)
+    _ensure_events_list(user).append(events.PasswordChanged(user_id=cmd.user_id))
+    await uow.commit()
+    return user.user.id
+
+
+async def delete_account(cmd: commands.DeleteAccount, uow: unit_of_work.AbstractAsyncUnitOfWork):
+    user = await uow.users.get(cmd.user_id)
+    if not user:
+        raise exceptions.Unauthorized("User not found")
+    await uow.users.delete(cmd.user_id)
+    _ensure_events_list(user).append(events.AccountDeleted(user_id=cmd.user_id))
+    await uow.commit()
+    return cmd.user_id
+
+
+async def reconcile_post_counters(cmd: commands.ReconcilePostCounters, uow: unit_of_work.AbstractAsyncUnitOfWork) -> int:
+    repaired = await uow.posts.reconcile_counters(cmd.post_id)
+    if repaired:
+        logger.warning("Repaired like/comment counters on %s post(s)", repaired)
+    await uow.commit()
+    return repaired
+
+
+async def reconcile_user_stats(cmd: commands.ReconcileUserStats, uow: unit_of_work.AbstractAsyncUnitOfWork) -> int:
+    repaired = await uow.users.reconcile_stats(cmd.user_id)
+    if repaired:
+        logger.warning("Rebuilt user_stats for %s user(s)", repaired)
+    await uow.commit()
+    return repaired
+
+
+# --- Event handlers ---
+
+
+async def handle_user_registered(event: events.UserRegistered, uow: unit_of_work.AbstractAsyncUnitOfWork, notifier=None):
+    logger.info("User registered: %s", event)
+    if notifier:
+        await to_thread.run_sync(
+            lambda: notifier.send(
+                to=event.email,
+                subject="Welcome to Matrix-Net",
+                body=f"Hi {event.username}, your account has been created.",
+            )
+        )
+
+
+async def handle_file_uploaded(event: events.FileUploaded, uow: unit_of_work.AbstractAsyncUnitOfWork):
+    logger.info("File uploaded: %s", event.file_url)
+
+
+async def index_post_for_search(event: events.PostCreated, uow: unit_of_work.AbstractAsyncUnitOfWork):
+    await uow.posts.index_for_search(event.post_id)
+    await uow.commit()
+
+
+async def invalidate_principal(
+    event: events.PasswordChanged | events.ProfileUpdated | events.AccountDeleted,
+    uow: unit_of_work.AbstractAsyncUnitOfWork,
+    invalidate_principal: Callable[[int], None],
+):
+    # Cached principals must not outlive a credential/profile change in this worker
+    invalidate_principal(event.user_id)
+
+
+async def invalidate_cached_views(
+    event: events.Event,
+    uow: unit_of_work.AbstractAsyncUnitOfWork,
+    invalidate_views: Callable[[events.Event], None],
+):
+    invalidate_views(event)
+
+
+async def update_hot_ranking(
+    event: events.PostCreated | events.LikeToggled,
+    uow: unit_of_work.AbstractAsyncUnitOfWork,
+    hot_ranking: Callable[[events.Event], None],
+):
+    hot_ranking(event)
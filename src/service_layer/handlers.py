@@ -1,3 +1,9 @@
+"""
+Command and event handlers for the sync MessageBus, the outbox dispatcher and scripts.
+
+src.service_layer.async_handlers holds the coroutine variants for the AsyncMessageBus; the two
+modules define the same names and signatures, so src.bootstrap wires both buses from one registry.
+"""
 from __future__ import annotations
 
 import logging
@@ -13,37 +19,31 @@ logger = logging.getLogger(__name__)
 
 
 def register_user(cmd: commands.RegisterUser, uow: unit_of_work.AbstractUnitOfWork, hash_password: Callable[[str], str]) -> int:
-    # Preconditions
     if uow.users.get_by_email(cmd.email):
         raise exceptions.UserExists(f"User with email {cmd.email} already exists")
     if cmd.username and uow.users.get_by_username(cmd.username):
         raise exceptions.UserExists(f"Username {cmd.username} already exists")
 
-    # Derive username if missing
     username = cmd.username or cmd.email.split("@")[0]
-    user_id = uow.users._next_id if hasattr(uow.users, "_next_id") else None  # placeholder for fakes
-    user_entity = model.User(id=user_id or 0, email=cmd.email, username=username)
     user_agg = model.UserAggregate(
-        user=user_entity,
+        user=model.User(id=0, email=cmd.email, username=username),
         bio=cmd.bio,
         location=cmd.location,
         avatar_url=cmd.avatar_url,
         password_hash=hash_password(cmd.password),
     )
     uow.users.add(user_agg)
-    # Emit event on aggregate
-    events_list = getattr(user_agg, "events", None)
-    if events_list is None:
-        user_agg.events = []  # type: ignore[attr-defined]
-    user_agg.events.append(events.UserRegistered(user_id=user_entity.id, email=cmd.email, username=username))  # type: ignore[attr-defined]
-
+    # Seeds the user's user_stats row
+    uow.users.bump_stats(user_agg.user.id)
+    _ensure_events_list(user_agg).append(
+        events.UserRegistered(user_id=user_agg.user.id, email=cmd.email, username=username)
+    )
     uow.commit()
-    return user_entity.id
+    return user_agg.user.id
 
 
 def create_post(cmd: commands.CreatePost, uow: unit_of_work.AbstractUnitOfWork) -> int:
-    user = uow.users.get(cmd.user_id)
-    if not user:
+    if not uow.users.get(cmd.user_id):
         raise exceptions.Unauthorized("User not found")
 
     post = model.PostAggregate(
@@ -53,49 +53,52 @@ def create_post(cmd: commands.CreatePost, uow: unit_of_work.AbstractUnitOfWork)
         body=cmd.body,
     )
     uow.posts.add(post)
-    _ensure_events_list(post).append(events.PostCreated(post_id=cmd.post_id, user_id=cmd.user_id, username=cmd.username))
+    uow.users.bump_stats(cmd.user_id, posts=1)
+    _ensure_events_list(post).append(events.PostCreated(post_id=post.id, user_id=cmd.user_id, username=cmd.username))
     uow.commit()
     return post.id
 
 
-def add_comment(cmd: commands.AddComment, uow: unit_of_work.AbstractUnitOfWork) -> int:
-    post = uow.posts.get(cmd.post_id)
-    if not post:
+def add_comment(cmd: commands.AddComment, uow: unit_of_work.AbstractUnitOfWork) -> model.Comment:
+    if not cmd.body:
+        raise exceptions.InvalidOperation("Comment body cannot be empty")
+    # Append-only insert: the post's existing comments/likes are never loaded
+    appended = uow.posts.append_comment(cmd.post_id, cmd.user_id, cmd.body)
+    if appended is None:
         raise exceptions.PostNotFound(f"Post {cmd.post_id} not found")
-    # Let the repository assign IDs; use a placeholder (None) in the aggregate
-    comment = post.add_comment(comment_id=None, user_id=cmd.user_id, body=cmd.body)
-    # Persist post/comment to get DB-generated ID
-    uow.posts.save(post)
-    # Collect the actual ID after save if available
-    new_id = getattr(uow.posts, "last_comment_id", None) or getattr(comment, "id", None) or cmd.comment_id
-    _ensure_events_list(post).append(
-        events.CommentAdded(post_id=cmd.post_id, comment_id=new_id, user_id=cmd.user_id)
+    _ensure_events_list(appended).append(
+        events.CommentAdded(post_id=cmd.post_id, comment_id=appended.comment.id, user_id=cmd.user_id)
     )
     uow.commit()
-    return new_id
+    return appended.comment
 
 
-def toggle_like(cmd: commands.ToggleLike, uow: unit_of_work.AbstractUnitOfWork):
-    post = uow.posts.get(cmd.post_id)
-    if not post:
+def toggle_like(cmd: commands.ToggleLike, uow: unit_of_work.AbstractUnitOfWork) -> model.LikeToggle:
+    # Single-statement toggle: the post's comments/likes are never loaded
+    toggle = uow.posts.toggle_like(cmd.post_id, cmd.user_id)
+    if toggle is None:
         raise exceptions.PostNotFound(f"Post {cmd.post_id} not found")
-    result = post.toggle_like(user_id=cmd.user_id)
-    liked = result is not None
-    if liked:
-        uow.posts.add_like(cmd.post_id, cmd.user_id)
-    else:
-        uow.posts.remove_like(cmd.post_id, cmd.user_id)
-    _ensure_events_list(post).append(events.LikeToggled(post_id=cmd.post_id, user_id=cmd.user_id, liked=liked))
+    # delta is 0 when a concurrent toggle already applied this like
+    if toggle.delta:
+        uow.users.bump_stats(toggle.author_id, likes_received=toggle.delta)
+    _ensure_events_list(toggle).append(
+        events.LikeToggled(
+            post_id=cmd.post_id,
+            user_id=cmd.user_id,
+            liked=toggle.liked,
+            like_count=toggle.like_count,
+            author_id=toggle.author_id,
+            delta=toggle.delta,
+        )
+    )
     uow.commit()
-    return liked
+    return toggle
 
 
 def upload_file(cmd: commands.UploadFile, uow: unit_of_work.AbstractUnitOfWork, file_storage: Callable[[str, str], str]) -> str:
     file_url = file_storage(cmd.local_path, cmd.file_name)
-    # No aggregate here; emit a standalone event
-    standalone = type("Standalone", (), {"events": []})()
-    standalone.events.append(events.FileUploaded(file_name=cmd.file_name, file_url=file_url))
-    # collect_new_events will not see this; just return the event in results
+    # No aggregate to hang it on: written to the outbox directly
+    uow.outbox.add(events.FileUploaded(file_name=cmd.file_name, file_url=file_url))
     uow.commit()
     return file_url
 
@@ -106,6 +109,7 @@ def update_profile(cmd: commands.UpdateProfile, uow: unit_of_work.AbstractUnitOf
         raise exceptions.Unauthorized("User not found")
     user.update_profile(bio=cmd.bio, location=cmd.location, avatar_url=cmd.avatar_url)
     uow.users.save(user)
+    _ensure_events_list(user).append(events.ProfileUpdated(user_id=cmd.user_id))
     uow.commit()
     return user.user.id
 
@@ -125,13 +129,29 @@ def delete_account(cmd: commands.DeleteAccount, uow: unit_of_work.AbstractUnitOf
     user = uow.users.get(cmd.user_id)
     if not user:
         raise exceptions.Unauthorized("User not found")
-    # Real impl would cascade deletions; for now, just drop the aggregate
-    uow.users._delete(cmd.user_id) if hasattr(uow.users, "_delete") else None  # type: ignore[attr-defined]
+    uow.users.delete(cmd.user_id)
+    _ensure_events_list(user).append(events.AccountDeleted(user_id=cmd.user_id))
     uow.commit()
     return cmd.user_id
 
 
-# --- Event handlers (stubs/placeholders) ---
+def reconcile_post_counters(cmd: commands.ReconcilePostCounters, uow: unit_of_work.AbstractUnitOfWork) -> int:
+    repaired = uow.posts.reconcile_counters(cmd.post_id)
+    if repaired:
+        logger.warning("Repaired like/comment counters on %s post(s)", repaired)
+    uow.commit()
+    return repaired
+
+
+def reconcile_user_stats(cmd: commands.ReconcileUserStats, uow: unit_of_work.AbstractUnitOfWork) -> int:
+    repaired = uow.users.reconcile_stats(cmd.user_id)
+    if repaired:
+        logger.warning("Rebuilt user_stats for %s user(s)", repaired)
+    uow.commit()
+    return repaired
+
+
+# --- Event handlers ---
 
 
 def handle_user_registered(event: events.UserRegistered, uow: unit_of_work.AbstractUnitOfWork, notifier=None):
@@ -146,7 +166,37 @@ def handle_user_registered(event: events.UserRegistered, uow: unit_of_work.Abstr
 
 def handle_file_uploaded(event: events.FileUploaded, uow: unit_of_work.AbstractUnitOfWork):
     logger.info("File uploaded: %s", event.file_url)
-    # Placeholder for side-effects (e.g., store metadata)
+
+
+def index_post_for_search(event: events.PostCreated, uow: unit_of_work.AbstractUnitOfWork):
+    # Outbox handler: reindexing from the stored body makes redelivery harmless
+    uow.posts.index_for_search(event.post_id)
+    uow.commit()
+
+
+def invalidate_principal(
+    event: events.PasswordChanged | events.ProfileUpdated | events.AccountDeleted,
+    uow: unit_of_work.AbstractUnitOfWork,
+    invalidate_principal: Callable[[int], None],
+):
+    # Cached principals must not outlive a credential/profile change in this worker
+    invalidate_principal(event.user_id)
+
+
+def invalidate_cached_views(
+    event: events.Event,
+    uow: unit_of_work.AbstractUnitOfWork,
+    invalidate_views: Callable[[events.Event], None],
+):
+    invalidate_views(event)
+
+
+def update_hot_ranking(
+    event: events.PostCreated | events.LikeToggled,
+    uow: unit_of_work.AbstractUnitOfWork,
+    hot_ranking: Callable[[events.Event], None],
+):
+    hot_ranking(event)
 
 
 # --- Helpers ---
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import logging
-from typing import Callable, Dict, List, Type, Union
+import time
+from typing import Callable, Dict, Iterable, List, Type, Union
 import uuid
 
+from src.adapters import metrics, timing
 from src.domain import commands, events
 from src.service_layer import unit_of_work
 
@@ -12,52 +14,212 @@ logger = logging.getLogger(__name__)
 Message = Union[commands.Command, events.Event]
 
 
+class BusMetrics:
+    """Handler timings, event collection time, queue depth and failures, by message type."""
+
+    def __init__(self, registry: metrics.MetricsRegistry | None = None) -> None:
+        registry = registry or metrics.registry
+        self.handler_seconds = registry.histogram(
+            "messagebus_handler_seconds",
+            "Time spent in one command or event handler",
+            ["kind", "message", "handler"],
+        )
+        self.collect_seconds = registry.histogram(
+            "messagebus_collect_events_seconds",
+            "Time spent in collect_new_events after a handler",
+            ["message"],
+            buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01),
+        )
+        self.queue_depth = registry.histogram(
+            "messagebus_queue_depth",
+            "Most messages queued at once during one handle() call",
+            buckets=(1, 2, 4, 8, 16, 32, 64),
+        )
+        self.failures = registry.counter(
+            "messagebus_handler_failures_total",
+            "Command or event handler calls that raised",
+            ["kind", "message", "handler"],
+        )
+
+    def handler(self, kind: str, message: Message, handler: Callable, started: float, failed: bool = False) -> None:
+        labels = (kind, type(message).__name__, _handler_name(handler))
+        self.handler_seconds.labels(*labels).observe(time.perf_counter() - started)
+        if failed:
+            self.failures.labels(*labels).inc()
+
+    def collect(self, message: Message, uow) -> List[Message]:
+        started = time.perf_counter()
+        new_events = uow.collect_new_events()
+        self.collect_seconds.labels(type(message).__name__).observe(time.perf_counter() - started)
+        return new_events
+
+
+def _handler_name(handler: Callable) -> str:
+    # bootstrap binds dependencies with functools.partial
+    return getattr(getattr(handler, "func", handler), "__name__", type(handler).__name__)
+
+
 class MessageBus:
+    """
+    Dispatches commands and the events they raise. Each handle() call gets its own unit of work
+    from `uow_factory`, passed to handlers as `uow`, so messages can be handled in parallel threads.
+
+    `event_handlers` run inline, before handle() returns; a failing one is logged and its
+    uncommitted writes rolled back, and the remaining handlers still run. Events of the
+    `outbox_events` types are also written to the outbox by the commit that persists them; their
+    deferred handlers run later on src.service_layer.outbox.OutboxDispatcher.
+    """
+
     def __init__(
         self,
-        uow: unit_of_work.AbstractUnitOfWork,
+        uow_factory: Callable[[], unit_of_work.AbstractUnitOfWork],
         event_handlers: Dict[Type[events.Event], List[Callable]],
         command_handlers: Dict[Type[commands.Command], Callable],
+        outbox_events: Iterable[Type[events.Event]] = (),
+        metrics: BusMetrics | None = None,
     ) -> None:
-        self.uow = uow
+        self.uow_factory = uow_factory
         self.event_handlers = event_handlers
         self.command_handlers = command_handlers
+        self.outbox_events = frozenset(outbox_events)
+        # Defaults to the process-wide registry; instruments with the same name are shared
+        self.metrics = metrics or BusMetrics()
 
     def handle(self, message: Message) -> List:
+        with timing.span("bus"):
+            return self._handle(message)
+
+    def _handle(self, message: Message) -> List:
+        results = []
+        queue: List[Message] = [message]
+        message_id = uuid.uuid4()
+        logger.debug("message %s received: %s", message_id, message)
+        peak_depth = 1
+
+        # Fresh UoW (session/repositories) per message; nothing is shared across calls
+        with self.uow_factory() as uow:
+            uow.outbox_events = self.outbox_events
+            if type(message) in self.outbox_events:
+                # Published directly rather than raised by a command: store it on its own
+                uow.outbox.add(message)
+                uow.commit()
+            while queue:
+                peak_depth = max(peak_depth, len(queue))
+                message = queue.pop(0)
+                if isinstance(message, events.Event):
+                    self._handle_event(message, queue, message_id, uow)
+                elif isinstance(message, commands.Command):
+                    result = self._handle_command(message, queue, message_id, uow)
+                    results.append(result)
+                else:
+                    raise Exception(f"{message} was not an Event or Command")
+
+        self.metrics.queue_depth.observe(peak_depth)
+        return results
+
+    def _handle_event(self, event: events.Event, queue: List[Message], message_id, uow) -> None:
+        for handler in self.event_handlers.get(type(event), []):
+            started = time.perf_counter()
+            try:
+                logger.debug("message %s handling event %s with handler %s", message_id, event, handler)
+                handler(event, uow=uow)
+            except Exception:
+                self.metrics.handler("event", event, handler, started, failed=True)
+                logger.exception("message %s exception handling event %s", message_id, event)
+                # Discard the failed handler's writes so the next one starts on a usable session
+                uow.rollback()
+                continue
+            self.metrics.handler("event", event, handler, started)
+            queue.extend(self.metrics.collect(event, uow))
+
+    def _handle_command(self, command: commands.Command, queue: List[Message], message_id, uow):
+        logger.debug("message %s handling command %s", message_id, command)
+        handler = self.command_handlers.get(type(command))
+        if handler is None:
+            raise Exception(f"No handler for command type {type(command)}")
+        started = time.perf_counter()
+        try:
+            result = handler(command, uow=uow)
+        except Exception:
+            self.metrics.handler("command", command, handler, started, failed=True)
+            raise
+        self.metrics.handler("command", command, handler, started)
+        queue.extend(self.metrics.collect(command, uow))
+        return result
+
+
+class AsyncMessageBus:
+    """MessageBus for coroutine handlers; same per-message unit of work contract."""
+
+    def __init__(
+        self,
+        uow_factory: Callable[[], unit_of_work.AbstractAsyncUnitOfWork],
+        event_handlers: Dict[Type[events.Event], List[Callable]],
+        command_handlers: Dict[Type[commands.Command], Callable],
+        outbox_events: Iterable[Type[events.Event]] = (),
+        metrics: BusMetrics | None = None,
+    ) -> None:
+        self.uow_factory = uow_factory
+        self.event_handlers = event_handlers
+        self.command_handlers = command_handlers
+        self.outbox_events = frozenset(outbox_events)
+        self.metrics = metrics or BusMetrics()
+
+    async def handle(self, message: Message) -> List:
+        with timing.span("bus"):
+            return await self._handle(message)
+
+    async def _handle(self, message: Message) -> List:
         results = []
         queue: List[Message] = [message]
         message_id = uuid.uuid4()
         logger.debug("message %s received: %s", message_id, message)
+        peak_depth = 1
 
-        # Ensure UoW opens a session/repositories per message
-        with self.uow:
+        async with self.uow_factory() as uow:
+            uow.outbox_events = self.outbox_events
+            if type(message) in self.outbox_events:
+                await uow.outbox.add(message)
+                await uow.commit()
             while queue:
+                peak_depth = max(peak_depth, len(queue))
                 message = queue.pop(0)
                 if isinstance(message, events.Event):
-                    self._handle_event(message, queue, message_id)
+                    await self._handle_event(message, queue, message_id, uow)
                 elif isinstance(message, commands.Command):
-                    result = self._handle_command(message, queue, message_id)
+                    result = await self._handle_command(message, queue, message_id, uow)
                     results.append(result)
                 else:
                     raise Exception(f"{message} was not an Event or Command")
 
+        self.metrics.queue_depth.observe(peak_depth)
         return results
 
-    def _handle_event(self, event: events.Event, queue: List[Message], message_id) -> None:
+    async def _handle_event(self, event: events.Event, queue: List[Message], message_id, uow) -> None:
         for handler in self.event_handlers.get(type(event), []):
+            started = time.perf_counter()
             try:
                 logger.debug("message %s handling event %s with handler %s", message_id, event, handler)
-                handler(event)
-                queue.extend(self.uow.collect_new_events())
+                await handler(event, uow=uow)
             except Exception:
+                self.metrics.handler("event", event, handler, started, failed=True)
                 logger.exception("message %s exception handling event %s", message_id, event)
+                await uow.rollback()
                 continue
+            self.metrics.handler("event", event, handler, started)
+            queue.extend(self.metrics.collect(event, uow))
 
-    def _handle_command(self, command: commands.Command, queue: List[Message], message_id):
+    async def _handle_command(self, command: commands.Command, queue: List[Message], message_id, uow):
         logger.debug("message %s handling command %s", message_id, command)
         handler = self.command_handlers.get(type(command))
         if handler is None:
             raise Exception(f"No handler for command type {type(command)}")
-        result = handler(command)
-        queue.extend(self.uow.collect_new_events())
+        started = time.perf_counter()
+        try:
+            result = await handler(command, uow=uow)
+        except Exception:
+            self.metrics.handler("command", command, handler, started, failed=True)
+            raise
+        self.metrics.handler("command", command, handler, started)
+        queue.extend(self.metrics.collect(command, uow))
         return result
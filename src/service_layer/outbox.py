@@ -0,0 +1,136 @@
+"""
+Delivery side of the transactional outbox.
+
+Events with deferred handlers (bootstrap.OUTBOX_HANDLERS) are written to the `outbox` table by
+the commit of the command that raised them, so a request returns as soon as that commit does.
+OutboxDispatcher drains the table on a background thread: it leases a batch, runs each
+message's handlers with a fresh unit of work, deletes what was delivered and reschedules
+failures with exponential backoff.
+
+Delivery is at least once: a worker that dies between running the handlers and deleting the
+row redelivers it when the lease expires, so outbox handlers must tolerate duplicates. After
+`max_attempts` a message is left in the table (with its last error) as a dead letter.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from src.domain import events
+from src.service_layer import unit_of_work
+from src.service_layer.repository import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        uow_factory: Callable[[], unit_of_work.AbstractUnitOfWork],
+        handlers: Dict[Type[events.Event], List[Callable]],
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 10,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 300.0,
+    ) -> None:
+        self.uow_factory = uow_factory
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.delivered = 0
+        self.failed = 0
+        self.dead = 0
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Delivery ---
+
+    def run_once(self) -> int:
+        """Claim and deliver one batch; returns how many messages were claimed."""
+        with self.uow_factory() as uow:
+            messages = uow.outbox.claim(self.batch_size, self.lease_seconds, self.max_attempts)
+            uow.commit()
+
+        delivered = []
+        for message in messages:
+            try:
+                self._deliver(message)
+            except Exception as exc:
+                self._retry(message, exc)
+            else:
+                delivered.append(message.id)
+
+        if delivered:
+            with self.uow_factory() as uow:
+                uow.outbox.complete(delivered)
+                uow.commit()
+            self.delivered += len(delivered)
+        return len(messages)
+
+    def drain(self) -> int:
+        """Deliver until nothing is due; returns how many messages were claimed."""
+        total = 0
+        while claimed := self.run_once():
+            total += claimed
+        return total
+
+    def _deliver(self, message: OutboxMessage) -> None:
+        event = message.event()
+        for handler in self.handlers.get(type(event), []):
+            logger.debug("outbox message %s handling event %s with handler %s", message.id, event, handler)
+            with self.uow_factory() as uow:
+                handler(event, uow=uow)
+
+    def _retry(self, message: OutboxMessage, exc: Exception) -> None:
+        self.failed += 1
+        if message.attempts >= self.max_attempts:
+            self.dead += 1
+            logger.exception("outbox message %s gave up after %s attempts", message.id, message.attempts)
+        else:
+            logger.warning("outbox message %s failed (attempt %s): %r", message.id, message.attempts, exc)
+        delay = min(self.retry_base_seconds * 2 ** (message.attempts - 1), self.retry_max_seconds)
+        with self.uow_factory() as uow:
+            uow.outbox.retry(message.id, delay, repr(exc))
+            uow.commit()
+
+    # --- Background thread ---
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish the batch in hand and stop; undelivered messages stay in the outbox."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            # A full batch means more is probably due: go again without waiting
+            if claimed < self.batch_size:
+                self._stopping.wait(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dead": self.dead,
+        }
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, Optional, Set
+import dataclasses
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
-from src.domain.model import PostAggregate, UserAggregate
+from src.domain import events
+from src.domain.model import CommentAppend, LikeToggle, PostAggregate, UserAggregate
 
 
 class AbstractUserRepository(abc.ABC):
@@ -37,6 +39,18 @@ class AbstractUserRepository(abc.ABC):
             self.seen.add(user)
         return user
 
+    def delete(self, user_id: int) -> None:
+        """Remove the user and their user_stats row."""
+        self._delete(user_id)
+
+    def bump_stats(self, user_id: int, posts: int = 0, likes_received: int = 0) -> None:
+        """Apply deltas to the user_stats read model; a missing row is created from the source tables."""
+        self._bump_stats(user_id, posts, likes_received)
+
+    def reconcile_stats(self, user_id: Optional[int] = None) -> int:
+        """Recompute user_stats from posts/likes; returns how many rows were created or repaired."""
+        return self._reconcile_stats(user_id)
+
     @abc.abstractmethod
     def _add(self, user: UserAggregate) -> None: ...
 
@@ -55,10 +69,16 @@ class AbstractUserRepository(abc.ABC):
     @abc.abstractmethod
     def _save(self, user: UserAggregate) -> None: ...
 
+    @abc.abstractmethod
+    def _bump_stats(self, user_id: int, posts: int, likes_received: int) -> None: ...
+
+    @abc.abstractmethod
+    def _reconcile_stats(self, user_id: Optional[int] = None) -> int: ...
+
 
 class AbstractPostRepository(abc.ABC):
     def __init__(self) -> None:
-        self.seen: Set[PostAggregate] = set()
+        self.seen: Set[PostAggregate | LikeToggle | CommentAppend] = set()
         self.last_comment_id: int | None = None
 
     def add(self, post: PostAggregate) -> None:
@@ -75,6 +95,29 @@ class AbstractPostRepository(abc.ABC):
     def remove_like(self, post_id: int, user_id: int) -> None:
         self._remove_like(post_id, user_id)
 
+    def toggle_like(self, post_id: int, user_id: int) -> Optional[LikeToggle]:
+        """Flip (post_id, user_id) and return the new state; None if the post does not exist."""
+        toggle = self._toggle_like(post_id, user_id)
+        if toggle:
+            self.seen.add(toggle)
+        return toggle
+
+    def append_comment(self, post_id: int, user_id: int, body: str) -> Optional[CommentAppend]:
+        """Insert one comment without loading the thread; None if the post does not exist."""
+        appended = self._append_comment(post_id, user_id, body)
+        if appended:
+            self.last_comment_id = appended.comment.id
+            self.seen.add(appended)
+        return appended
+
+    def reconcile_counters(self, post_id: Optional[int] = None) -> int:
+        """Recompute denormalized like/comment counters; returns how many posts drifted."""
+        return self._reconcile_counters(post_id)
+
+    def index_for_search(self, post_id: int) -> None:
+        """Bring the full-text index entry for a post in line with its body."""
+        self._index_for_search(post_id)
+
     def get(self, post_id: int) -> Optional[PostAggregate]:
         post = self._get(post_id)
         if post:
@@ -111,3 +154,163 @@ class AbstractPostRepository(abc.ABC):
 
     @abc.abstractmethod
     def _remove_like(self, post_id: int, user_id: int) -> None: ...
+
+    @abc.abstractmethod
+    def _toggle_like(self, post_id: int, user_id: int) -> Optional[LikeToggle]: ...
+
+    @abc.abstractmethod
+    def _append_comment(self, post_id: int, user_id: int, body: str) -> Optional[CommentAppend]: ...
+
+    @abc.abstractmethod
+    def _reconcile_counters(self, post_id: Optional[int] = None) -> int: ...
+
+    @abc.abstractmethod
+    def _index_for_search(self, post_id: int) -> None: ...
+
+
+@dataclasses.dataclass(frozen=True)
+class OutboxMessage:
+    id: int
+    event_type: str
+    payload: Dict[str, Any]
+    # Including the delivery attempt this claim is for
+    attempts: int
+
+    def event(self) -> events.Event:
+        return getattr(events, self.event_type).from_dict(self.payload)
+
+
+class AbstractOutboxRepository(abc.ABC):
+    """Events stored with the command that raised them, for src.service_layer.outbox to deliver."""
+
+    def add(self, event: events.Event) -> None:
+        self._add(type(event).__name__, dataclasses.asdict(event))
+
+    def claim(self, limit: int, lease_seconds: float, max_attempts: int) -> List[OutboxMessage]:
+        """
+        Lease up to `limit` due messages, oldest first, and count the attempt. A message that is
+        neither completed nor retried within `lease_seconds` becomes due again.
+        """
+        return self._claim(limit, lease_seconds, max_attempts)
+
+    def complete(self, message_ids: List[int]) -> None:
+        """Delivered: drop the messages."""
+        self._complete(message_ids)
+
+    def retry(self, message_id: int, delay_seconds: float, error: str) -> None:
+        """Failed: make the message due again after `delay_seconds`."""
+        self._retry(message_id, delay_seconds, error)
+
+    @abc.abstractmethod
+    def _add(self, event_type: str, payload: Dict[str, Any]) -> None: ...
+
+    @abc.abstractmethod
+    def _claim(self, limit: int, lease_seconds: float, max_attempts: int) -> List[OutboxMessage]: ...
+
+    @abc.abstractmethod
+    def _complete(self, message_ids: List[int]) -> None: ...
+
+    @abc.abstractmethod
+    def _retry(self, message_id: int, delay_seconds: float, error: str) -> None: ...
+
+
+# --- Async repositories ---
+
+RunSync = Callable[..., Awaitable[Any]]
+
+
+async def _call_inline(fn: Callable[..., Any], *args: Any) -> Any:
+    return fn(*args)
+
+
+class AsyncUserRepository:
+    """
+    Awaitable view of a user repository. The query code stays in the sync repository;
+    `run` decides how each call is driven (AsyncSession.run_sync for SQLAlchemy, inline for fakes).
+    """
+
+    def __init__(self, repo: AbstractUserRepository, run: RunSync = _call_inline) -> None:
+        self._repo = repo
+        self._run = run
+
+    @property
+    def seen(self) -> Set[UserAggregate]:
+        return self._repo.seen
+
+    async def add(self, user: UserAggregate) -> None:
+        await self._run(self._repo.add, user)
+
+    async def save(self, user: UserAggregate) -> None:
+        await self._run(self._repo.save, user)
+
+    async def get(self, user_id: int) -> Optional[UserAggregate]:
+        return await self._run(self._repo.get, user_id)
+
+    async def get_by_email(self, email: str) -> Optional[UserAggregate]:
+        return await self._run(self._repo.get_by_email, email)
+
+    async def get_by_username(self, username: str) -> Optional[UserAggregate]:
+        return await self._run(self._repo.get_by_username, username)
+
+    async def delete(self, user_id: int) -> None:
+        await self._run(self._repo.delete, user_id)
+
+    async def bump_stats(self, user_id: int, posts: int = 0, likes_received: int = 0) -> None:
+        await self._run(self._repo.bump_stats, user_id, posts, likes_received)
+
+    async def reconcile_stats(self, user_id: Optional[int] = None) -> int:
+        return await self._run(self._repo.reconcile_stats, user_id)
+
+
+class AsyncPostRepository:
+    """Awaitable view of a post repository; see AsyncUserRepository."""
+
+    def __init__(self, repo: AbstractPostRepository, run: RunSync = _call_inline) -> None:
+        self._repo = repo
+        self._run = run
+
+    @property
+    def seen(self) -> Set[PostAggregate | LikeToggle | CommentAppend]:
+        return self._repo.seen
+
+    @property
+    def last_comment_id(self) -> int | None:
+        return self._repo.last_comment_id
+
+    async def add(self, post: PostAggregate) -> None:
+        await self._run(self._repo.add, post)
+
+    async def save(self, post: PostAggregate) -> None:
+        await self._run(self._repo.save, post)
+
+    async def get(self, post_id: int) -> Optional[PostAggregate]:
+        return await self._run(self._repo.get, post_id)
+
+    async def list_by_user(self, user_id: int) -> List[PostAggregate]:
+        return await self._run(self._repo.list_by_user, user_id)
+
+    async def list_all(self, sort: Optional[str] = None) -> List[PostAggregate]:
+        return await self._run(self._repo.list_all, sort)
+
+    async def toggle_like(self, post_id: int, user_id: int) -> Optional[LikeToggle]:
+        return await self._run(self._repo.toggle_like, post_id, user_id)
+
+    async def append_comment(self, post_id: int, user_id: int, body: str) -> Optional[CommentAppend]:
+        return await self._run(self._repo.append_comment, post_id, user_id, body)
+
+    async def reconcile_counters(self, post_id: Optional[int] = None) -> int:
+        return await self._run(self._repo.reconcile_counters, post_id)
+
+    async def index_for_search(self, post_id: int) -> None:
+        await self._run(self._repo.index_for_search, post_id)
+
+
+class AsyncOutboxRepository:
+    """Awaitable view of an outbox repository; see AsyncUserRepository."""
+
+    def __init__(self, repo: AbstractOutboxRepository, run: RunSync = _call_inline) -> None:
+        self._repo = repo
+        self._run = run
+
+    async def add(self, event: events.Event) -> None:
+        await self._run(self._repo.add, event)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import abc
-from typing import Iterable, Iterator, List
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Type
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session, sessionmaker
 
-from src.db import metadata, SessionLocal
+from src.db import AsyncSessionLocal, SessionLocal
+from src import migrations
+from src.domain import events as domain_events
 from src.service_layer import repository
 from src.adapters import repository as sql_repo
 
@@ -13,27 +16,29 @@ from src.adapters import repository as sql_repo
 class AbstractUnitOfWork(abc.ABC):
     users: repository.AbstractUserRepository
     posts: repository.AbstractPostRepository
+    outbox: repository.AbstractOutboxRepository
+    # Event types with deferred handlers, set by the message bus: commit() writes them to the outbox
+    outbox_events: FrozenSet[Type[domain_events.Event]] = frozenset()
+    _outboxed: Optional[Dict[int, domain_events.Event]] = None
 
     def __enter__(self) -> "AbstractUnitOfWork":
+        self._outboxed = {}
         return self
 
     def __exit__(self, *args) -> None:
         self.rollback()
 
     def collect_new_events(self) -> List:
-        events = []
-        for repo in (getattr(self, "users", None), getattr(self, "posts", None)):
-            if repo is None:
-                continue
-            for agg in repo.seen:
-                events.extend(getattr(agg, "events", []))
-                # clear events after collection
-                if hasattr(agg, "events"):
-                    agg.events.clear()  # type: ignore[attr-defined]
-        return events
+        return _collect_new_events(self)
 
-    @abc.abstractmethod
     def commit(self) -> None:
+        # Same transaction as the changes that raised the events
+        for event in _new_outbox_events(self):
+            self.outbox.add(event)
+        self._commit()
+
+    @abc.abstractmethod
+    def _commit(self) -> None:
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -55,6 +60,7 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         self._ensure_schema()
         self.users = sql_repo.SqlAlchemyUserRepository(self.session)
         self.posts = sql_repo.SqlAlchemyPostRepository(self.session)
+        self.outbox = sql_repo.SqlAlchemyOutboxRepository(self.session)
         return super().__enter__()
 
     def __exit__(self, *args) -> None:
@@ -62,7 +68,7 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         if self.session:
             self.session.close()
 
-    def commit(self) -> None:
+    def _commit(self) -> None:
         if self.session:
             self.session.commit()
             self._committed = True
@@ -73,14 +79,83 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
 
     def _ensure_schema(self) -> None:
         """
-        Guarantee tables exist for the configured database (helpful for SQLite dev/test).
-        Runs once per process.
+        Guarantee the schema is migrated for the configured database (helpful for SQLite dev/test).
+        Runs once per process; a no-op beyond one ledger read when nothing is pending.
         """
         if self.__class__._schema_initialized:
             return
         if self.session is None:
             return
-        metadata.create_all(bind=self.session.bind)
+        migrations.migrate(self.session.bind)
+        self.__class__._schema_initialized = True
+
+
+class AbstractAsyncUnitOfWork(abc.ABC):
+    users: repository.AsyncUserRepository
+    posts: repository.AsyncPostRepository
+    outbox: repository.AsyncOutboxRepository
+    outbox_events: FrozenSet[Type[domain_events.Event]] = frozenset()
+    _outboxed: Optional[Dict[int, domain_events.Event]] = None
+
+    async def __aenter__(self) -> "AbstractAsyncUnitOfWork":
+        self._outboxed = {}
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.rollback()
+
+    def collect_new_events(self) -> List:
+        return _collect_new_events(self)
+
+    async def commit(self) -> None:
+        for event in _new_outbox_events(self):
+            await self.outbox.add(event)
+        await self._commit()
+
+    @abc.abstractmethod
+    async def _commit(self) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def rollback(self) -> None:
+        raise NotImplementedError
+
+
+class AsyncSqlAlchemyUnitOfWork(AbstractAsyncUnitOfWork):
+    _schema_initialized = False
+
+    def __init__(self, session_factory: async_sessionmaker | None = None) -> None:
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.session: AsyncSession | None = None
+        self._committed = False
+
+    async def __aenter__(self) -> "AsyncSqlAlchemyUnitOfWork":
+        self.session = self.session_factory()
+        await self._ensure_schema()
+        self.users = sql_repo.AsyncSqlAlchemyUserRepository(self.session)
+        self.posts = sql_repo.AsyncSqlAlchemyPostRepository(self.session)
+        self.outbox = sql_repo.AsyncSqlAlchemyOutboxRepository(self.session)
+        return await super().__aenter__()
+
+    async def __aexit__(self, *args) -> None:
+        await super().__aexit__(*args)
+        if self.session:
+            await self.session.close()
+
+    async def _commit(self) -> None:
+        if self.session:
+            await self.session.commit()
+            self._committed = True
+
+    async def rollback(self) -> None:
+        if self.session:
+            await self.session.rollback()
+
+    async def _ensure_schema(self) -> None:
+        """Same once-per-process migration check as SqlAlchemyUnitOfWork, over the async driver."""
+        if self.__class__._schema_initialized or self.session is None:
+            return
+        await self.session.run_sync(lambda session: migrations.migrate(session.get_bind()))
         self.__class__._schema_initialized = True
 
 
@@ -89,9 +164,12 @@ class FakeUnitOfWork(AbstractUnitOfWork):
         self,
         users_repo: repository.AbstractUserRepository,
         posts_repo: repository.AbstractPostRepository,
+        outbox_repo: repository.AbstractOutboxRepository | None = None,
     ) -> None:
         self.users = users_repo
         self.posts = posts_repo
+        if outbox_repo is not None:
+            self.outbox = outbox_repo
         self.committed = False
 
     def __enter__(self) -> "FakeUnitOfWork":
@@ -100,8 +178,60 @@ class FakeUnitOfWork(AbstractUnitOfWork):
     def __exit__(self, *args) -> None:
         return super().__exit__(*args)
 
-    def commit(self) -> None:
+    def _commit(self) -> None:
         self.committed = True
 
     def rollback(self) -> None:
         self.committed = False
+
+
+class FakeAsyncUnitOfWork(AbstractAsyncUnitOfWork):
+    def __init__(
+        self,
+        users_repo: repository.AbstractUserRepository,
+        posts_repo: repository.AbstractPostRepository,
+        outbox_repo: repository.AbstractOutboxRepository | None = None,
+    ) -> None:
+        self.users = repository.AsyncUserRepository(users_repo)
+        self.posts = repository.AsyncPostRepository(posts_repo)
+        if outbox_repo is not None:
+            self.outbox = repository.AsyncOutboxRepository(outbox_repo)
+        self.committed = False
+
+    async def _commit(self) -> None:
+        self.committed = True
+
+    async def rollback(self) -> None:
+        self.committed = False
+
+
+def _collect_new_events(uow) -> List:
+    events = []
+    for repo in (getattr(uow, "users", None), getattr(uow, "posts", None)):
+        if repo is None:
+            continue
+        for agg in repo.seen:
+            events.extend(getattr(agg, "events", []))
+            # clear events after collection
+            if hasattr(agg, "events"):
+                agg.events.clear()  # type: ignore[attr-defined]
+    return events
+
+
+
+def _new_outbox_events(uow) -> List[domain_events.Event]:
+    """Events on seen aggregates that have outbox handlers and were not written by an earlier commit."""
+    if not uow.outbox_events:
+        return []
+    if uow._outboxed is None:
+        uow._outboxed = {}
+    pending = []
+    for repo in (getattr(uow, "users", None), getattr(uow, "posts", None)):
+        if repo is None:
+            continue
+        for agg in repo.seen:
+            for event in getattr(agg, "events", []):
+                if type(event) in uow.outbox_events and id(event) not in uow._outboxed:
+                    uow._outboxed[id(event)] = event
+                    pending.append(event)
+    return pending
@@ -2,6 +2,7 @@ import pytest
 from jose import jwt
 
 from src import security
+from src.db import SessionLocal, user_table
 
 def test_access_token_expire_minutes():
     assert security.access_token_expire_minutes() == 30
@@ -110,3 +111,59 @@ async def test_get_current_user_wrong_token_type(registered_user: dict):
 
     with pytest.raises(security.HTTPException):
         await security.get_current_user(token)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("db")
+async def test_get_current_user_caches_principal_until_invalidated(registered_user: dict, monkeypatch):
+    lookups = []
+    original = security.get_user_by_email
+
+    async def counting_lookup(email: str):
+        lookups.append(email)
+        return await original(email)
+
+    monkeypatch.setattr(security, "get_user_by_email", counting_lookup)
+    token = security.create_access_token(registered_user["email"])
+
+    first = await security.get_current_user(token)
+    second = await security.get_current_user(token)
+    assert first is second
+    assert len(lookups) == 1
+
+    security.invalidate_principal(registered_user["id"])
+    await security.get_current_user(token)
+    assert len(lookups) == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("db")
+async def test_get_current_user_builds_principal_from_claims(registered_user: dict, monkeypatch):
+    async def no_lookup(email: str):
+        raise AssertionError("claims-bearing tokens must not query users")
+
+    monkeypatch.setattr(security, "get_user_by_email", no_lookup)
+    token = security.create_access_token(
+        registered_user["email"], user_id=registered_user["id"], username="test", token_version=0
+    )
+
+    user = await security.get_current_user(token)
+
+    assert user == security.Principal(id=registered_user["id"], email=registered_user["email"], username="test")
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("db")
+async def test_get_current_user_rejects_outdated_token_version(registered_user: dict):
+    token = security.create_access_token(registered_user["email"], user_id=registered_user["id"], token_version=0)
+    await security.get_current_user(token)
+    with SessionLocal() as session:
+        session.execute(
+            user_table.update().where(user_table.c.id == registered_user["id"]).values(token_version=1)
+        )
+        session.commit()
+    security.invalidate_principal(registered_user["id"])
+
+    with pytest.raises(security.HTTPException) as exc_info:
+        await security.get_current_user(token)
+    assert exc_info.value.detail == "Token has been revoked"
@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from typing import AsyncGenerator, Generator
 import os
 
@@ -9,16 +10,29 @@ import os
 import pytest
 from fastapi.testclient import TestClient
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
 
 from src import security
-from src.db import SessionLocal, user_table, post_table, comment_table, likes_table
+from src.adapters.repository import SqlAlchemyPostRepository, SqlAlchemyUserRepository
+from src.db import SessionLocal, engine, metadata, user_table, post_table, comment_table, likes_table, outbox_table, user_stats_table
+from src.domain import model
 from src.main import app
+from src.adapters import query_stats, search
+from src.migrations import migrate
+from src.views import cache as view_cache
+from src.views import hot
 #from src.routers.post import comment_table, post_table
 
 @pytest.fixture(scope="session")
 def anyio_backend():
     return "asyncio"
 
+@pytest.fixture(scope="session", autouse=True)
+def migrated_schema():
+    """The app migrates in its lifespan, which the ASGI test transport does not run."""
+    migrate(engine)
+
 @pytest.fixture()
 def client() -> Generator:
    yield TestClient(app)
@@ -36,9 +50,17 @@ async def db(request) -> AsyncGenerator:
     with SessionLocal() as session:
         session.execute(likes_table.delete())
         session.execute(comment_table.delete())
+        search.clear(session.connection())
         session.execute(post_table.delete())
+        session.execute(user_stats_table.delete())
         session.execute(user_table.delete())
+        session.execute(outbox_table.delete())
         session.commit()
+    # Cached rows would outlive the users deleted above
+    security.principal_cache.clear()
+    security.token_versions.clear()
+    view_cache.view_cache.clear()
+    hot.reset()
     yield
 
 @pytest.fixture()
@@ -127,6 +149,72 @@ async def logged_in_token(async_client: AsyncClient, confirmed_user: dict) -> st
 
     return response.json()["access_token"]
 
+@pytest.fixture()
+def assert_max_queries():
+    """
+    Fail when the block runs more SQL statements than allowed:
+
+        with assert_max_queries(3):
+            await async_client.get("/api/posts")
+    """
+
+    @contextmanager
+    def check(limit: int):
+        with query_stats.track() as stats:
+            yield stats
+        assert stats.count <= limit, f"expected at most {limit} queries, got {stats.describe()}"
+
+    return check
+
+@pytest.fixture
+def session():
+    """A sync session on a fresh in-memory SQLite database, for repository tests."""
+    engine = create_engine("sqlite:///:memory:", future=True)
+    metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    try:
+        with Session() as sess:
+            yield sess
+    finally:
+        metadata.drop_all(engine)
+
+@pytest.fixture
+def alice_id(session) -> int:
+    """Id of a committed user `alice` in `session`."""
+    user = model.UserAggregate(user=model.User(id=None, email="a@example.com", username="alice"))
+    SqlAlchemyUserRepository(session).add(user)
+    session.commit()
+    return user.user.id
+
+@pytest.fixture
+def alice_post(session, alice_id: int) -> model.PostAggregate:
+    """A committed post by `alice` in `session`."""
+    post = model.PostAggregate(id=None, user_id=alice_id, username="alice", body="hi")
+    SqlAlchemyPostRepository(session).add(post)
+    session.commit()
+    return post
+
+@pytest.fixture
+def captured_statements(session):
+    """
+    Collect the SQL statements `session` sends to its database inside the block:
+
+        with captured_statements() as statements:
+            repo.list_all()
+    """
+
+    @contextmanager
+    def capture():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(session.bind, "before_cursor_execute", listener)
+        try:
+            yield statements
+        finally:
+            event.remove(session.bind, "before_cursor_execute", listener)
+
+    return capture
+
 #@pytest.fixture(autouse=True)
 #def mock_httpx_client(mocker):
 #    mocked_client = mocker.patch("src.tasks.httpx.AsyncClient")
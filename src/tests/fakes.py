@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import Dict, Iterable, Optional, Set
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from src.domain.model import Comment, Like, PostAggregate, User, UserAggregate
+from src.domain.model import Comment, CommentAppend, Like, LikeToggle, PostAggregate, User, UserAggregate
 from src.service_layer import repository
 
 
@@ -12,6 +13,8 @@ class FakeUserRepository(repository.AbstractUserRepository):
         super().__init__()
         self._users: Dict[int, UserAggregate] = {}
         self._next_id = 1
+        # user_id -> (posts_count, likes_received)
+        self.stats: Dict[int, Tuple[int, int]] = {}
         if users:
             for u in users:
                 self._users[u.user.id] = u
@@ -19,13 +22,8 @@ class FakeUserRepository(repository.AbstractUserRepository):
 
     def _add(self, user: UserAggregate) -> None:
         if user.user.id is None or user.user.id == 0:
-            user = UserAggregate(
-                user=User(id=self._next_id, email=user.user.email, username=user.user.username),
-                bio=user.bio,
-                location=user.location,
-                avatar_url=user.avatar_url,
-                password_hash=user.password_hash,
-            )
+            # Assign the id on the aggregate, as SqlAlchemyUserRepository does
+            user.user = User(id=self._next_id, email=user.user.email, username=user.user.username)
             self._next_id += 1
         self._users[user.user.id] = user
 
@@ -47,6 +45,13 @@ class FakeUserRepository(repository.AbstractUserRepository):
             return
         self._users[user.user.id] = user
 
+    def _bump_stats(self, user_id: int, posts: int, likes_received: int) -> None:
+        current = self.stats.get(user_id, (0, 0))
+        self.stats[user_id] = (current[0] + posts, current[1] + likes_received)
+
+    def _reconcile_stats(self, user_id: Optional[int] = None) -> int:
+        return 0
+
 
 class FakePostRepository(repository.AbstractPostRepository):
     def __init__(self, posts: Iterable[PostAggregate] | None = None) -> None:
@@ -54,6 +59,7 @@ class FakePostRepository(repository.AbstractPostRepository):
         self._posts: Dict[int, PostAggregate] = {}
         self._posts_by_user: Dict[int, Set[int]] = defaultdict(set)
         self._next_id = 1
+        self.indexed: Set[int] = set()
         if posts:
             for p in posts:
                 self._posts[p.id] = p
@@ -114,3 +120,71 @@ class FakePostRepository(repository.AbstractPostRepository):
         target = Like(post_id=post_id, user_id=user_id)
         if target in post.likes:
             post.likes.remove(target)
+
+    def _toggle_like(self, post_id: int, user_id: int) -> Optional[LikeToggle]:
+        post = self._posts.get(post_id)
+        if not post:
+            return None
+        liked = post.toggle_like(user_id) is not None
+        return LikeToggle(
+            post_id=post_id,
+            user_id=user_id,
+            author_id=post.user_id,
+            liked=liked,
+            like_count=len(post.likes),
+            delta=1 if liked else -1,
+        )
+
+    def _append_comment(self, post_id: int, user_id: int, body: str) -> Optional[CommentAppend]:
+        post = self._posts.get(post_id)
+        if not post:
+            return None
+        comment = Comment(
+            id=self._next_id,
+            post_id=post_id,
+            user_id=user_id,
+            body=body,
+            created_at=datetime.now(timezone.utc),
+        )
+        self._next_id += 1
+        post.comments.add(comment)
+        return CommentAppend(comment=comment, author_id=post.user_id, comment_count=len(post.comments))
+
+    def _reconcile_counters(self, post_id: Optional[int] = None) -> int:
+        # Counts are derived from the aggregate's sets, so they can never drift
+        return 0
+
+    def _index_for_search(self, post_id: int) -> None:
+        self.indexed.add(post_id)
+
+
+class FakeOutboxRepository(repository.AbstractOutboxRepository):
+    def __init__(self) -> None:
+        # id -> [event_type, payload, attempts, available_at, last_error]
+        self.messages: Dict[int, List[Any]] = {}
+        self._next_id = 1
+
+    def _add(self, event_type: str, payload: Dict[str, Any]) -> None:
+        self.messages[self._next_id] = [event_type, payload, 0, datetime.now(timezone.utc), None]
+        self._next_id += 1
+
+    def _claim(self, limit: int, lease_seconds: float, max_attempts: int) -> List[repository.OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        claimed = []
+        for message_id, message in sorted(self.messages.items()):
+            if len(claimed) == limit:
+                break
+            if message[3] <= now and message[2] < max_attempts:
+                message[2] += 1
+                message[3] = now + timedelta(seconds=lease_seconds)
+                claimed.append(repository.OutboxMessage(message_id, message[0], message[1], message[2]))
+        return claimed
+
+    def _complete(self, message_ids: List[int]) -> None:
+        for message_id in message_ids:
+            self.messages.pop(message_id, None)
+
+    def _retry(self, message_id: int, delay_seconds: float, error: str) -> None:
+        message = self.messages[message_id]
+        message[3] = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        message[4] = error
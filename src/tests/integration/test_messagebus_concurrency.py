@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from anyio import to_thread
+from sqlalchemy import select
+
+from src.adapters.notifications import FakeNotifier
+from src.adapters.storage import FakeFileStorage
+from src.bootstrap import bootstrap
+from src.db import SessionLocal, comment_table, post_table, user_stats_table, user_table
+from src.domain import commands, events
+from src.service_layer.messagebus import MessageBus
+from src.service_layer.unit_of_work import SqlAlchemyUnitOfWork
+
+pytestmark = pytest.mark.usefixtures("db")
+
+COMMENTS = 300
+LIKERS = 150
+WORKERS = 8
+
+
+@pytest.mark.anyio
+async def test_bus_handles_hundreds_of_concurrent_commands():
+    bus = bootstrap(notifier=FakeNotifier(), file_storage=FakeFileStorage())
+    with SessionLocal() as session:
+        user_id = session.execute(
+            user_table.insert().values(email="a@example.com", username="alice").returning(user_table.c.id)
+        ).scalar_one()
+        post_id = session.execute(
+            post_table.insert().values(user_id=user_id, username="alice", body="hi").returning(post_table.c.id)
+        ).scalar_one()
+        session.commit()
+
+    cmds = [
+        commands.AddComment(post_id=post_id, comment_id=0, user_id=user_id, body=f"comment {i}")
+        for i in range(COMMENTS)
+    ] + [commands.ToggleLike(post_id=post_id, user_id=10_000 + i) for i in range(LIKERS)]
+
+    def fire_all():
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            return list(pool.map(lambda cmd: bus.handle(cmd)[0], cmds))
+
+    results = await to_thread.run_sync(fire_all)
+
+    comments, likes = results[:COMMENTS], results[COMMENTS:]
+    assert len({c.id for c in comments}) == COMMENTS
+    assert [c.body for c in comments] == [cmd.body for cmd in cmds[:COMMENTS]]
+    assert all(likes)
+    with SessionLocal() as session:
+        row = session.execute(
+            select(post_table.c.like_count, post_table.c.comment_count).where(post_table.c.id == post_id)
+        ).one()
+        stored = session.execute(select(comment_table.c.id).where(comment_table.c.post_id == post_id)).all()
+    assert tuple(row) == (LIKERS, COMMENTS)
+    assert len(stored) == COMMENTS
+    assert bus.handle(commands.ReconcilePostCounters(post_id=post_id)) == [0]
+
+
+@pytest.mark.anyio
+async def test_failed_event_handler_writes_are_rolled_back():
+    with SessionLocal() as session:
+        user_id = session.execute(
+            user_table.insert().values(email="a@example.com", username="alice").returning(user_table.c.id)
+        ).scalar_one()
+        session.execute(user_stats_table.insert().values(user_id=user_id))
+        session.commit()
+
+    def fail_halfway(event, uow):
+        uow.users.bump_stats(event.user_id, likes_received=100)
+        raise RuntimeError("boom")
+
+    def count_post(event, uow):
+        uow.users.bump_stats(event.user_id, posts=1)
+        uow.commit()
+
+    bus = MessageBus(
+        uow_factory=SqlAlchemyUnitOfWork,
+        event_handlers={events.PostCreated: [fail_halfway, count_post]},
+        command_handlers={},
+    )
+
+    await to_thread.run_sync(bus.handle, events.PostCreated(post_id=1, user_id=user_id, username="alice"))
+
+    with SessionLocal() as session:
+        stats = session.execute(
+            select(user_stats_table.c.posts_count, user_stats_table.c.likes_received).where(
+                user_stats_table.c.user_id == user_id
+            )
+        ).one()
+    # Only the second handler's write is committed
+    assert tuple(stats) == (1, 0)
@@ -0,0 +1,80 @@
+import pytest
+import sqlalchemy
+from sqlalchemy import create_engine, event, text
+
+from src import migrations
+from src.db import post_table, schema_migrations_table, user_table
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:", future=True)
+    yield engine
+    engine.dispose()
+
+
+def _index_names(engine, table: str) -> set:
+    return {idx["name"] for idx in sqlalchemy.inspect(engine).get_indexes(table)}
+
+
+@pytest.mark.no_db
+def test_migrate_fresh_database_then_noop(engine):
+    applied = migrations.migrate(engine)
+
+    assert [m.version for m in applied] == [m.version for m in migrations.MIGRATIONS]
+    assert {"ix_posts_user_id_id", "ix_posts_created_at", "ix_posts_like_count_id"} <= _index_names(engine, "posts")
+    assert "ix_comments_post_id_id" in _index_names(engine, "comments")
+    assert "ix_likes_user_id" in _index_names(engine, "likes")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    assert migrations.migrate(engine) == []
+    assert statements and all(not s.lstrip().upper().startswith(("CREATE", "ALTER", "UPDATE", "INSERT")) for s in statements)
+
+
+def _create_legacy_schema(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR UNIQUE, email VARCHAR UNIQUE, password VARCHAR, confirmed BOOLEAN)"))
+        conn.execute(text("CREATE TABLE posts (id INTEGER PRIMARY KEY, body VARCHAR, user_id INTEGER NOT NULL, username VARCHAR, image_url VARCHAR)"))
+        conn.execute(text("CREATE TABLE likes (id INTEGER PRIMARY KEY, post_id INTEGER NOT NULL, user_id INTEGER NOT NULL)"))
+        conn.execute(text("CREATE TABLE comments (id INTEGER PRIMARY KEY, body VARCHAR, post_id INTEGER NOT NULL, user_id INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO users (id, username, email, password, confirmed) VALUES (1, 'alice', 'a@example.com', 'pw', 0)"))
+        conn.execute(text("INSERT INTO posts (id, body, user_id, username) VALUES (1, 'hi', 1, 'alice')"))
+        conn.execute(text("INSERT INTO likes (post_id, user_id) VALUES (1, 1)"))
+
+
+@pytest.mark.no_db
+def test_migrate_upgrades_legacy_database(engine):
+    _create_legacy_schema(engine)
+
+    migrations.migrate(engine)
+
+    with engine.connect() as conn:
+        post = conn.execute(sqlalchemy.select(post_table.c.like_count, post_table.c.comment_count)).one()
+        confirmed = conn.execute(sqlalchemy.select(user_table.c.confirmed)).scalar_one()
+        ledger = conn.execute(sqlalchemy.select(schema_migrations_table.c.version)).scalars().all()
+    assert tuple(post) == (1, 0)
+    assert confirmed is True
+    assert sorted(ledger) == [m.version for m in migrations.MIGRATIONS]
+    assert "uq_likes_post_user" in _index_names(engine, "likes")
+    assert "ix_posts_user_id_id" in _index_names(engine, "posts")
+
+
+@pytest.mark.no_db
+def test_migrations_only_add_their_own_columns(engine):
+    _create_legacy_schema(engine)
+    with engine.begin() as conn:
+        schema_migrations_table.create(conn)
+
+    for migration in migrations.MIGRATIONS:
+        if migration.name == "users_token_version":
+            break
+        migrations._apply(engine, migration)
+    columns = {col["name"] for col in sqlalchemy.inspect(engine).get_columns("users")}
+    assert {"bio", "created_at"} <= columns
+    assert "token_version" not in columns
+
+    migrations.migrate(engine)
+    with engine.connect() as conn:
+        assert conn.execute(sqlalchemy.select(user_table.c.token_version)).scalar_one() == 0
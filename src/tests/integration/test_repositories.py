@@ -1,22 +1,8 @@
-import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, select
 
-from src.adapters.repository import SqlAlchemyUserRepository, SqlAlchemyPostRepository
-from src.db import metadata, user_table
-from src.domain import model
-
-
-@pytest.fixture
-def session():
-    engine = create_engine("sqlite:///:memory:", future=True)
-    metadata.create_all(engine)
-    Session = sessionmaker(bind=engine, expire_on_commit=False)
-    try:
-        with Session() as sess:
-            yield sess
-    finally:
-        metadata.drop_all(engine)
+from src.adapters.repository import SqlAlchemyOutboxRepository, SqlAlchemyUserRepository, SqlAlchemyPostRepository
+from src.db import comment_table, likes_table, outbox_table, post_table, user_stats_table
+from src.domain import events, model
 
 
 def test_user_repository_roundtrip(session):
@@ -31,19 +17,8 @@ def test_user_repository_roundtrip(session):
     assert fetched.user.email == "a@example.com"
 
 
-def test_post_repository_roundtrip(session):
-    user_repo = SqlAlchemyUserRepository(session)
-    user_agg = model.UserAggregate(user=model.User(id=None, email="a@example.com", username="alice"))
-    user_repo.add(user_agg)
-    session.commit()
-    user_id = session.execute(user_table.select()).mappings().first()["id"]
-
-    repo = SqlAlchemyPostRepository(session)
-    post = model.PostAggregate(id=None, user_id=user_id, username="alice", body="hi")
-    repo.add(post)
-    session.commit()
-
-    fetched = repo.get(post.id)
+def test_post_repository_roundtrip(session, alice_post):
+    fetched = SqlAlchemyPostRepository(session).get(alice_post.id)
     assert fetched is not None
     assert fetched.body == "hi"
 
@@ -78,18 +53,13 @@ def test_user_repository_update_and_delete(session):
     assert repo.get(created_id) is None
 
 
-def test_post_repository_comments_likes_and_listing(session):
-    user_repo = SqlAlchemyUserRepository(session)
-    user_repo.add(model.UserAggregate(user=model.User(id=None, email="a@example.com", username="alice")))
-    user_repo.add(model.UserAggregate(user=model.User(id=None, email="b@example.com", username="bob")))
+def test_post_repository_comments_likes_and_listing(session, alice_id, alice_post):
+    bob = model.UserAggregate(user=model.User(id=None, email="b@example.com", username="bob"))
+    SqlAlchemyUserRepository(session).add(bob)
     session.commit()
-    users = session.execute(user_table.select()).mappings().all()
-    user_a, user_b = users[0]["id"], users[1]["id"]
+    user_a, user_b, post = alice_id, bob.user.id, alice_post
 
     post_repo = SqlAlchemyPostRepository(session)
-    post = model.PostAggregate(id=None, user_id=user_a, username="alice", body="hi")
-    post_repo.add(post)
-    session.commit()
 
     post.add_comment(comment_id=None, user_id=user_b, body="welcome!")
     post_repo.save(post)
@@ -111,3 +81,162 @@ def test_post_repository_comments_likes_and_listing(session):
 
     all_posts = list(post_repo.list_all())
     assert any(p.id == post.id for p in all_posts)
+
+
+def test_post_repository_maintains_and_reconciles_counters(session, alice_id, alice_post):
+    user_id, post = alice_id, alice_post
+    post_repo = SqlAlchemyPostRepository(session)
+    post.add_comment(comment_id=None, user_id=user_id, body="first")
+    post_repo.save(post)
+    post_repo.add_like(post.id, user_id)
+    session.commit()
+
+    def counters():
+        row = session.execute(
+            select(post_table.c.like_count, post_table.c.comment_count).where(post_table.c.id == post.id)
+        ).one()
+        return tuple(row)
+
+    assert counters() == (1, 1)
+
+    post_repo.remove_like(post.id, user_id)
+    post_repo.remove_like(post.id, user_id)  # no-op: must not go negative
+    session.commit()
+    assert counters() == (0, 1)
+
+    # Simulate drift from a write that bypassed the repository
+    session.execute(post_table.update().values(like_count=7, comment_count=0))
+    session.commit()
+    assert post_repo.reconcile_counters() == 1
+    session.commit()
+    assert counters() == (0, 1)
+    assert post_repo.reconcile_counters() == 0
+
+
+def test_user_repository_maintains_and_reconciles_stats(session, alice_id, alice_post):
+    user_id = alice_id
+    user_repo = SqlAlchemyUserRepository(session)
+    SqlAlchemyPostRepository(session).toggle_like(alice_post.id, 42)
+    session.commit()
+
+    def stats():
+        row = session.execute(
+            select(user_stats_table.c.posts_count, user_stats_table.c.likes_received).where(
+                user_stats_table.c.user_id == user_id
+            )
+        ).one_or_none()
+        return tuple(row) if row else None
+
+    assert stats() is None
+    # The first bump seeds the row from the source tables, which already hold this write
+    user_repo.bump_stats(user_id, likes_received=1)
+    assert stats() == (1, 1)
+    user_repo.bump_stats(user_id, posts=1)
+    assert stats() == (2, 1)
+
+    assert user_repo.reconcile_stats() == 1
+    assert stats() == (1, 1)
+    assert user_repo.reconcile_stats(user_id) == 0
+
+
+def test_post_repository_list_all_hydrates_in_constant_queries(session, alice_id, captured_statements):
+    user_id = alice_id
+
+    session.execute(
+        post_table.insert(),
+        [{"user_id": user_id, "username": "alice", "body": f"post {i}"} for i in range(1000)],
+    )
+    post_ids = session.execute(select(post_table.c.id)).scalars().all()
+    session.execute(
+        comment_table.insert(),
+        [{"post_id": pid, "user_id": user_id, "body": "c"} for pid in post_ids[::2]],
+    )
+    session.execute(
+        likes_table.insert(),
+        [{"post_id": pid, "user_id": user_id} for pid in post_ids[::3]],
+    )
+    session.commit()
+
+    with captured_statements() as statements:
+        posts = list(SqlAlchemyPostRepository(session).list_all())
+
+    # posts + comments + likes, independent of the number of posts
+    assert len(statements) == 3
+    assert len(posts) == 1000
+    assert sum(len(p.comments) for p in posts) == 500
+    assert sum(len(p.likes) for p in posts) == 334
+
+
+def test_post_repository_toggle_like_without_hydrating(session, alice_id, alice_post, captured_statements):
+    user_id, post = alice_id, alice_post
+    post_repo = SqlAlchemyPostRepository(session)
+
+    with captured_statements() as statements:
+        liked = post_repo.toggle_like(post.id, user_id)
+        unliked = post_repo.toggle_like(post.id, user_id)
+    session.commit()
+
+    assert (liked.liked, liked.like_count, liked.delta, liked.author_id) == (True, 1, 1, user_id)
+    assert (unliked.liked, unliked.like_count, unliked.delta) == (False, 0, -1)
+    assert not any("FROM comments" in s for s in statements)
+    assert {liked, unliked} <= post_repo.seen
+    assert post_repo.toggle_like(post.id + 1, user_id) is None
+
+
+def test_post_repository_appends_comment_without_reading_thread(session, alice_id, alice_post, captured_statements):
+    user_id, post = alice_id, alice_post
+    post_repo = SqlAlchemyPostRepository(session)
+
+    with captured_statements() as statements:
+        appended = post_repo.append_comment(post.id, user_id, "first")
+    session.commit()
+
+    assert len(statements) == 2
+    assert not any(s.lstrip().startswith("SELECT") for s in statements)
+    assert appended.comment.username == "alice"
+    assert appended.comment.created_at is not None
+    assert (appended.author_id, appended.comment_count) == (user_id, 1)
+    assert post_repo.last_comment_id == appended.comment.id
+    assert appended in post_repo.seen
+    stored = session.execute(select(comment_table)).mappings().one()
+    assert stored["username"] == "alice"
+    assert post_repo.append_comment(post.id + 1, user_id, "orphan") is None
+    assert session.execute(select(func.count()).select_from(comment_table)).scalar_one() == 1
+
+
+def test_outbox_repository_leases_retries_and_completes(session):
+    repo = SqlAlchemyOutboxRepository(session)
+    repo.add(events.UserRegistered(user_id=1, email="a@example.com", username="alice"))
+    repo.add(events.FileUploaded(file_name="a.png", file_url="https://files/a.png"))
+    session.commit()
+
+    first, second = repo.claim(limit=10, lease_seconds=60, max_attempts=3)
+    session.commit()
+    assert first.event() == events.UserRegistered(user_id=1, email="a@example.com", username="alice")
+    assert (first.attempts, second.attempts) == (1, 1)
+    # Leased: not handed out again until the lease runs out
+    assert repo.claim(limit=10, lease_seconds=60, max_attempts=3) == []
+
+    repo.complete([first.id])
+    repo.retry(second.id, delay_seconds=0, error="RuntimeError('boom')")
+    session.commit()
+
+    [again] = repo.claim(limit=10, lease_seconds=0, max_attempts=3)
+    assert (again.id, again.attempts) == (second.id, 2)
+    row = session.execute(select(outbox_table)).mappings().one()
+    assert row["last_error"] == "RuntimeError('boom')"
+
+    repo.claim(limit=10, lease_seconds=0, max_attempts=3)
+    # Out of attempts: kept as a dead letter, never claimed again
+    assert repo.claim(limit=10, lease_seconds=0, max_attempts=3) == []
+    assert session.execute(select(func.count()).select_from(outbox_table)).scalar_one() == 1
+
+
+def test_toggle_like_statement_is_single_postgres_round_trip():
+    from sqlalchemy.dialects import postgresql
+
+    sql = str(SqlAlchemyPostRepository._toggle_like_statement(1, 2).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("WITH deleted AS")
+    assert "ON CONFLICT (post_id, user_id) DO NOTHING" in sql
+    assert "UPDATE posts SET like_count" in sql
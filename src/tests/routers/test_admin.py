@@ -0,0 +1,75 @@
+import json
+from collections import Counter
+
+import pytest
+from httpx import AsyncClient
+
+from src.config import config
+from src.views.pagination import encode_cursor
+from src.views.singleflight import flights
+
+pytestmark = pytest.mark.usefixtures("db")
+
+
+async def export_lines(async_client: AsyncClient, headers: dict, **params) -> list:
+    response = await async_client.get("/api/admin/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.anyio
+async def test_admin_export_streams_ndjson_incrementally(
+    async_client: AsyncClient, logged_in_token: str, monkeypatch
+):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    assert (await async_client.get("/api/admin/export", headers=headers)).status_code == 403
+    monkeypatch.setattr(config, "ADMIN_EMAILS", "ops@example.net, TEST@example.net")
+
+    for body in ("one", "two"):
+        await async_client.post("/api/posts", json={"body": body}, headers=headers)
+    await async_client.post("/api/like", json={"post_id": 1}, headers=headers)
+
+    lines = await export_lines(async_client, headers)
+    assert [(line["table"], line["row"]["id"]) for line in lines[:-1]] == [("posts", 1), ("posts", 2), ("likes", 1)]
+    since = lines[-1]["since"]
+
+    await async_client.post("/api/posts", json={"body": "three"}, headers=headers)
+    response = await async_client.get(
+        "/api/admin/export", params={"since": since, "tables": ["posts", "comments"], "gzip": True}, headers=headers
+    )
+    assert response.headers["content-encoding"] == "gzip"  # httpx decompresses transparently
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["table"], row["row"]["body"]) for row in rows[:-1]] == [("posts", "three")]
+    assert (await async_client.get("/api/admin/export", params={"since": "bogus"}, headers=headers)).status_code == 400
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "watermarks",
+    [{"posts": "1 OR 1=1"}, {"posts": {"x": 1}}, {"posts": True}, {"users": 1}],
+)
+async def test_admin_export_rejects_tampered_since(
+    async_client: AsyncClient, logged_in_token: str, monkeypatch, watermarks: dict
+):
+    monkeypatch.setattr(config, "ADMIN_EMAILS", "test@example.net")
+    since = encode_cursor("export", **watermarks)
+
+    response = await async_client.get(
+        "/api/admin/export", params={"since": since}, headers={"Authorization": f"Bearer {logged_in_token}"}
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_database_info_shows_only_aggregate_single_flight_counts(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(flights, "coalesced", Counter({"users.get_profile_with_stats:(7,)": 3}))
+
+    response = await async_client.get("/api/admin/database-info")
+
+    assert response.status_code == 200
+    single_flight = response.json()["view_cache"]["single_flight"]
+    assert single_flight["coalesced"] == 3
+    assert "top_coalesced" not in single_flight
+    assert "get_profile_with_stats" not in response.text
@@ -0,0 +1,37 @@
+import pytest
+from httpx import AsyncClient
+
+from src.adapters import metrics
+
+pytestmark = pytest.mark.usefixtures("db")
+
+
+def sample(text: str, prefix: str) -> float:
+    [line] = [line for line in text.splitlines() if line.startswith(prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+
+@pytest.mark.anyio
+async def test_metrics_label_requests_by_route_template(async_client: AsyncClient, logged_in_token: str):
+    metrics.registry.clear()
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    post = (await async_client.post("/api/posts", json={"body": "hi"}, headers=headers)).json()
+    await async_client.get(f"/api/posts/{post['id']}")
+    await async_client.get("/api/posts/999999")
+    await async_client.get("/no/such/page")
+
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    route = 'route="/api/posts/{post_id}"'
+    assert sample(text, f'http_requests_total{{method="GET",{route},status="200"}}') == 1
+    assert sample(text, f'http_requests_total{{method="GET",{route},status="404"}}') == 1
+    assert sample(text, f'http_request_duration_seconds_count{{method="GET",{route}}}') == 2
+    assert sample(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert f"/api/posts/{post['id']}" not in text
+    # The scrape itself is still being served
+    assert sample(text, 'http_requests_in_flight{method="GET"}') == 1
+    assert sample(text, 'messagebus_handler_seconds_count{kind="command",message="CreatePost",handler="create_post"}') == 1
+    assert 'db_pool_connections{pool="engine",state="size"}' in text
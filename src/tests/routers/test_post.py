@@ -1,6 +1,14 @@
+import anyio
 import pytest
 from httpx import AsyncClient
+from datetime import datetime, timedelta, timezone
+
 from src import security
+from src.bootstrap import bootstrap_outbox
+from src.config import config
+from src.db import SessionLocal, post_table, user_table
+from src.views import hot
+from src.views.pagination import encode_cursor
 
 pytestmark = pytest.mark.usefixtures("db")
 
@@ -114,6 +122,71 @@ async def test_get_all_posts(async_client: AsyncClient, created_post: dict):
     assert response.status_code == 200
     assert created_post.items() <= response.json()[0].items()
 
+@pytest.mark.anyio
+async def test_cached_views_see_writes(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    post_id = created_post["id"]
+    assert (await async_client.get("/api/posts")).json()[0]["likes"] == 0
+    assert (await async_client.get(f"/api/posts/{post_id}/comment")).json() == []
+
+    await create_comment("Fresh", post_id, async_client, logged_in_token)
+    await like_post(post_id, async_client, logged_in_token)
+
+    assert (await async_client.get("/api/posts")).json()[0]["likes"] == 1
+    assert [c["body"] for c in (await async_client.get(f"/api/posts/{post_id}/comment")).json()] == ["Fresh"]
+
+@pytest.mark.anyio
+async def test_feed_and_post_conditional_get(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    urls = ("/api/posts", f"/api/posts/{created_post['id']}")
+    etags = {}
+    for url in urls:
+        first = await async_client.get(url)
+        etags[url] = first.headers["etag"]
+        assert first.headers["cache-control"].startswith("public, max-age=")
+
+        repeat = await async_client.get(url, headers={"If-None-Match": etags[url]})
+        assert repeat.status_code == 304
+        assert repeat.headers["etag"] == etags[url] and repeat.content == b""
+
+    await like_post(created_post["id"], async_client, logged_in_token)
+
+    for url in urls:
+        changed = await async_client.get(url, headers={"If-None-Match": etags[url]})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etags[url]
+
+@pytest.mark.anyio
+async def test_search_posts_ranks_and_paginates(async_client: AsyncClient, logged_in_token: str):
+    await create_post("Gardening tips for spring", async_client, logged_in_token)
+    best = await create_post("Garden, garden and more gardens", async_client, logged_in_token)
+    await create_post("Nothing to see here", async_client, logged_in_token)
+    await create_post("My garden at night", async_client, logged_in_token)
+
+    # Indexing is an outbox handler: not searchable until the dispatcher delivers it
+    assert (await async_client.get("/api/posts/search", params={"q": "garden"})).json() == []
+    bootstrap_outbox().drain()
+
+    response = await async_client.get("/api/posts/search", params={"q": "GARDEN", "limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert first_page[0]["id"] == best["id"]
+    assert len(first_page) == 2
+
+    rest = await async_client.get(
+        "/api/posts/search",
+        params={"q": "garden", "limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert len(rest.json()) == 1 and "X-Next-Cursor" not in rest.headers
+    assert len({p["id"] for p in first_page + rest.json()}) == 3
+
+    assert (await async_client.get("/api/posts/search", params={"q": "garden night"})).json()[0]["body"] == (
+        "My garden at night"
+    )
+    assert (await async_client.get("/api/posts/search", params={"q": "\"; DROP"})).json() == []
+
 @pytest.mark.anyio
 async def test_get_all_posts_sorting(
     async_client: AsyncClient, 
@@ -218,9 +291,32 @@ async def test_get_single_post_with_its_comments(
     assert response.status_code == 200
     assert response.json() == {
         "post": {**created_post, "likes": 0}, 
-        "comments": [created_comment]
+        "comments": [created_comment],
+        "comments_cursor": None,
     }
 
+@pytest.mark.anyio
+async def test_post_detail_pages_comments_with_cursor(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    post_id = created_post["id"]
+    for i in range(25):
+        await create_comment(f"c{i}", post_id, async_client, logged_in_token)
+
+    detail = (await async_client.get(f"/api/posts/{post_id}")).json()
+    assert [c["body"] for c in detail["comments"]] == [f"c{i}" for i in range(20)]
+    assert detail["post"]["likes"] == 0
+
+    rest = await async_client.get(
+        f"/api/posts/{post_id}/comment", params={"cursor": detail["comments_cursor"], "limit": 3}
+    )
+    assert [c["body"] for c in rest.json()] == ["c20", "c21", "c22"]
+    more = await async_client.get(
+        f"/api/posts/{post_id}/comment", params={"cursor": rest.headers["X-Next-Cursor"], "limit": 3}
+    )
+    assert [c["body"] for c in more.json()] == ["c23", "c24"]
+    assert "X-Next-Cursor" not in more.headers
+
 @pytest.mark.anyio
 async def test_get_missing_post_with_comments(
     async_client: AsyncClient,
@@ -242,3 +338,159 @@ async def test_like_post(
         headers={"Authorization": f"Bearer {logged_in_token}"},
     )
     assert response.status_code == 201
+    assert response.json() == {"liked": True, "like_count": 1}
+
+    response = await like_post(created_post["id"], async_client, logged_in_token)
+    assert response == {"liked": False, "like_count": 0}
+
+async def collect_pages(async_client: AsyncClient, sorting: str, limit: int) -> list[list[int]]:
+    pages = []
+    params = {"sorting": sorting, "limit": limit}
+    while True:
+        response = await async_client.get("/api/posts", params=params)
+        assert response.status_code == 200
+        pages.append([post["id"] for post in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+        params = {**params, "cursor": cursor}
+
+@pytest.mark.anyio
+async def test_get_all_posts_paginates_with_cursor(
+    async_client: AsyncClient,
+    logged_in_token: str
+):
+    for i in range(5):
+        await create_post(f"Test Post {i}", async_client, logged_in_token)
+
+    assert await collect_pages(async_client, "new", 2) == [[5, 4], [3, 2], [1]]
+    assert await collect_pages(async_client, "old", 2) == [[1, 2], [3, 4], [5]]
+
+@pytest.mark.anyio
+async def test_get_user_posts_pages_only_that_users_posts(
+    async_client: AsyncClient,
+    logged_in_token: str
+):
+    for i in range(3):
+        await create_post(f"Test Post {i}", async_client, logged_in_token)
+    with SessionLocal() as session:
+        other_id = session.execute(
+            user_table.insert().values(email="bob@example.net", username="bob").returning(user_table.c.id)
+        ).scalar_one()
+        session.execute(post_table.insert().values(user_id=other_id, username="bob", body="Bob's post"))
+        session.commit()
+
+    pages, params = [], {"limit": 2}
+    while True:
+        response = await async_client.get("/api/users/test/posts", params=params)
+        assert response.status_code == 200
+        pages.append([(post["id"], post["likes"]) for post in response.json()])
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert pages == [[(3, 0), (2, 0)], [(1, 0)]]
+
+    assert [p["body"] for p in (await async_client.get("/api/users/bob/posts")).json()] == ["Bob's post"]
+    assert (await async_client.get("/api/users/nobody/posts")).status_code == 404
+
+@pytest.mark.anyio
+async def test_get_all_posts_hot_weighs_likes_by_age(
+    async_client: AsyncClient,
+    logged_in_token: str,
+    monkeypatch,
+):
+    monkeypatch.setattr(config, "HOT_RANKING_MIN_REFRESH_SECONDS", 0.0)
+    old = await create_post("Old favourite", async_client, logged_in_token)
+    fresh = await create_post("Fresh", async_client, logged_in_token)
+    with SessionLocal() as session:
+        session.execute(
+            post_table.update()
+            .where(post_table.c.id == old["id"])
+            .values(like_count=20, created_at=datetime.now(timezone.utc) - timedelta(days=3))
+        )
+        session.commit()
+    await create_post("Unliked", async_client, logged_in_token)
+
+    assert [p["id"] for p in (await async_client.get("/api/posts", params={"sorting": "hot"})).json()] == [1, 3, 2]
+
+    # One like on a fresh post outweighs twenty three days ago; applied from the LikeToggled event
+    await like_post(fresh["id"], async_client, logged_in_token)
+    response = await async_client.get("/api/posts", params={"sorting": "hot", "limit": 2})
+    assert [p["id"] for p in response.json()] == [2, 1]
+    rest = await async_client.get(
+        "/api/posts", params={"sorting": "hot", "limit": 2, "cursor": response.headers["X-Next-Cursor"]}
+    )
+    assert [p["id"] for p in rest.json()] == [3]
+
+@pytest.mark.anyio
+async def test_hot_ranking_upkeep_runs_off_the_request_path(
+    async_client: AsyncClient,
+    logged_in_token: str,
+    monkeypatch,
+):
+    await create_post("First", async_client, logged_in_token)
+    await create_post("Second", async_client, logged_in_token)
+    monkeypatch.setattr(config, "HOT_RANKING_MIN_REFRESH_SECONDS", 60.0)
+    hot.start_upkeep()
+    try:
+        with anyio.fail_after(5):
+            while hot.ranking.loaded_at is None:
+                await anyio.sleep(0.01)
+        loaded_at = hot.ranking.loaded_at
+        # Due on every read, but the background task owns reloads while it runs
+        monkeypatch.setattr(config, "HOT_RANKING_RELOAD_SECONDS", 0.0)
+
+        response = await async_client.get("/api/posts", params={"sorting": "hot"})
+
+        assert [p["id"] for p in response.json()] == [2, 1]
+        assert hot.ranking.loaded_at == loaded_at
+    finally:
+        await hot.stop_upkeep()
+
+@pytest.mark.anyio
+async def test_get_all_posts_paginates_most_likes_with_ties(
+    async_client: AsyncClient,
+    logged_in_token: str
+):
+    for i in range(4):
+        await create_post(f"Test Post {i}", async_client, logged_in_token)
+    await like_post(2, async_client, logged_in_token)
+    await like_post(4, async_client, logged_in_token)
+
+    assert await collect_pages(async_client, "most_likes", 3) == [[4, 2, 3], [1]]
+
+@pytest.mark.anyio
+async def test_get_all_posts_rejects_foreign_cursor(
+    async_client: AsyncClient,
+    logged_in_token: str
+):
+    await create_post("Test Post 1", async_client, logged_in_token)
+    await create_post("Test Post 2", async_client, logged_in_token)
+    response = await async_client.get("/api/posts", params={"sorting": "new", "limit": 1})
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = await async_client.get("/api/posts", params={"sorting": "old", "cursor": cursor})
+    assert response.status_code == 400
+
+    response = await async_client.get("/api/posts", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "sorting, keys",
+    [
+        ("new", {"id": {"x": 1}}),
+        ("new", {"id": True}),
+        ("old", {"id": "1"}),
+        ("most_likes", {"likes": [1], "id": 1}),
+        ("most_likes", {"likes": 1, "id": 1.5}),
+        ("hot", {"score": "zz", "id": 1}),
+        ("hot", {"score": float("inf"), "id": 1}),
+    ],
+)
+async def test_get_all_posts_rejects_tampered_cursor(async_client: AsyncClient, sorting: str, keys: dict):
+    cursor = encode_cursor(sorting, **keys)
+
+    response = await async_client.get("/api/posts", params={"sorting": sorting, "cursor": cursor})
+
+    assert response.status_code == 400
@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import PlainTextResponse
+
+from src.db import SessionLocal, database, post_table, user_stats_table
+from src.entrypoints.query_counter import QueryCounterMiddleware
+from src.tests.routers.test_post import create_comment, create_post
+
+pytestmark = pytest.mark.usefixtures("db")
+
+
+async def create_posts_with_comments(count: int, async_client: AsyncClient, logged_in_token: str) -> list:
+    ids = []
+    for i in range(count):
+        post = await create_post(f"Post {i}", async_client, logged_in_token)
+        await create_comment("A comment", post["id"], async_client, logged_in_token)
+        ids.append(post["id"])
+    return ids
+
+
+@pytest.mark.anyio
+async def test_read_endpoints_run_a_fixed_number_of_queries(
+    async_client: AsyncClient, logged_in_token: str, assert_max_queries
+):
+    ids = await create_posts_with_comments(5, async_client, logged_in_token)
+
+    with assert_max_queries(1):
+        assert (await async_client.get("/api/posts")).status_code == 200
+    with assert_max_queries(1):
+        assert (await async_client.get("/api/posts?sorting=most_likes")).status_code == 200
+    with assert_max_queries(1):
+        assert (await async_client.get(f"/api/posts/{ids[0]}")).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_profile_revalidation_skips_the_stats_fallback(
+    async_client: AsyncClient, logged_in_token: str, assert_max_queries
+):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    with SessionLocal() as session:
+        # Cold read model: the view falls back to counting posts and likes
+        session.execute(user_stats_table.delete())
+        session.commit()
+    first = await async_client.get("/api/user/me/", headers=headers)
+
+    with assert_max_queries(1):
+        repeat = await async_client.get("/api/user/me/", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_write_endpoints_query_budget(async_client: AsyncClient, logged_in_token: str, assert_max_queries):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+
+    # The token version lookup is cached after this request
+    with assert_max_queries(5):
+        assert (await async_client.post("/api/posts", json={"body": "hi"}, headers=headers)).status_code == 201
+    with assert_max_queries(5):
+        response = await async_client.post("/api/register", json={"email": "q@example.net", "password": "1234"})
+        assert response.status_code == 201
+
+
+async def posts_one_by_one(scope, receive, send):
+    # A deliberate N+1: one query per post instead of one for all of them
+    for post_id in range(1, 4):
+        await database.fetch_one(post_table.select().where(post_table.c.id == post_id))
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+@pytest.mark.anyio
+async def test_query_counter_warns_about_busy_routes_and_repeated_statements(caplog):
+    transport = ASGITransport(app=QueryCounterMiddleware(posts_one_by_one, warn_threshold=2, repeat_threshold=3))
+
+    with caplog.at_level(logging.WARNING, logger="src.entrypoints.query_counter"):
+        async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+            await client.get("/posts")
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(message.startswith("GET unmatched ran 3 SQL statements") for message in messages)
+    assert any("same statement 3 times, likely N+1: SELECT posts.id" in message for message in messages)
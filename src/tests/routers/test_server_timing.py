@@ -0,0 +1,31 @@
+import pytest
+from httpx import AsyncClient
+
+pytestmark = pytest.mark.usefixtures("db")
+
+
+def phases(header: str) -> dict:
+    entries = [entry.split(";") for entry in header.split(", ")]
+    return {name: float(params[0].removeprefix("dur=")) for name, *params in entries}
+
+
+@pytest.mark.anyio
+async def test_server_timing_is_reported_only_when_requested(async_client: AsyncClient, logged_in_token: str):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    untimed = await async_client.post("/api/posts", json={"body": "hi"}, headers=headers)
+    timed = await async_client.post("/api/posts", json={"body": "hi"}, headers={**headers, "X-Debug-Timing": "1"})
+
+    assert untimed.status_code == timed.status_code == 201
+    assert "server-timing" not in untimed.headers
+    timings = phases(timed.headers["server-timing"])
+    assert {"auth", "db", "bus", "serialize", "total"} <= set(timings)
+    assert all(duration >= 0 for duration in timings.values())
+    assert timings["total"] >= timings["bus"]
+
+
+@pytest.mark.anyio
+async def test_server_timing_covers_error_responses(async_client: AsyncClient):
+    response = await async_client.get("/api/posts/999999", headers={"X-Debug-Timing": "1"})
+
+    assert response.status_code == 404
+    assert "total" in phases(response.headers["server-timing"])
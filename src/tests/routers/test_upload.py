@@ -10,7 +10,7 @@ from src import bootstrap
 from src.adapters.notifications import LogNotifier
 from src.adapters.storage import FakeFileStorage
 from src.service_layer.unit_of_work import FakeUnitOfWork
-from src.tests.fakes import FakePostRepository, FakeUserRepository
+from src.tests.fakes import FakeOutboxRepository, FakePostRepository, FakeUserRepository
 
 pytestmark = pytest.mark.usefixtures("db")
 
@@ -23,7 +23,7 @@ def sample_image(fs) -> pathlib.Path:
 @pytest.fixture(autouse=True)
 def override_message_bus(monkeypatch):
     fake_bus = bootstrap.bootstrap(
-        uow=FakeUnitOfWork(FakeUserRepository(), FakePostRepository()),
+        uow=FakeUnitOfWork(FakeUserRepository(), FakePostRepository(), FakeOutboxRepository()),
         notifier=LogNotifier(),
         file_storage=FakeFileStorage(),
     )
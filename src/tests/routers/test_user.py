@@ -1,6 +1,12 @@
 import pytest
 from httpx import AsyncClient
 
+from sqlalchemy import select
+
+from src.adapters.notifications import FakeNotifier
+from src.bootstrap import bootstrap_outbox
+from src.db import SessionLocal, outbox_table, user_stats_table
+
 pytestmark = pytest.mark.usefixtures("db")
 
 async def register_user(
@@ -82,3 +88,80 @@ async def test_login_confirmed_user(async_client: AsyncClient, confirmed_user: d
     )
 
     assert response.status_code == 200
+
+@pytest.mark.anyio
+async def test_access_token_carries_claims_and_is_revoked_by_password_change(async_client: AsyncClient):
+    await register_user(async_client, "claims@example.net", "old-password")
+    login = await async_client.post(
+        "/api/token", json={"email": "claims@example.net", "password": "old-password"}
+    )
+    token = login.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await async_client.get("/api/user/me/", headers=headers)).status_code == 200
+
+    response = await async_client.post(
+        "/api/user/change-password",
+        json={"old_password": "old-password", "new_password": "new-password"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    response = await async_client.get("/api/user/me/", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    refreshed = await async_client.post(
+        "/api/token/refresh/", json={"refresh_token": login.json()["refresh_token"]}
+    )
+    assert refreshed.status_code == 401
+
+    login = await async_client.post(
+        "/api/token", json={"email": "claims@example.net", "password": "new-password"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert (await async_client.get("/api/user/me/", headers=headers)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_me_conditional_get(async_client: AsyncClient, logged_in_token: str):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    first = await async_client.get("/api/user/me/", headers=headers)
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert "Authorization" in first.headers["vary"]
+
+    repeat = await async_client.get("/api/user/me/", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 304
+
+    await async_client.patch("/api/user/me/", json={"bio": "new bio"}, headers=headers)
+    changed = await async_client.get("/api/user/me/", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.json()["bio"] == "new bio"
+
+
+@pytest.mark.anyio
+async def test_me_stats_come_from_user_stats(async_client: AsyncClient, logged_in_token: str):
+    headers = {"Authorization": f"Bearer {logged_in_token}"}
+    for body in ("one", "two"):
+        await async_client.post("/api/posts", json={"body": body}, headers=headers)
+    await async_client.post("/api/like", json={"post_id": 2}, headers=headers)
+
+    me = (await async_client.get("/api/user/me/", headers=headers)).json()
+    assert (me["posts_count"], me["likes_received"]) == (2, 1)
+    with SessionLocal() as session:
+        row = session.execute(select(user_stats_table).where(user_stats_table.c.user_id == me["id"])).mappings().one()
+    assert (row["posts_count"], row["likes_received"]) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_register_commits_welcome_mail_to_outbox(async_client: AsyncClient):
+    response = await register_user(async_client, "outbox@example.com", "12345")
+    assert response.status_code == 201
+
+    with SessionLocal() as session:
+        [row] = session.execute(select(outbox_table)).mappings().all()
+    assert row["event_type"] == "UserRegistered"
+    assert row["payload"]["email"] == "outbox@example.com"
+
+    notifier = FakeNotifier()
+    assert bootstrap_outbox(notifier=notifier).run_once() == 1
+    assert notifier.sent[0][0] == "outbox@example.com"
+    with SessionLocal() as session:
+        assert session.execute(select(outbox_table)).first() is None
@@ -3,8 +3,9 @@ from functools import partial
 import pytest
 
 from src.domain import commands, events
-from src.service_layer.messagebus import MessageBus
-from src.service_layer.unit_of_work import FakeUnitOfWork
+from src.adapters.metrics import MetricsRegistry
+from src.service_layer.messagebus import AsyncMessageBus, BusMetrics, MessageBus
+from src.service_layer.unit_of_work import FakeAsyncUnitOfWork, FakeUnitOfWork
 from src.tests.fakes import FakeUserRepository, FakePostRepository
 
 
@@ -12,12 +13,12 @@ class Dummy:
     def __init__(self):
         self.called = []
 
-    def cmd_handler(self, cmd):
+    def cmd_handler(self, cmd, uow):
         self.called.append(("cmd", type(cmd).__name__))
         # emit event manually on a dummy aggregate if needed
         return "ok"
 
-    def evt_handler(self, evt):
+    def evt_handler(self, evt, uow):
         self.called.append(("evt", type(evt).__name__))
 
 
@@ -25,7 +26,7 @@ def test_messagebus_dispatches_command_and_event():
     dummy = Dummy()
     uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
     bus = MessageBus(
-        uow=uow,
+        uow_factory=lambda: uow,
         event_handlers={events.UserRegistered: [dummy.evt_handler]},
         command_handlers={commands.RegisterUser: dummy.cmd_handler},
     )
@@ -38,15 +39,15 @@ def test_messagebus_dispatches_command_and_event():
 def test_messagebus_handles_events_even_if_handlers_fail():
     calls = []
 
-    def bad_handler(evt):
+    def bad_handler(evt, uow):
         raise RuntimeError("boom")
 
-    def good_handler(evt):
+    def good_handler(evt, uow):
         calls.append(evt)
 
     uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
     bus = MessageBus(
-        uow=uow,
+        uow_factory=lambda: uow,
         event_handlers={events.UserRegistered: [bad_handler, good_handler]},
         command_handlers={},
     )
@@ -66,13 +67,13 @@ def test_messagebus_processes_events_emitted_from_command():
         def __hash__(self):
             return id(self)
 
-    def emit_event(cmd):
+    def emit_event(cmd, uow):
         uow.users.seen.add(Agg())
 
     uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
     bus = MessageBus(
-        uow=uow,
-        event_handlers={events.UserRegistered: [lambda evt: seen_events.append(evt)]},
+        uow_factory=lambda: uow,
+        event_handlers={events.UserRegistered: [lambda evt, uow: seen_events.append(evt)]},
         command_handlers={commands.RegisterUser: emit_event},
     )
 
@@ -83,7 +84,71 @@ def test_messagebus_processes_events_emitted_from_command():
 
 def test_messagebus_requires_command_handler():
     uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
-    bus = MessageBus(uow=uow, event_handlers={}, command_handlers={})
+    bus = MessageBus(uow_factory=lambda: uow, event_handlers={}, command_handlers={})
 
     with pytest.raises(Exception):
         bus.handle(commands.RegisterUser(email="a@example.com", username=None, password="x"))
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_async_messagebus_opens_a_unit_of_work_per_message():
+    uows = []
+
+    def uow_factory():
+        uow = FakeAsyncUnitOfWork(FakeUserRepository(), FakePostRepository())
+        uows.append(uow)
+        return uow
+
+    async def cmd_handler(cmd, uow):
+        await uow.commit()
+        return uow
+
+    bus = AsyncMessageBus(
+        uow_factory=uow_factory,
+        event_handlers={},
+        command_handlers={commands.RegisterUser: cmd_handler},
+    )
+
+    [first] = await bus.handle(commands.RegisterUser(email="a@example.com", username=None, password="x"))
+    [second] = await bus.handle(commands.RegisterUser(email="b@example.com", username=None, password="x"))
+
+    assert uows == [first, second]
+    assert first is not second
+
+
+@pytest.mark.no_db
+def test_messagebus_records_handler_metrics():
+    class Agg:
+        def __init__(self):
+            self.events = [events.UserRegistered(user_id=1, email="x", username="y")]
+
+        def __hash__(self):
+            return id(self)
+
+    def register(cmd, uow):
+        uow.users.seen.add(Agg())
+
+    def welcome(evt, uow):
+        raise RuntimeError("boom")
+
+    registry = MetricsRegistry()
+    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
+    bus = MessageBus(
+        uow_factory=lambda: uow,
+        event_handlers={events.UserRegistered: [welcome, partial(lambda evt, uow, extra: None, extra=1)]},
+        command_handlers={commands.RegisterUser: register},
+        metrics=BusMetrics(registry),
+    )
+
+    bus.handle(commands.RegisterUser(email="a@example.com", username=None, password="x"))
+
+    timings = registry.get("messagebus_handler_seconds")
+    assert timings.labels("command", "RegisterUser", "register").count == 1
+    assert timings.labels("event", "UserRegistered", "welcome").count == 1
+    assert timings.labels("event", "UserRegistered", "<lambda>").count == 1
+    assert registry.get("messagebus_handler_failures_total").labels("event", "UserRegistered", "welcome").value == 1
+    assert registry.get("messagebus_collect_events_seconds").labels("RegisterUser").count == 1
+    # The command, then its one event
+    assert registry.get("messagebus_queue_depth").labels().count == 1
+    assert 'messagebus_queue_depth_bucket{le="1"} 1' in registry.render()
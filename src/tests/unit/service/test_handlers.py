@@ -4,7 +4,7 @@ from src.adapters.notifications import FakeNotifier
 from src.domain import commands, events, exceptions, model
 from src.domain.model import Like
 from src.service_layer import handlers
-from src.tests.fakes import FakeUserRepository, FakePostRepository
+from src.tests.fakes import FakeOutboxRepository, FakeUserRepository, FakePostRepository
 from src.service_layer.unit_of_work import FakeUnitOfWork
 
 
@@ -38,18 +38,43 @@ def test_create_post_succeeds_for_existing_user():
     assert uow.posts._posts  # post stored
 
 
+def test_post_created_carries_the_assigned_id_and_indexes_it():
+    user = model.UserAggregate(user=model.User(id=1, email="a@example.com", username="alice"))
+    uow = make_uow(users=[user])
+
+    post_id = handlers.create_post(
+        commands.CreatePost(post_id=None, user_id=1, username="alice", body="hello"), uow=uow
+    )
+    [event] = list(uow.collect_new_events())
+    assert event.post_id == post_id
+
+    handlers.index_post_for_search(event, uow=uow)
+    assert uow.posts.indexed == {post_id}
+
+
 def test_add_comment_persists_and_emits_event():
     user = model.UserAggregate(user=model.User(id=1, email="a@example.com", username="alice"))
     post = model.PostAggregate(id=1, user_id=1, username="alice", body="hello")
     uow = make_uow(users=[user], posts=[post])
     cmd = commands.AddComment(post_id=1, comment_id=0, user_id=2, body="nice!")
 
-    comment_id = handlers.add_comment(cmd, uow=uow)
+    comment = handlers.add_comment(cmd, uow=uow)
 
-    assert comment_id is not None
+    assert comment.id is not None
+    assert comment in post.comments
     assert uow.committed is True
-    assert uow.posts.last_comment_id == comment_id
-    assert any(isinstance(evt, events.CommentAdded) for evt in getattr(post, "events", []))
+    assert uow.posts.last_comment_id == comment.id
+    assert events.CommentAdded(post_id=1, comment_id=comment.id, user_id=2) in list(uow.collect_new_events())
+
+
+def test_add_comment_rejects_empty_body():
+    post = model.PostAggregate(id=1, user_id=1, username="alice", body="hello")
+    uow = make_uow(posts=[post])
+    cmd = commands.AddComment(post_id=1, comment_id=0, user_id=2, body="")
+
+    with pytest.raises(exceptions.InvalidOperation):
+        handlers.add_comment(cmd, uow=uow)
+    assert not post.comments
 
 
 def test_add_comment_raises_for_missing_post():
@@ -65,12 +90,12 @@ def test_toggle_like_adds_and_removes_likes():
     uow = make_uow(posts=[post])
     cmd = commands.ToggleLike(post_id=1, user_id=2)
 
-    liked = handlers.toggle_like(cmd, uow=uow)
-    assert liked is True
+    toggle = handlers.toggle_like(cmd, uow=uow)
+    assert (toggle.liked, toggle.like_count) == (True, 1)
     assert Like(post_id=1, user_id=2) in post.likes
 
-    liked = handlers.toggle_like(cmd, uow=uow)
-    assert liked is False
+    toggle = handlers.toggle_like(cmd, uow=uow)
+    assert (toggle.liked, toggle.like_count) == (False, 0)
     assert Like(post_id=1, user_id=2) not in post.likes
 
 
@@ -85,6 +110,7 @@ def test_update_profile_and_change_password_emit_events():
     assert user.location == "earth"
     assert user.avatar_url == "img"
     assert uow.committed is True
+    assert user.events == [events.ProfileUpdated(user_id=1)]
 
     change_cmd = commands.ChangePassword(user_id=1, new_password_hash="hashed")
     uow.committed = False  # reset flag
@@ -94,6 +120,7 @@ def test_update_profile_and_change_password_emit_events():
 
     assert returned_id == 1
     assert user.password_hash == "hashed"
+    assert user.token_version == 1  # revokes tokens issued before the change
     assert uow.committed is True
     assert any(isinstance(evt, events.PasswordChanged) for evt in user.events)
 
@@ -108,10 +135,19 @@ def test_delete_account_calls_repo_delete():
     assert deleted_id == 1
     assert uow.committed is True
     assert uow.users.get(1) is None
+    assert uow.collect_new_events() == [events.AccountDeleted(user_id=1)]
+
+
+def test_user_events_invalidate_cached_principal():
+    dropped = []
+    for event in (events.PasswordChanged(user_id=1), events.ProfileUpdated(user_id=2), events.AccountDeleted(user_id=3)):
+        handlers.invalidate_principal(event, uow=make_uow(), invalidate_principal=dropped.append)
+
+    assert dropped == [1, 2, 3]
 
 
 def test_upload_file_uses_storage_and_commits():
-    uow = make_uow()
+    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository(), FakeOutboxRepository())
     urls = []
     def fake_storage(path, name):
         url = f"https://files/{name}"
@@ -125,6 +161,8 @@ def test_upload_file_uses_storage_and_commits():
     assert url == "https://files/pic.png"
     assert urls == [("/tmp/pic.png", "pic.png", "https://files/pic.png")]
     assert uow.committed is True
+    [(event_type, payload, *_)] = uow.outbox.messages.values()
+    assert (event_type, payload["file_url"]) == ("FileUploaded", "https://files/pic.png")
 
 
 def test_event_handlers_execute_without_side_effects():
@@ -144,3 +182,55 @@ def test_handle_user_registered_sends_notification_when_notifier_provided():
 
     # Should not raise if notifier is missing
     handlers.handle_user_registered(evt, uow=make_uow(), notifier=None)
+
+
+def test_reconcile_post_counters_commits():
+    uow = make_uow()
+
+    repaired = handlers.reconcile_post_counters(commands.ReconcilePostCounters(), uow=uow)
+
+    assert repaired == 0
+    assert uow.committed is True
+
+
+def test_toggle_like_emits_event_with_count_and_author():
+    post = model.PostAggregate(id=1, user_id=1, username="alice", body="hello")
+    uow = make_uow(posts=[post])
+
+    handlers.toggle_like(commands.ToggleLike(post_id=1, user_id=2), uow=uow)
+
+    assert uow.collect_new_events() == [
+        events.LikeToggled(post_id=1, user_id=2, liked=True, like_count=1, author_id=1, delta=1)
+    ]
+
+
+def test_toggle_like_raises_for_missing_post():
+    uow = make_uow()
+
+    with pytest.raises(exceptions.PostNotFound):
+        handlers.toggle_like(commands.ToggleLike(post_id=999, user_id=2), uow=uow)
+
+
+def test_commands_move_user_stats_in_their_own_transaction():
+    user = model.UserAggregate(user=model.User(id=1, email="a@example.com", username="alice"))
+    uow = make_uow(users=[user])
+
+    post_id = handlers.create_post(commands.CreatePost(post_id=None, user_id=1, username="alice", body="hi"), uow=uow)
+    handlers.toggle_like(commands.ToggleLike(post_id=post_id, user_id=2), uow=uow)
+    handlers.toggle_like(commands.ToggleLike(post_id=post_id, user_id=3), uow=uow)
+    handlers.toggle_like(commands.ToggleLike(post_id=post_id, user_id=2), uow=uow)
+
+    assert uow.users.stats == {1: (1, 1)}
+
+
+def test_toggle_like_leaves_stats_alone_when_nothing_changed():
+    uow = make_uow()
+    # Lost an insert race: the like already existed, like_count did not move
+    uow.posts._toggle_like = lambda post_id, user_id: model.LikeToggle(
+        post_id=post_id, user_id=user_id, author_id=1, liked=True, like_count=1, delta=0
+    )
+
+    handlers.toggle_like(commands.ToggleLike(post_id=5, user_id=3), uow=uow)
+
+    assert uow.users.stats == {}
+    assert uow.committed
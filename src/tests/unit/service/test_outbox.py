@@ -0,0 +1,63 @@
+import pytest
+
+from src.domain import events
+from src.service_layer.outbox import OutboxDispatcher
+from src.service_layer.unit_of_work import FakeUnitOfWork
+from src.tests.fakes import FakeOutboxRepository, FakePostRepository, FakeUserRepository
+
+REGISTERED = events.UserRegistered(user_id=1, email="a@example.com", username="alice")
+
+
+def make_dispatcher(outbox, handlers, **kwargs):
+    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository(), outbox)
+    return OutboxDispatcher(uow_factory=lambda: uow, handlers=handlers, **kwargs)
+
+
+@pytest.mark.no_db
+def test_dispatcher_delivers_and_deletes_messages_in_batches():
+    outbox = FakeOutboxRepository()
+    for user_id in range(1, 6):
+        outbox.add(events.UserRegistered(user_id=user_id, email=f"{user_id}@example.com", username=str(user_id)))
+    seen = []
+    dispatcher = make_dispatcher(
+        outbox, {events.UserRegistered: [lambda evt, uow: seen.append(evt.user_id)]}, batch_size=2
+    )
+
+    assert dispatcher.run_once() == 2
+    assert dispatcher.drain() == 3
+    assert seen == [1, 2, 3, 4, 5]
+    assert outbox.messages == {}
+    assert dispatcher.stats()["delivered"] == 5
+
+
+@pytest.mark.no_db
+def test_dispatcher_retries_with_backoff_then_keeps_a_dead_letter():
+    outbox = FakeOutboxRepository()
+    outbox.add(REGISTERED)
+    calls = []
+
+    def flaky(evt, uow):
+        calls.append(evt)
+        raise RuntimeError("smtp down")
+
+    dispatcher = make_dispatcher(
+        outbox, {events.UserRegistered: [flaky]}, max_attempts=3, retry_base_seconds=0, retry_max_seconds=0
+    )
+
+    assert dispatcher.drain() == 3
+    assert calls == [REGISTERED] * 3
+    [(event_type, _, attempts, _, error)] = outbox.messages.values()
+    assert (event_type, attempts, error) == ("UserRegistered", 3, "RuntimeError('smtp down')")
+    assert dispatcher.stats() == {"running": False, "delivered": 0, "failed": 3, "dead": 1}
+
+
+@pytest.mark.no_db
+def test_failed_message_waits_for_its_retry_delay():
+    outbox = FakeOutboxRepository()
+    outbox.add(REGISTERED)
+    dispatcher = make_dispatcher(
+        outbox, {events.UserRegistered: [lambda evt, uow: 1 / 0]}, retry_base_seconds=60
+    )
+
+    assert dispatcher.run_once() == 1
+    assert dispatcher.run_once() == 0
@@ -2,7 +2,10 @@ import logging
 
 import pytest
 
-from src.adapters import notifications, storage
+from src.adapters import notifications, passwords, query_stats, storage
+from src.adapters.metrics import MetricsRegistry
+from src.adapters.ranking import HotRanking
+from src.adapters.cache import FRESH, STALE, CacheEntry, InMemoryViewCache, TTLCache
 
 
 @pytest.mark.no_db
@@ -35,3 +38,179 @@ def test_file_storage_variants(monkeypatch):
     b2_storage = storage.B2FileStorage()
     assert b2_storage.upload("local", "remote.txt") == "https://b2/files/remote.txt"
     assert called["args"] == ("local", "remote.txt")
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_password_hasher_flags_hashes_at_another_cost_for_upgrade():
+    old = passwords.PasswordHasher(rounds=4, pool_size=0)
+    new = passwords.PasswordHasher(rounds=5, pool_size=0)
+    stored = await old.hash("s3cret")
+
+    assert await old.verify("s3cret", stored) == (True, None)
+    assert (await old.verify("wrong", stored))[0] is False
+
+    valid, upgraded = await new.verify("s3cret", stored)
+    assert valid and upgraded.startswith("$2b$05$")
+    assert await new.verify("s3cret", upgraded) == (True, None)
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_password_hasher_runs_on_a_process_pool():
+    hasher = passwords.PasswordHasher(rounds=4, pool_size=1)
+    try:
+        stored = await hasher.hash("x" * 100)  # past bcrypt's 72-byte limit
+        assert await hasher.verify("x" * 72, stored) == (True, None)
+        assert hasher._executor is not None
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.no_db
+def test_ttl_cache_expires_evicts_and_counts():
+    now = [0.0]
+    cache = TTLCache(max_entries=2, ttl=10, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    now[0] = 10.0
+    assert cache.get("a") is None  # expired
+
+    assert cache.stats() == {
+        "size": 1,
+        "max_entries": 2,
+        "ttl_seconds": 10,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+        "hit_ratio": 0.3333,
+    }
+
+
+@pytest.mark.no_db
+def test_ttl_cache_discard_where():
+    cache = TTLCache(max_entries=10, ttl=60)
+    for key, user_id in (("a@x", 1), ("b@x", 2), ("c@x", 1)):
+        cache.set(key, user_id)
+
+    assert cache.discard_where(lambda _, user_id: user_id == 1) == 2
+    assert len(cache) == 1 and cache.get("b@x") == 2
+
+
+def _entry(cache, value, size, tags=(), expires_at=10.0, stale_until=10.0):
+    return CacheEntry(
+        value=value, size=size, expires_at=expires_at, stale_until=stale_until, generations=cache.generations(tags)
+    )
+
+
+@pytest.mark.no_db
+def test_view_cache_bounds_entries_and_bytes():
+    cache = InMemoryViewCache(max_entries=3, max_bytes=100)
+
+    cache.store("a", _entry(cache, "a", 40))
+    cache.store("b", _entry(cache, "b", 40))
+    cache.store("c", _entry(cache, "c", 40))  # 120 bytes: evicts "a"
+    cache.store("huge", _entry(cache, "huge", 101))  # larger than the whole budget: not stored
+
+    assert cache.lookup("a", 0)[0] is None
+    assert cache.lookup("b", 0)[0] == FRESH
+    assert cache.lookup("huge", 0)[0] is None
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 80
+    assert cache.evictions == 1
+
+
+@pytest.mark.no_db
+def test_view_cache_invalidates_by_tag_and_rejects_raced_fills():
+    cache = InMemoryViewCache(max_entries=10, max_bytes=1000)
+    cache.store("feed", _entry(cache, [1], 1, tags=["feed"]))
+    cache.store("post", _entry(cache, {"id": 1}, 1, tags=["post:1"]))
+    raced = _entry(cache, [1], 1, tags=["feed"])
+
+    cache.invalidate_tags(["feed"])
+    cache.store("feed", raced)  # computed before the invalidation
+
+    assert cache.lookup("feed", 0) == (None, None)
+    assert cache.lookup("post", 0)[0] == FRESH
+
+
+@pytest.mark.no_db
+def test_view_cache_serves_stale_inside_the_window():
+    cache = InMemoryViewCache(max_entries=10, max_bytes=1000)
+    cache.store("k", _entry(cache, "v", 1, expires_at=5.0, stale_until=15.0))
+
+    assert cache.lookup("k", 4.0)[0] == FRESH
+    assert cache.lookup("k", 10.0) == (STALE, cache._entries["k"])
+    assert cache.lookup("k", 15.0)[0] is None
+    assert cache.stats()["hit_ratio"] == 0.6667
+
+
+@pytest.mark.no_db
+def test_hot_ranking_decays_likes_with_age_and_pages_by_keyset():
+    hour = 3600.0
+    now = 100 * hour
+    ranking = HotRanking(gravity=1.8, clock=lambda: now)
+    # id: (likes, created_at) -- 4 is old but liked, 2 and 3 tie on zero likes
+    ranking.load([1, 2, 3, 4, 5], [5, 0, 0, 40, 3], [now - hour, now, now, now - 48 * hour, now - 1])
+
+    ids, last, more = ranking.page(2)
+    assert ids == [5, 1] and more
+    ids, last, more = ranking.page(2, {"score": last[0], "id": last[1]})
+    assert ids == [4, 3] and more  # zero-like ties fall back to id desc
+    assert ranking.page(2, {"score": last[0], "id": last[1]}) == ([2], (0.0, 2), False)
+
+    assert ranking.set_likes(3, 50) and not ranking.set_likes(99, 1)
+    ranking.add_post(6, created_at=now, likes=1)
+    assert ranking.dirty and ranking.page(1)[0] == [5]  # readers keep the old snapshot
+    ranking.refresh()
+    assert ranking.page(4)[0] == [3, 5, 1, 6]
+    assert len(ranking) == 6 and not ranking.dirty
+
+
+@pytest.mark.no_db
+def test_metrics_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests served", ["route"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    pool = registry.gauge("pool_size", 'Connections "open"')
+    registry.add_collector(lambda: [(pool, (), 3)])
+
+    requests.labels('/api/posts/{post_id}').inc()
+    requests.labels('/api/posts/{post_id}').inc(2)
+    for value in (0.05, 0.1, 0.5, 7):
+        latency.observe(value)
+
+    assert registry.counter("requests_total", "Requests served", ["route"]) is requests
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Clash")
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 7.65",
+        "latency_seconds_count 4",
+        '# HELP pool_size Connections \\"open\\"',
+        "# TYPE pool_size gauge",
+        "pool_size 3",
+        "# HELP requests_total Requests served",
+        "# TYPE requests_total counter",
+        'requests_total{route="/api/posts/{post_id}"} 3',
+    ]
+
+
+@pytest.mark.no_db
+def test_nested_trackers_each_see_the_statements_inside_them():
+    with query_stats.track() as outer:
+        query_stats._observe("SELECT 1", 0.001)
+        with query_stats.track() as inner:
+            query_stats._observe("SELECT 2", 0.001)
+            query_stats._observe("SELECT 2", 0.001)
+
+    assert (outer.count, inner.count) == (3, 2)
+    assert outer.repeated(2) == [("SELECT 2", 2)]
+    assert query_stats._current.get() is None
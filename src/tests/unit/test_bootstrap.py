@@ -1,24 +1,74 @@
+import inspect
+
 import pytest
 
 from src import bootstrap
 from src.adapters.notifications import FakeNotifier
 from src.adapters.storage import FakeFileStorage
 from src.domain import commands
-from src.service_layer.unit_of_work import FakeUnitOfWork
-from src.tests.fakes import FakePostRepository, FakeUserRepository
+from src.service_layer import async_handlers, handlers
+from src.service_layer.unit_of_work import FakeAsyncUnitOfWork, FakeUnitOfWork
+from src.tests.fakes import FakeOutboxRepository, FakePostRepository, FakeUserRepository
 
 
 @pytest.mark.no_db
 def test_bootstrap_wires_handlers_with_overrides():
     notifier = FakeNotifier()
     storage = FakeFileStorage()
-    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
+    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository(), FakeOutboxRepository())
 
     bus = bootstrap.bootstrap(uow=uow, notifier=notifier, file_storage=storage)
 
     bus.handle(commands.RegisterUser(email="user@example.com", username="user", password="pw"))
+    # The welcome mail is an outbox handler: committed with the user, sent by the dispatcher
+    assert notifier.sent == []
+    assert bootstrap.bootstrap_outbox(uow=uow, notifier=notifier).run_once() == 1
     assert notifier.sent[0][0] == "user@example.com"
 
     result = bus.handle(commands.UploadFile(file_name="pic.png", local_path="/tmp/pic.png"))
     assert result == ["https://fake.local/pic.png"]
     assert storage.uploads[-1][1] == "pic.png"
+
+
+@pytest.mark.no_db
+def test_sync_and_async_buses_share_the_handler_registry():
+    uow = FakeUnitOfWork(FakeUserRepository(), FakePostRepository())
+    sync_bus = bootstrap.bootstrap(uow=uow, notifier=FakeNotifier(), file_storage=FakeFileStorage())
+    async_bus = bootstrap.bootstrap_async(notifier=FakeNotifier(), file_storage=FakeFileStorage())
+
+    def names(handlers):
+        return {key: handler.func.__name__ for key, handler in handlers.items()}
+
+    assert names(sync_bus.command_handlers) == names(async_bus.command_handlers)
+    assert sync_bus.event_handlers.keys() == async_bus.event_handlers.keys()
+
+    registered = set(bootstrap.COMMAND_HANDLERS.values()).union(
+        *bootstrap.EVENT_HANDLERS.values(), *bootstrap.OUTBOX_HANDLERS.values()
+    )
+    for name in registered:
+        sync_handler, async_handler = getattr(handlers, name), getattr(async_handlers, name)
+        assert not inspect.iscoroutinefunction(sync_handler)
+        assert inspect.iscoroutinefunction(async_handler)
+        assert inspect.signature(sync_handler).parameters.keys() == inspect.signature(async_handler).parameters.keys()
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_async_bootstrap_wires_handlers_with_overrides():
+    notifier = FakeNotifier()
+    users, posts, outbox = FakeUserRepository(), FakePostRepository(), FakeOutboxRepository()
+    bus = bootstrap.bootstrap_async(
+        uow_factory=lambda: FakeAsyncUnitOfWork(users, posts, outbox),
+        notifier=notifier,
+        file_storage=FakeFileStorage(),
+    )
+
+    await bus.handle(commands.RegisterUser(email="user@example.com", username="user", password="pw"))
+    assert notifier.sent == []
+    bootstrap.bootstrap_outbox(uow=FakeUnitOfWork(users, posts, outbox), notifier=notifier).drain()
+    assert notifier.sent[0][0] == "user@example.com"
+
+    user = users.get_by_email("user@example.com")
+    [post_id] = await bus.handle(commands.CreatePost(post_id=None, user_id=user.user.id, username="user", body="hi"))
+    [toggle] = await bus.handle(commands.ToggleLike(post_id=post_id, user_id=user.user.id))
+    assert (toggle.liked, toggle.like_count) == (True, 1)
@@ -1,10 +1,11 @@
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.db import metadata
 from src.domain import events, model
-from src.service_layer.unit_of_work import FakeUnitOfWork, SqlAlchemyUnitOfWork
+from src.service_layer.unit_of_work import AsyncSqlAlchemyUnitOfWork, FakeUnitOfWork, SqlAlchemyUnitOfWork
 from src.tests.fakes import FakePostRepository, FakeUserRepository
 
 
@@ -73,3 +74,27 @@ def test_ensure_schema_runs_only_once(monkeypatch):
         pass
 
     assert len(calls) == 1
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_async_sqlalchemy_uow_commit_and_rollback(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'uow.db'}")
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    AsyncSqlAlchemyUnitOfWork._schema_initialized = False
+    try:
+        async with AsyncSqlAlchemyUnitOfWork(session_factory=session_factory) as uow:
+            await uow.users.add(model.UserAggregate(user=model.User(id=None, email="a@example.com", username="alice")))
+            await uow.commit()
+            user = await uow.users.get_by_email("a@example.com")
+
+        async with AsyncSqlAlchemyUnitOfWork(session_factory=session_factory) as uow:
+            assert await uow.users.get(user.user.id) is not None
+            await uow.users.add(model.UserAggregate(user=model.User(id=None, email="b@example.com", username="bob")))
+            await uow.rollback()
+
+        async with AsyncSqlAlchemyUnitOfWork(session_factory=session_factory) as uow:
+            assert await uow.users.get_by_email("b@example.com") is None
+    finally:
+        AsyncSqlAlchemyUnitOfWork._schema_initialized = False
+        await engine.dispose()
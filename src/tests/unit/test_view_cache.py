@@ -0,0 +1,122 @@
+import anyio
+import pytest
+
+from src.adapters.cache import InMemoryViewCache
+from src.config import config
+from src.domain import events
+from src.views import cache as view_cache
+from src.views.singleflight import SingleFlight
+
+
+@pytest.fixture()
+def fresh_cache(monkeypatch):
+    backend = InMemoryViewCache(max_entries=100, max_bytes=10_000)
+    monkeypatch.setattr(view_cache, "view_cache", backend)
+    return backend
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_cached_view_invalidated_by_event(fresh_cache):
+    calls = []
+
+    @view_cache.cached_view("test.post", tags=lambda post_id: [f"post:{post_id}"], ttl=60)
+    async def view(post_id):
+        calls.append(post_id)
+        return {"id": post_id, "calls": len(calls)}
+
+    assert await view(1) == await view(1) == {"id": 1, "calls": 1}
+    view_cache.invalidate_for_event(events.CommentAdded(post_id=1, comment_id=9, user_id=2))
+    assert await view(1) == {"id": 1, "calls": 2}
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_stale_entry_served_while_one_refresh_runs(fresh_cache, monkeypatch):
+    monkeypatch.setattr(config, "VIEW_CACHE_STALE_SECONDS", 60.0)
+    release = anyio.Event()
+    calls = []
+
+    @view_cache.cached_view("test.feed", tags=lambda: ["feed"], ttl=0)
+    async def view():
+        calls.append(1)
+        if len(calls) > 1:
+            await release.wait()
+        return len(calls)
+
+    assert await view() == 1
+    # Expired immediately (ttl=0): every caller gets the stale value, only one refresh starts
+    assert [await view() for _ in range(5)] == [1] * 5
+    await anyio.sleep(0)
+    assert len(calls) == 2
+
+    release.set()
+    while view_cache._refresh_tasks:
+        await anyio.sleep(0)
+    assert await view() == 2
+    assert fresh_cache.stats()["stale_hits"] >= 5
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    release = anyio.Event()
+    calls = []
+
+    async def query():
+        calls.append(1)
+        await release.wait()
+        return {"rows": len(calls)}
+
+    results = []
+
+    async def caller():
+        results.append(await flights.run("post:1", query))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(50):
+            tg.start_soon(caller)
+        await anyio.sleep(0.01)
+        release.set()
+
+    assert calls == [1]
+    assert results == [{"rows": 1}] * 50
+    assert flights.stats() == {"flights": 1, "in_flight": 0, "coalesced": 49}
+    assert flights.stats(top=10)["top_coalesced"] == {"post:1": 49}
+    assert await flights.run("post:1", query) == {"rows": 2}  # nothing in flight: runs again
+
+
+@pytest.mark.no_db
+@pytest.mark.anyio
+async def test_single_flight_shares_errors_and_survives_caller_cancellation():
+    flights = SingleFlight()
+    release = anyio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("boom")
+
+    errors = []
+    leader_scope = anyio.CancelScope()
+
+    async def leader():
+        with leader_scope:
+            await flights.run("k", failing)
+
+    async def caller():
+        try:
+            await flights.run("k", failing)
+        except ValueError as exc:
+            errors.append(str(exc))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(leader)
+        await anyio.sleep(0)
+        tg.start_soon(caller)
+        tg.start_soon(caller)
+        await anyio.sleep(0.01)
+        leader_scope.cancel()  # the first caller goes away; the shared query keeps running
+        release.set()
+
+    assert errors == ["boom", "boom"]
@@ -0,0 +1,19 @@
+import pytest
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+from src.views.comments import comment_page_query
+from src.views.posts import _comments_json
+
+
+@pytest.mark.no_db
+def test_comment_page_json_keys_are_literals_on_postgresql():
+    page = comment_page_query(1, 21).subquery("page")
+    query = sqlalchemy.select(_comments_json(page, "postgresql")).select_from(page)
+
+    compiled = query.compile(dialect=postgresql.asyncpg.dialect())
+    sql = str(compiled)
+
+    assert "json_agg(json_build_object('id', page.id, 'body', page.body" in sql
+    # Only the comment page's own filter and limit are bound; asyncpg cannot type bare key binds
+    assert sorted(compiled.params) == ["param_1", "post_id_1"]
@@ -0,0 +1,149 @@
+"""
+Result cache in front of the read views.
+
+Entries are keyed by view name and arguments and tagged with what they depend on ("feed",
+"post:<id>", "user:<id>"). The message bus's event handlers call `invalidate_for_event`,
+so a write is visible to the next read in this worker. With a stale window configured, an
+expired (but not invalidated) entry is served once more while a single background task refreshes it.
+Concurrent misses on the same key share one query (src.views.singleflight).
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from src.adapters.cache import AbstractViewCache, CacheEntry, InMemoryViewCache, STALE
+from src.config import config
+from src.domain import events
+from src.views.singleflight import call_key, flights
+
+logger = logging.getLogger(__name__)
+
+view_cache: AbstractViewCache = InMemoryViewCache(
+    max_entries=config.VIEW_CACHE_MAX_ENTRIES, max_bytes=config.VIEW_CACHE_MAX_BYTES
+)
+
+_refreshing: Set[str] = set()
+# Strong references so background refreshes are not garbage collected mid-flight
+_refresh_tasks: Set[asyncio.Task] = set()
+refreshes = 0
+
+
+def use_backend(backend: AbstractViewCache) -> None:
+    """Swap the cache storage (e.g. for a shared backend or a test double)."""
+    global view_cache
+    view_cache = backend
+
+
+def _plain(value: Any) -> Any:
+    # Detach DB records from their driver objects so cached values are plain, sizeable data
+    if hasattr(value, "_mapping"):
+        return dict(value._mapping)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_plain(v) for v in value)
+    return value
+
+
+def _size(value: Any) -> int:
+    # Approximate: the JSON-encoded length, computed once per fill
+    return len(json.dumps(value, default=str))
+
+
+def cached_view(
+    name: str,
+    tags: Callable[..., Iterable[str]],
+    ttl: Optional[float] = None,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Cache an async view under `name` + arguments; `tags(*args, **kwargs)` names its dependencies."""
+
+    def decorator(view: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            key = call_key(name, args, kwargs)
+            if not config.VIEW_CACHE_ENABLED:
+                return await flights.run(key, lambda: view(*args, **kwargs))
+            state, entry = view_cache.lookup(key, time.monotonic())
+            if state is None:
+                return await flights.run(
+                    key, lambda: _fill(key, view, args, kwargs, list(tags(*args, **kwargs)), ttl)
+                )
+            if state == STALE and key not in _refreshing:
+                _refreshing.add(key)
+                task = asyncio.create_task(_refresh(key, view, args, kwargs, list(entry.generations), ttl))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            return entry.value
+
+        wrapper.uncached = view  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+async def _fill(key: str, view, args, kwargs, tags: List[str], ttl: Optional[float]) -> Any:
+    # Snapshot generations before querying: an invalidation during the query discards the result
+    generations = view_cache.generations(tags)
+    value = _plain(await view(*args, **kwargs))
+    if value is None:
+        # Not-found results are not tagged by the write that would create them
+        return value
+    ttl = config.VIEW_CACHE_TTL_SECONDS if ttl is None else ttl
+    now = time.monotonic()
+    view_cache.store(
+        key,
+        CacheEntry(
+            value=value,
+            size=_size(value),
+            expires_at=now + ttl,
+            stale_until=now + ttl + config.VIEW_CACHE_STALE_SECONDS,
+            generations=generations,
+        ),
+    )
+    return value
+
+
+async def _refresh(key: str, view, args, kwargs, tags: List[str], ttl: Optional[float]) -> None:
+    global refreshes
+    try:
+        await _fill(key, view, args, kwargs, tags, ttl)
+        refreshes += 1
+    except Exception:
+        logger.exception("Background refresh failed for %s", key)
+    finally:
+        _refreshing.discard(key)
+
+
+def tags_for_event(event: events.Event) -> List[str]:
+    """Which cached views an event makes outdated."""
+    if isinstance(event, events.PostCreated):
+        return ["feed", f"user:{event.user_id}"]
+    if isinstance(event, events.CommentAdded):
+        return ["feed", f"post:{event.post_id}"]
+    if isinstance(event, events.LikeToggled):
+        # likes_received on the author's profile moves too
+        author = f"user:{event.author_id}" if event.author_id is not None else "profiles"
+        return ["feed", f"post:{event.post_id}", author]
+    if isinstance(event, events.ProfileUpdated):
+        return [f"user:{event.user_id}"]
+    if isinstance(event, events.AccountDeleted):
+        return ["feed", f"user:{event.user_id}"]
+    return []
+
+
+def invalidate_for_event(event: events.Event) -> None:
+    view_cache.invalidate_tags(tags_for_event(event))
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        **view_cache.stats(),
+        "refreshes": refreshes,
+        "refreshing": len(_refreshing),
+        "single_flight": flights.stats(),
+    }
@@ -1,12 +1,61 @@
 from __future__ import annotations
 
+from typing import List, Optional, Tuple
+
 import sqlalchemy
 from src.db import comment_table, database
+from src.views.cache import cached_view
+from src.views.pagination import clamp_limit, decode_cursor, encode_cursor
+
+COMMENT_ORDER = "comments"
+
+
+def comment_page_query(post_id: int, limit: int, after_id: Optional[int] = None):
+    """
+    `limit` comments of a post in (created_at, id) order, after comment `after_id`.
+    The cursor carries only the id; its created_at is read back in SQL, so the comparison
+    always uses the stored value (no timestamp formats in cursors). Served by
+    ix_comments_post_id_created_at_id.
+    """
+    query = (
+        comment_table.select()
+        .where(comment_table.c.post_id == post_id)
+        .order_by(comment_table.c.created_at, comment_table.c.id)
+    )
+    if after_id is not None:
+        after_created_at = (
+            sqlalchemy.select(comment_table.c.created_at)
+            .where(comment_table.c.id == after_id)
+            .scalar_subquery()
+        )
+        query = query.where(
+            sqlalchemy.or_(
+                comment_table.c.created_at > after_created_at,
+                sqlalchemy.and_(
+                    comment_table.c.created_at == after_created_at,
+                    comment_table.c.id > after_id,
+                ),
+            )
+        )
+    return query.limit(limit)
+
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """Rows fetched with limit + 1 -> (page, cursor for the next page or None)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(COMMENT_ORDER, id=rows[-1]["id"])
 
 
-async def list_comments_for_post(post_id: int):
-    query = comment_table.select().where(comment_table.c.post_id == post_id)
-    return await database.fetch_all(query)
+@cached_view("comments.list_comments_for_post", tags=lambda post_id, *args, **kwargs: [f"post:{post_id}"])
+async def list_comments_for_post(
+    post_id: int, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, COMMENT_ORDER, "id")
+    rows = await database.fetch_all(comment_page_query(post_id, limit + 1, after and after["id"]))
+    return split_page(rows, limit)
 
 
 async def get_comment(comment_id: int):
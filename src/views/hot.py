@@ -0,0 +1,132 @@
+"""
+The worker's hot ranking (src.adapters.ranking) and its upkeep.
+
+Like and post events handled in this worker update the ranking in place. The rest of the
+upkeep runs on a background task (start_upkeep(), from the app lifespan): a full reload from
+the posts table every HOT_RANKING_RELOAD_SECONDS to pick up writes handled by other workers,
+and re-ranking at most every HOT_RANKING_MIN_REFRESH_SECONDS while there are changes, at least
+every HOT_RANKING_REFRESH_SECONDS so scores keep decaying. While that task runs, readers never
+reload or re-rank; without it (CLI, tests) ensure_fresh() does the same upkeep inline.
+"""
+from __future__ import annotations
+
+import array
+import asyncio
+import datetime
+import logging
+import time
+from typing import Optional
+
+import sqlalchemy
+from anyio import to_thread
+
+from src.adapters.ranking import HotRanking
+from src.config import config
+from src.db import database, post_table
+from src.domain import events
+
+logger = logging.getLogger(__name__)
+
+ranking = HotRanking(gravity=config.HOT_RANKING_GRAVITY)
+
+_upkeep_lock: Optional[asyncio.Lock] = None
+_upkeep_task: Optional[asyncio.Task] = None
+
+
+def reset() -> None:
+    global _upkeep_lock
+    ranking.clear()
+    _upkeep_lock = None
+
+
+def _epoch(value) -> float:
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        # SQLite hands back CURRENT_TIMESTAMP (UTC) without an offset
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+async def _reload() -> None:
+    # Typed arrays, not a list of records: 1M posts stay a few tens of MB while loading
+    ids, likes, created_at = array.array("q"), array.array("q"), array.array("d")
+    query = sqlalchemy.select(post_table.c.id, post_table.c.like_count, post_table.c.created_at)
+    async for row in database.iterate(query):
+        ids.append(row["id"])
+        likes.append(row["like_count"])
+        created_at.append(_epoch(row["created_at"]))
+    await to_thread.run_sync(ranking.load, ids, likes, created_at)
+
+
+def _needs_refresh(now: float) -> bool:
+    age = now - ranking.refreshed_at
+    return age >= config.HOT_RANKING_REFRESH_SECONDS or (
+        ranking.dirty and age >= config.HOT_RANKING_MIN_REFRESH_SECONDS
+    )
+
+
+async def _upkeep() -> None:
+    """Reload or re-rank if either is due; one caller at a time."""
+    global _upkeep_lock
+    if _upkeep_lock is None:
+        _upkeep_lock = asyncio.Lock()
+    async with _upkeep_lock:
+        now = time.time()
+        if ranking.loaded_at is None or now - ranking.loaded_at >= config.HOT_RANKING_RELOAD_SECONDS:
+            await _reload()
+        elif _needs_refresh(now):
+            await to_thread.run_sync(ranking.refresh, now)
+
+
+def _upkeep_running() -> bool:
+    return _upkeep_task is not None and not _upkeep_task.done()
+
+
+async def _run_upkeep() -> None:
+    while True:
+        try:
+            await _upkeep()
+        except Exception:
+            logger.exception("Hot ranking upkeep failed")
+        await asyncio.sleep(config.HOT_RANKING_MIN_REFRESH_SECONDS)
+
+
+def start_upkeep() -> None:
+    """Keep the ranking loaded and ranked on a background task of the running event loop."""
+    global _upkeep_task
+    if not _upkeep_running():
+        _upkeep_task = asyncio.get_running_loop().create_task(_run_upkeep(), name="hot-ranking-upkeep")
+
+
+async def stop_upkeep() -> None:
+    global _upkeep_task
+    if _upkeep_task is not None:
+        _upkeep_task.cancel()
+        try:
+            await _upkeep_task
+        except asyncio.CancelledError:
+            pass
+        _upkeep_task = None
+
+
+async def ensure_fresh() -> HotRanking:
+    if ranking.loaded_at is not None:
+        if _upkeep_running():
+            return ranking
+        now = time.time()
+        if now - ranking.loaded_at < config.HOT_RANKING_RELOAD_SECONDS and not _needs_refresh(now):
+            return ranking
+    # Cold start (waits for the background task's first load) or no background upkeep
+    await _upkeep()
+    return ranking
+
+
+def apply_event(event: events.Event) -> None:
+    """Incremental upkeep from the bus: new posts and like counts."""
+    if ranking.loaded_at is None:
+        return  # the first reader loads everything anyway
+    if isinstance(event, events.PostCreated) and event.post_id is not None:
+        ranking.add_post(event.post_id)
+    elif isinstance(event, events.LikeToggled) and event.like_count is not None:
+        ranking.set_likes(event.post_id, event.like_count)
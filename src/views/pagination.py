@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import base64
+import json
+import math
+from typing import Any, Dict, Optional
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue (or for another sort order)."""
+
+
+def encode_cursor(order: str, **keys: Any) -> str:
+    """
+    Opaque keyset cursor: the sort order plus the sort key values of the last row served.
+    Clients must treat it as a token and send it back untouched.
+    """
+    payload = json.dumps({"o": order, **keys}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], order: str, *keys: str) -> Optional[Dict[str, Any]]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(payload, dict) or payload.pop("o", None) != order:
+        raise InvalidCursor(f"Cursor does not belong to sort order '{order}'")
+    if any(key not in payload for key in keys):
+        raise InvalidCursor("Cursor is missing sort keys")
+    if not all(_valid_key(key, payload[key]) for key in keys):
+        raise InvalidCursor("Cursor has invalid sort key values")
+    return payload
+
+
+def is_int(value: Any) -> bool:
+    # bool is an int subclass, but never a key we issued
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_key(key: str, value: Any) -> bool:
+    # Scores (hot, search rank) are floats; every other key is an id or a count
+    if key == "score":
+        return (is_int(value) or isinstance(value, float)) and math.isfinite(value)
+    return is_int(value)
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
@@ -1,57 +1,192 @@
 from __future__ import annotations
 
+import json
+from typing import List, Optional, Tuple
+
 import sqlalchemy
-from sqlalchemy import func
-from src.db import comment_table, likes_table, post_table, database
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy import and_, or_
+from src.db import engine, post_table, user_table, database
+from src.views import hot
+from src.views.cache import cached_view
+from src.views.comments import comment_page_query, split_page
+from src.views.pagination import InvalidCursor, clamp_limit, decode_cursor, encode_cursor
+
 
+def _posts_with_likes():
+    # like_count is maintained by the write handlers; no join/GROUP BY on the read path
+    return sqlalchemy.select(post_table, post_table.c.like_count.label("likes"))
 
+
+@cached_view("posts.get_post", tags=lambda post_id: [f"post:{post_id}"])
 async def get_post(post_id: int):
-    query = (
-        sqlalchemy.select(
-            post_table,
-            func.count(likes_table.c.id).label("likes"),
-        )
-        .select_from(post_table.outerjoin(likes_table))
-        .where(post_table.c.id == post_id)
-        .group_by(post_table.c.id)
-    )
+    query = _posts_with_likes().where(post_table.c.id == post_id)
     return await database.fetch_one(query)
 
 
-async def list_posts(order: str = "new"):
-    base = (
-        sqlalchemy.select(
-            post_table,
-            func.count(likes_table.c.id).label("likes"),
-        )
-        .select_from(post_table.outerjoin(likes_table))
-        .group_by(post_table.c.id)
-    )
-    if order == "new":
-        query = base.order_by(post_table.c.id.desc())
+def _feed_query(columns, order: str, limit: Optional[int], cursor: Optional[str]):
+    """Keyset page query (limit + 1 rows) selecting `columns`; returns (query, order, limit)."""
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, order, *(("likes", "id") if order == "most_likes" else ("id",)))
+
+    if order == "most_likes":
+        query = columns.order_by(post_table.c.like_count.desc(), post_table.c.id.desc())
+        if after:
+            query = query.where(
+                or_(
+                    post_table.c.like_count < after["likes"],
+                    and_(
+                        post_table.c.like_count == after["likes"],
+                        post_table.c.id < after["id"],
+                    ),
+                )
+            )
     elif order == "old":
-        query = base.order_by(post_table.c.id.asc())
-    elif order == "most_likes":
-        query = base.order_by(sqlalchemy.desc("likes"))
+        query = columns.order_by(post_table.c.id.asc())
+        if after:
+            query = query.where(post_table.c.id > after["id"])
     else:
-        query = base
-    return await database.fetch_all(query)
+        order = "new"
+        query = columns.order_by(post_table.c.id.desc())
+        if after:
+            query = query.where(post_table.c.id < after["id"])
+
+    # Fetch one extra row to learn whether another page exists without a COUNT
+    return query.limit(limit + 1), order, limit
+
+
+@cached_view("posts.list_posts", tags=lambda *args, **kwargs: ["feed"])
+async def list_posts(
+    order: str = "new", limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    One keyset page of the feed plus the cursor for the next page (None on the last page).
+    Every order ends on the post id so ties are broken deterministically.
+    """
+    if order == "hot":
+        return await _hot_page(_posts_with_likes(), limit, cursor)
+    query, order, limit = _feed_query(_posts_with_likes(), order, limit, cursor)
+    rows = await database.fetch_all(query)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if order == "most_likes":
+        return rows, encode_cursor(order, likes=last["likes"], id=last["id"])
+    return rows, encode_cursor(order, id=last["id"])
+
+
+@cached_view("posts.list_posts_by_user", tags=lambda *args, **kwargs: ["feed"])
+async def list_posts_by_user(
+    username: str, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Optional[Tuple[List, Optional[str]]]:
+    """
+    One page of a user's posts, newest first, plus the next cursor; None if there is no such user.
+    Served by ix_posts_user_id_id, so a page costs O(limit) however many posts the user has.
+    """
+    user_id = await database.fetch_val(
+        sqlalchemy.select(user_table.c.id).where(user_table.c.username == username)
+    )
+    if user_id is None:
+        return None
+    columns = _posts_with_likes().where(post_table.c.user_id == user_id)
+    query, order, limit = _feed_query(columns, "new", limit, cursor)
+    rows = await database.fetch_all(query)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(order, id=rows[-1]["id"])
 
 
-async def get_post_with_comments(post_id: int):
-    base = (
-        sqlalchemy.select(
-            post_table,
-            func.count(likes_table.c.id).label("likes"),
+async def _hot_page(columns, limit: Optional[int], cursor: Optional[str]) -> Tuple[List, Optional[str]]:
+    # Order comes from the in-memory ranking; the rows (and current like counts) from the table
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, "hot", "score", "id")
+    ranking = await hot.ensure_fresh()
+    try:
+        ids, last, has_next = ranking.page(limit, after)
+    except (TypeError, ValueError) as e:
+        # decode_cursor checks key types; this keeps a bad score a 400 if that ever changes
+        raise InvalidCursor("Cursor has invalid sort key values") from e
+    if not ids:
+        return [], None
+    rows = await database.fetch_all(columns.where(post_table.c.id.in_(ids)))
+    by_id = {row["id"]: row for row in rows}
+    rows = [by_id[post_id] for post_id in ids if post_id in by_id]
+    if not has_next:
+        return rows, None
+    return rows, encode_cursor("hot", score=last[0], id=last[1])
+
+
+def _comments_json(page, dialect: Optional[str] = None):
+    """The comment page as one JSON array value: json_agg on PostgreSQL, json_group_array on SQLite."""
+    pairs = []
+    for column in page.c:
+        # Keys as SQL string literals: untyped bind parameters make asyncpg fail to prepare
+        pairs += [sqlalchemy.literal_column(f"'{column.name}'"), column]
+    if (dialect or engine.dialect.name) == "postgresql":
+        return sqlalchemy.func.json_agg(
+            aggregate_order_by(sqlalchemy.func.json_build_object(*pairs), page.c.created_at, page.c.id)
         )
-        .select_from(post_table.outerjoin(likes_table))
-        .where(post_table.c.id == post_id)
-        .group_by(post_table.c.id)
+    # No ORDER BY inside aggregates before SQLite 3.44; the caller sorts the decoded page
+    return sqlalchemy.func.json_group_array(sqlalchemy.func.json_object(*pairs))
+
+
+@cached_view("posts.get_post_with_comments", tags=lambda post_id, *args, **kwargs: [f"post:{post_id}"])
+async def get_post_with_comments(post_id: int, comments_limit: Optional[int] = None):
+    """
+    The post, its like count and the first page of comments (oldest first) in one round trip,
+    plus the cursor for the rest (GET /api/posts/{post_id}/comment?cursor=...).
+    """
+    limit = clamp_limit(comments_limit)
+    page = comment_page_query(post_id, limit + 1).subquery("page")
+    comments_json = sqlalchemy.select(_comments_json(page)).select_from(page).scalar_subquery()
+    query = _posts_with_likes().add_columns(comments_json.label("comments_json")).where(
+        post_table.c.id == post_id
     )
-    post = await database.fetch_one(base)
-    if not post:
+    row = await database.fetch_one(query)
+    if not row:
         return None
-    from src.views.comments import list_comments_for_post
+    post = dict(row._mapping)
+    comments = json.loads(post.pop("comments_json") or "[]")
+    comments.sort(key=lambda comment: (comment["created_at"], comment["id"]))
+    comments, cursor = split_page(comments, limit)
+    return {"post": post, "comments": comments, "comments_cursor": cursor}
+
+
+# --- Version markers (HTTP validators) ---
+# Posts are immutable apart from their like/comment counters, so (id, counters) identify a
+# post's rendering. Markers are computed both from the database (cheap, narrow queries) and
+# from a rendered result; they only match when the result is current.
+
+
+def feed_markers(rows, has_next: bool) -> tuple:
+    return tuple((row["id"], row["likes"]) for row in rows), has_next
 
-    comments = await list_comments_for_post(post_id)
-    return {"post": post, "comments": comments}
+
+async def fetch_feed_markers(
+    order: str = "new", limit: Optional[int] = None, cursor: Optional[str] = None
+) -> tuple:
+    columns = sqlalchemy.select(post_table.c.id, post_table.c.like_count.label("likes"))
+    if order == "hot":
+        rows, next_cursor = await _hot_page(columns, limit, cursor)
+        return feed_markers(rows, next_cursor is not None)
+    query, _, limit = _feed_query(columns, order, limit, cursor)
+    rows = await database.fetch_all(query)
+    return feed_markers(rows[:limit], len(rows) > limit)
+
+
+def post_markers(result) -> tuple:
+    # Post and comment page come from one query, so the counters describe the comments too
+    post = result["post"]
+    return post["id"], post["likes"], post["comment_count"]
+
+
+async def fetch_post_markers(post_id: int) -> Optional[tuple]:
+    query = sqlalchemy.select(post_table.c.like_count, post_table.c.comment_count).where(
+        post_table.c.id == post_id
+    )
+    row = await database.fetch_one(query)
+    if row is None:
+        return None
+    return post_id, row["like_count"], row["comment_count"]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from src.adapters.search import search_query, search_terms
+from src.db import database, engine
+from src.views.pagination import clamp_limit, decode_cursor, encode_cursor
+
+SEARCH_ORDER = "search"
+
+
+async def search_posts(
+    q: str, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Tuple[List, Optional[str]]:
+    """
+    One page of posts matching every word of `q`, best match first, plus the next cursor.
+    Scores shift as posts are added, so a page boundary is only stable for an unchanged corpus.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return [], None
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, SEARCH_ORDER, "score", "id")
+
+    rows = await database.fetch_all(search_query(engine.dialect.name, terms, limit + 1, after))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(SEARCH_ORDER, score=last["score"], id=last["id"])
@@ -0,0 +1,80 @@
+"""
+Single-flight coalescing for async read views.
+
+Concurrent calls with the same key share one in-flight execution instead of each running
+the query: the first caller starts it, later callers await the same result (or exception).
+The shared task is shielded, so a caller that disconnects does not cancel it for the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def call_key(name: str, args: tuple, kwargs: dict) -> str:
+    return f"{name}:{json.dumps([args, sorted(kwargs.items())], default=str)}"
+
+
+class SingleFlight:
+    def __init__(self, max_tracked_keys: int = 1000) -> None:
+        self.max_tracked_keys = max_tracked_keys
+        self.flights = 0
+        self.coalesced: Counter = Counter()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+            self.flights += 1
+        else:
+            self._count(key)
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here too, in case every caller went away
+
+    def _count(self, key: str) -> None:
+        self.coalesced[key] += 1
+        logger.debug("Coalesced call on %s", key)
+        if len(self.coalesced) > self.max_tracked_keys:
+            # Keep the hottest half so the per-key counts stay bounded
+            self.coalesced = Counter(dict(self.coalesced.most_common(self.max_tracked_keys // 2)))
+
+    def stats(self, top: int = 0) -> Dict[str, Any]:
+        """Aggregate counts; `top` > 0 adds the most coalesced keys, which embed call arguments."""
+        stats = {
+            "flights": self.flights,
+            "in_flight": len(self._inflight),
+            "coalesced": sum(self.coalesced.values()),
+        }
+        if top:
+            stats["top_coalesced"] = dict(self.coalesced.most_common(top))
+        return stats
+
+
+flights = SingleFlight()
+
+
+def single_flight(name: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """Coalesce concurrent identical calls (same `name` + arguments) of an async view."""
+
+    def decorator(view: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            return await flights.run(call_key(name, args, kwargs), lambda: view(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -1,15 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+from typing import Optional
+
 import sqlalchemy
 from sqlalchemy import func
-from src.db import database, likes_table, post_table, user_table
-
+from src.db import database, likes_table, post_table, user_stats_table, user_table
+from src.views.cache import cached_view
 
-async def get_profile_with_stats(user_id: int):
-    user = await database.fetch_one(user_table.select().where(user_table.c.id == user_id))
-    if not user:
-        return None
 
+def _stats_fallback_queries(user_id: int):
     posts_count_query = (
         sqlalchemy.select(func.count())
         .select_from(post_table)
@@ -20,18 +20,65 @@ async def get_profile_with_stats(user_id: int):
         .select_from(likes_table.join(post_table, likes_table.c.post_id == post_table.c.id))
         .where(post_table.c.user_id == user_id)
     )
-    posts_count = await database.fetch_val(posts_count_query) or 0
-    likes_received = await database.fetch_val(likes_received_query) or 0
+    return posts_count_query, likes_received_query
+
+
+@cached_view("users.get_profile_with_stats", tags=lambda user_id: [f"user:{user_id}", "profiles"])
+async def get_profile_with_stats(user_id: int):
+    # One primary-key lookup when the user_stats row exists
+    query = (
+        sqlalchemy.select(user_table, user_stats_table.c.posts_count, user_stats_table.c.likes_received)
+        .select_from(
+            user_table.outerjoin(user_stats_table, user_stats_table.c.user_id == user_table.c.id)
+        )
+        .where(user_table.c.id == user_id)
+    )
+    user = await database.fetch_one(query)
+    if not user:
+        return None
+
+    posts_count, likes_received = user["posts_count"], user["likes_received"]
+    if posts_count is None:
+        # No read model row yet (until the first post/like or a reconcile): count directly, concurrently
+        posts_count, likes_received = await asyncio.gather(
+            *(database.fetch_val(q) for q in _stats_fallback_queries(user_id))
+        )
 
     return {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "confirmed": user.confirmed,
-        "bio": user.bio,
-        "location": user.location,
-        "avatar_url": user.avatar_url,
-        "created_at": user.created_at,
-        "posts_count": posts_count,
-        "likes_received": likes_received,
+        "id": user["id"],
+        "username": user["username"],
+        "email": user["email"],
+        "confirmed": user["confirmed"],
+        "bio": user["bio"],
+        "location": user["location"],
+        "avatar_url": user["avatar_url"],
+        "created_at": user["created_at"],
+        "posts_count": posts_count or 0,
+        "likes_received": likes_received or 0,
     }
+
+
+_PROFILE_FIELDS = ("id", "username", "email", "confirmed", "bio", "location", "avatar_url")
+_STATS_FIELDS = ("posts_count", "likes_received")
+
+
+def profile_markers(profile) -> tuple:
+    return tuple(profile[name] for name in _PROFILE_FIELDS + _STATS_FIELDS)
+
+
+async def fetch_profile_markers(user_id: int) -> Optional[tuple]:
+    """
+    The markers alone, for the 304 check: one primary-key lookup of the profile columns and the
+    user_stats counters. Unlike the view it never counts posts and likes; a user without a
+    user_stats row gets None counters, which match no ETag, so they get the full view.
+    """
+    query = (
+        sqlalchemy.select(
+            *(user_table.c[name] for name in _PROFILE_FIELDS),
+            *(user_stats_table.c[name] for name in _STATS_FIELDS),
+        )
+        .select_from(user_table.outerjoin(user_stats_table, user_stats_table.c.user_id == user_table.c.id))
+        .where(user_table.c.id == user_id)
+    )
+    row = await database.fetch_one(query)
+    return profile_markers(row) if row is not None else None